@@ -0,0 +1,291 @@
+# FILE: environment/array_grid.py
+import numpy as np
+from helpers.essentials import perceptions, perception_codes
+
+EMPTY = -1
+
+
+class ArrayGrid:
+    """
+    A class to represent the grid of the environment as flat NumPy planes.
+
+    The grid can be indexed like the list based grid (grid[x][y]) and then
+    returns a thin ArrayCell view, so the entities do not notice the difference.
+
+    Attributes:
+    -----------
+    size : int
+        The size of the grid.
+    entity_ids : numpy.ndarray
+        An int32 plane with the slot of the entity in each cell (-1 for empty cells).
+    visible : numpy.ndarray
+        A bool plane with the visibility status of each cell.
+    counts : numpy.ndarray
+        A uint8 array with one count plane per perception code (see helpers.essentials).
+    slots : list
+        The entities referenced by the entity id plane.
+    changes : set or None
+        The set the (x, y) positions of cells are added to when their image
+        changes, see Cell.
+    """
+
+    def __init__(self, size, changes=None):
+        """
+        Initialize the ArrayGrid class with empty, hidden cells.
+
+        Parameters:
+        -----------
+        size : int
+            The size of the grid.
+        changes : set, optional
+            The set of changed positions of the grid (default is None to not track
+            changes).
+        """
+        self.size = size
+        self.changes = changes
+        self.entity_ids = np.full((size, size), EMPTY, dtype=np.int32)
+        self.visible = np.zeros((size, size), dtype=np.bool_)
+        self.counts = np.zeros((len(perceptions), size, size), dtype=np.uint8)
+        self.slots = []
+        self.free_slots = []
+
+    def __getitem__(self, x):
+        return ArrayColumn(self, x)
+
+    def __iter__(self):
+        for x in range(self.size):
+            yield ArrayColumn(self, x)
+
+    def __len__(self):
+        return self.size
+
+    def get_entity(self, x, y):
+        """
+        Get the entity at the given position.
+
+        Returns:
+        --------
+        Entity or None
+            The entity in the cell or None if the cell is empty.
+        """
+        slot = self.entity_ids[x, y]
+        if slot == EMPTY:
+            return None
+        return self.slots[slot]
+
+    def set_entity(self, x, y, entity):
+        """
+        Set an entity at the given position, reusing free slots.
+        """
+        self.clear_entity(x, y)
+        if entity is None:
+            return
+        if self.free_slots:
+            slot = self.free_slots.pop()
+            self.slots[slot] = entity
+        else:
+            slot = len(self.slots)
+            self.slots.append(entity)
+        self.entity_ids[x, y] = slot
+
+    def clear_entity(self, x, y):
+        """
+        Remove the entity at the given position and free its slot.
+        """
+        slot = self.entity_ids[x, y]
+        if slot == EMPTY:
+            return
+        self.slots[slot] = None
+        self.free_slots.append(int(slot))
+        self.entity_ids[x, y] = EMPTY
+
+    def add_perception(self, entity):
+        """
+        Add the perception of an entity to all cells of its perception field.
+
+        Parameters:
+        -----------
+        entity : Entity
+            The entity whose perception is added.
+        """
+        self.update_perception_field(entity, np.add)
+
+    def remove_perception(self, entity):
+        """
+        Remove the perception of an entity from all cells of its perception field.
+
+        Parameters:
+        -----------
+        entity : Entity
+            The entity whose perception is removed.
+        """
+        self.update_perception_field(entity, np.subtract)
+
+    def update_perception_field(self, entity, operation):
+        """
+        Apply an operation to the perception field of an entity with slice operations
+        instead of a loop over the cells.
+
+        Parameters:
+        -----------
+        entity : Entity
+            The entity whose perception field is updated.
+        operation : numpy.ufunc
+            np.add to add the perception, np.subtract to remove it.
+        """
+        if entity.perception_type not in perception_codes:
+            return
+        multiplier = entity.perception_range_multiplier
+        if multiplier <= 0:
+            return
+
+        plane = self.counts[perception_codes[entity.perception_type]]
+        x, y = entity.position
+        x0, x1 = max(x - multiplier, 0), min(x + multiplier + 1, self.size)
+        y0, y1 = max(y - multiplier, 0), min(y + multiplier + 1, self.size)
+        one = np.uint8(1)
+
+        if entity.perception_neighborhood == "moore":
+            square = plane[x0:x1, y0:y1]
+            operation(square, one, out=square)
+        elif entity.perception_neighborhood == "neumann":
+            row = plane[x0:x1, y]
+            operation(row, one, out=row)
+            column = plane[x, y0:y1]
+            operation(column, one, out=column)
+        else:
+            return
+
+        # the center is part of the slices but never part of the field
+        undo = np.subtract if operation is np.add else np.add
+        center = plane[x : x + 1, y : y + 1]
+        undo(center, one, out=center)
+        if entity.perception_neighborhood == "neumann":
+            undo(center, one, out=center)
+
+    def get_perception_counts(self, x, y):
+        """
+        Get the perception counts of a cell, indexed by perception code.
+
+        Returns:
+        --------
+        list
+            The count of each perception in the cell.
+        """
+        return self.counts[:, x, y].tolist()
+
+
+class ArrayColumn:
+    """
+    A thin view on one column of an ArrayGrid, so grid[x][y] keeps working.
+    """
+
+    __slots__ = ("grid", "x")
+
+    def __init__(self, grid, x):
+        self.grid = grid
+        self.x = x
+
+    def __getitem__(self, y):
+        if not 0 <= y < self.grid.size:
+            raise IndexError("Cell is out of the grid")
+        return ArrayCell(self.grid, self.x, y)
+
+    def __iter__(self):
+        for y in range(self.grid.size):
+            yield ArrayCell(self.grid, self.x, y)
+
+    def __len__(self):
+        return self.grid.size
+
+
+class ArrayCell:
+    """
+    A thin view on one cell of an ArrayGrid with the interface of Cell.
+
+    Attributes:
+    -----------
+    grid : ArrayGrid
+        The grid the cell belongs to.
+    x : int
+        The x-coordinate of the cell.
+    y : int
+        The y-coordinate of the cell.
+    """
+
+    __slots__ = ("grid", "x", "y")
+
+    def __init__(self, grid, x, y):
+        self.grid = grid
+        self.x = x
+        self.y = y
+
+    @property
+    def entity(self):
+        return self.grid.get_entity(self.x, self.y)
+
+    @property
+    def visible(self):
+        return bool(self.grid.visible[self.x, self.y])
+
+    @property
+    def perception_counts(self):
+        return self.grid.get_perception_counts(self.x, self.y)
+
+    @property
+    def perceptions(self):
+        counts = self.perception_counts
+        return [p for code, p in enumerate(perceptions) for _ in range(counts[code])]
+
+    def count(self, perception):
+        """
+        Get the count of a perception in the cell.
+        """
+        return int(self.grid.counts[perception_codes[perception], self.x, self.y])
+
+    @property
+    def current_image(self):
+        entity = self.entity
+        if entity and self.visible:
+            return entity.images.get(entity.current_image_key)
+        return None
+
+    def reveal(self):
+        """
+        Reveal the cell.
+        """
+        self.grid.visible[self.x, self.y] = True
+        self.update_image()
+
+    def update_image(self):
+        """
+        The image is looked up when it is drawn, only record the change.
+        """
+        if self.grid.changes is not None:
+            self.grid.changes.add((self.x, self.y))
+
+    def set_entity(self, entity):
+        """
+        Set an entity in the cell.
+        """
+        self.grid.set_entity(self.x, self.y, entity)
+        self.update_image()
+
+    def remove_entity(self):
+        """
+        Remove the entity from the cell.
+        """
+        self.grid.clear_entity(self.x, self.y)
+        self.update_image()
+
+    def interact(self, entity, interaction_type="neutral"):
+        """
+        Interact with the entity in the cell, see Cell.interact.
+        """
+        cell_entity = self.entity
+        if cell_entity:
+            cell_entity.interaction_beaviour(entity, interaction_type)
+            return True
+        else:
+            # No entity to interact with
+            return False
@@ -0,0 +1,148 @@
+# FILE: environment/blackboard.py
+from helpers.belief_map import BeliefMap
+from helpers.inference import HeuristicInference, ExactInference
+from helpers.pathfinding import DistanceField
+from helpers.trace import tracer, INFO, COMBAT
+
+
+class Blackboard:
+    """
+    A class to hold beliefs together with the inference and planner working on them.
+
+    An agent with knowledge_mode "own" keeps a private blackboard. With
+    knowledge_mode "team" all agents of an environment share one blackboard: they
+    publish their perceptions into the same BeliefMap, so every fact is estimated
+    once for the whole team instead of once per agent.
+
+    Attributes:
+    -----------
+    environment : Environment
+        The environment the beliefs are about.
+    owner : Agent or None
+        The agent of a private blackboard, None if it is shared by the team.
+    beliefs : BeliefMap
+        Perception counts and pit/wumpus probabilities for every cell of the grid.
+    inference : HeuristicInference or ExactInference
+        Keeps the probabilities of the beliefs up to date.
+    planner : DistanceField or None
+        The way to the nearest unvisited safe cell, None for random movement.
+    """
+
+    def __init__(
+        self,
+        environment,
+        owner=None,
+        inference_mode="heuristic",
+        movement_mode="random",
+    ):
+        """
+        Initialize the Blackboard class with empty beliefs.
+
+        Parameters:
+        -----------
+        environment : Environment
+            The environment the beliefs are about.
+        owner : Agent, optional
+            The agent of a private blackboard (default is None for a team blackboard).
+        inference_mode : str, optional
+            "heuristic" or "exact" (default is "heuristic").
+        movement_mode : str, optional
+            "random" or "planned" (default is "random").
+
+        Raises:
+        -------
+        ValueError
+            If a mode is invalid.
+        """
+        self.environment = environment
+        self.owner = owner
+        self.beliefs = BeliefMap(environment.size)
+
+        if inference_mode == "exact":
+            self.inference = ExactInference(self.beliefs, self, self.get_priors())
+        elif inference_mode == "heuristic":
+            self.inference = HeuristicInference(self.beliefs, self)
+        else:
+            raise ValueError(f"Invalid inference mode: {inference_mode}")
+
+        if movement_mode == "planned":
+            self.planner = DistanceField(self.beliefs)
+        elif movement_mode == "random":
+            self.planner = None
+        else:
+            raise ValueError(f"Invalid movement mode: {movement_mode}")
+
+    def __str__(self):
+        return str(self.owner) if self.owner else "Team"
+
+    def get_priors(self):
+        """
+        Get the density of pits and wumpus in the environment.
+
+        Returns:
+        --------
+        dict
+            The prior probability of a "pit" and a "wumpus" in an unknown cell.
+        """
+        counts = {
+            entity_type.__name__: count
+            for entity_type, count in self.environment.entity_counts.items()
+        }
+        cells = self.environment.size * self.environment.size
+        return {
+            "pit": counts.get("Pit", 0) / cells,
+            "wumpus": counts.get("Wumpus", 0) / cells,
+        }
+
+    def mark_changed(self, index):
+        """
+        Tell the planner that the facts of a cell changed (e.g. it was visited).
+        """
+        if self.planner:
+            self.planner.update((index,))
+
+    def propagate(self):
+        """
+        Estimate everything that depends on changed facts and reveal found wumpus.
+
+        Returns:
+        --------
+        set
+            The flat indices of the cells whose probabilities changed.
+        """
+        changed = self.inference.propagate()
+        self.reveal_wumpus(changed)
+        if self.planner:
+            self.planner.update(changed)
+        return changed
+
+    def settle(self):
+        """
+        Propagate and bring the planner up to date, afterwards the blackboard is only
+        read until facts change again, so agents can decide on it in parallel.
+        """
+        self.propagate()
+        if self.planner:
+            self.planner.get_distances()
+
+    def reveal_wumpus(self, indices=None):
+        """
+        Reveal the Wumpus if the probability for the cell with the Wumpus is 1.
+
+        Parameters:
+        -----------
+        indices : iterable, optional
+            The flat indices of the cells to check (default is all cells).
+        """
+        beliefs = self.beliefs
+        if indices is None:
+            indices = range(len(beliefs.wumpus))
+        for i in indices:
+            if beliefs.wumpus[i] == 1.0:
+                pos = beliefs.position(i)
+                cell = self.environment.grid[pos[0]][pos[1]]
+                if cell.entity and cell.entity.entity_type == "Wumpus":
+                    cell.entity.reveal()
+                    tracer.log(
+                        COMBAT, INFO, "%s revealed a Wumpus at %s!", str(self), pos
+                    )
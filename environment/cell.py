@@ -1,3 +1,6 @@
+from helpers.essentials import perceptions, perception_codes
+
+
 class Cell:
     """
     A class to represent a cell in the game environment.
@@ -8,13 +11,19 @@ class Cell:
         The entity present in the cell (default is None).
     visible : bool
         The visibility status of the cell (default is False).
-    perceptions : list
-        A list of perceptions in the cell (default is an empty list).
+    perception_counts : list
+        The count of each perception in the cell, indexed by perception code
+        (see helpers.essentials, default is all zero).
     current_image : pygame.Surface or None
         The current image to display for the cell (default is None).
+    position : tuple or None
+        The (x, y) position of the cell in the grid (default is None).
+    changes : set or None
+        The set the position is added to whenever the image of the cell changes,
+        so a renderer only redraws changed cells (default is None).
     """
 
-    def __init__(self, entity=None):
+    def __init__(self, entity=None, position=None, changes=None):
         """
         Initialize the Cell class.
 
@@ -22,13 +31,74 @@ class Cell:
         -----------
         entity : Entity or None, optional
             The entity present in the cell (default is None).
+        position : tuple, optional
+            The (x, y) position of the cell in the grid (default is None).
+        changes : set, optional
+            The set of changed positions of the grid (default is None to not track
+            changes).
         """
         self.entity = entity
         self.visible = False
-        self.perceptions = []
+        self.perception_counts = [0] * len(perceptions)
         self.current_image = None
+        self.position = position
+        self.changes = changes
         self.update_image()
 
+    @property
+    def perceptions(self):
+        """
+        A list of the perceptions in the cell, each repeated by its count.
+        """
+        counts = self.perception_counts
+        return [p for code, p in enumerate(perceptions) for _ in range(counts[code])]
+
+    def count(self, perception):
+        """
+        Get the count of a perception in the cell.
+
+        Parameters:
+        -----------
+        perception : str
+            The perception to count (e.g. "breeze").
+
+        Returns:
+        --------
+        int
+            How often the perception is in the cell.
+        """
+        return self.perception_counts[perception_codes[perception]]
+
+    def add_perception(self, perception):
+        """
+        Add a perception to the cell.
+
+        Parameters:
+        -----------
+        perception : str
+            The perception to add (e.g. "breeze").
+        """
+        self.perception_counts[perception_codes[perception]] += 1
+
+    def remove_perception(self, perception):
+        """
+        Remove a perception from the cell.
+
+        Parameters:
+        -----------
+        perception : str
+            The perception to remove (e.g. "breeze").
+
+        Raises:
+        -------
+        ValueError
+            If the perception is not in the cell.
+        """
+        code = perception_codes[perception]
+        if not self.perception_counts[code]:
+            raise ValueError(f"{perception} is not in the cell")
+        self.perception_counts[code] -= 1
+
     def reveal(self):
         """
         Reveal the cell and update its image.
@@ -41,9 +111,12 @@ class Cell:
         Update the current image of the cell based on its visibility and entity.
         """
         if self.entity and self.visible:
-            self.current_image = self.entity.images[self.entity.current_image_key]
+            # Headless entities have no images, so the cell stays without one
+            self.current_image = self.entity.images.get(self.entity.current_image_key)
         else:
             self.current_image = None
+        if self.changes is not None:
+            self.changes.add(self.position)
 
     def set_entity(self, entity):
         """
@@ -0,0 +1,384 @@
+# FILE: environment/distributed.py
+import multiprocessing
+import os
+import random
+import shutil
+import tempfile
+from multiprocessing.connection import Client, Listener
+from environment.environment import Environment
+from environment.message_bus import MessageBus
+
+# The seconds a worker gets to stop before it is terminated
+STOP_TIMEOUT = 5
+
+
+def build_world(seed, options):
+    """
+    Build the world of a seed, every process builds the same one.
+
+    Parameters:
+    -----------
+    seed : int
+        The seed for placing the entities and for the random generators of the
+        agents.
+    options : dict
+        Keyword arguments for the Environment, e.g. {"size": 10}.
+
+    Returns:
+    --------
+    tuple
+        The environment and the list of its agents, the position of an agent in
+        the list is its number in all processes.
+    """
+    random.seed(seed)
+    environment = Environment(headless=True, **options)
+    return environment, list(environment.entities.agents())
+
+
+def unpack_plans(agents, plans):
+    """
+    Turn plans sent between processes into plans for TickScheduler.commit.
+
+    The targets and exit votes of the agents are taken over from deciding, the
+    commit needs them to settle the intents and to end the game.
+
+    Parameters:
+    -----------
+    agents : list
+        The agents by number.
+    plans : list
+        (number, decision, target, exit vote, outbox) tuples, the outbox holds
+        (recipient number, message) pairs.
+
+    Returns:
+    --------
+    list
+        (agent, (decision, outbox)) pairs.
+    """
+    unpacked = []
+    for number, decision, target, exit_vote, outbox in plans:
+        agent = agents[number]
+        agent.control.target = target
+        agent.control.exit_vote = exit_vote
+        outbox = [(agents[recipient], message) for recipient, message in outbox]
+        unpacked.append((agent, (decision, outbox)))
+    return unpacked
+
+
+class BrokerBus(MessageBus):
+    """
+    A class to route the messages of a tick between the agent processes.
+
+    The broker holds the mailboxes like a MessageBus, but the recipients are
+    replicas, so deliver sends every mailbox to the process owning the recipient.
+    The answers come back and are delivered in the next round, in the order a
+    single MessageBus would deliver them.
+
+    Attributes:
+    -----------
+    connections : list
+        The connection to every worker process by worker number.
+    agents : list
+        The agents by number, agent n belongs to worker n % len(connections).
+    numbers : dict
+        A dictionary mapping the id of an agent to its number.
+    """
+
+    def __init__(self, connections, agents):
+        """
+        Initialize the BrokerBus class.
+
+        Parameters:
+        -----------
+        connections : list
+            The connection to every worker process by worker number.
+        agents : list
+            The agents by number.
+        """
+        super().__init__()
+        self.connections = connections
+        self.agents = agents
+        self.numbers = {id(agent): number for number, agent in enumerate(agents)}
+
+    def deliver(self):
+        """
+        Deliver all waiting messages in the worker processes, including the
+        answers they cause.
+
+        Returns:
+        --------
+        int
+            The number of delivered messages.
+        """
+        delivered = 0
+        workers = len(self.connections)
+        while self.mailboxes:
+            mailboxes, self.mailboxes = self.mailboxes, {}
+            batches = [[] for _ in range(workers)]
+            for recipient, messages in sorted(
+                mailboxes.values(), key=lambda mailbox: mailbox[0].position
+            ):
+                # agents that died since the message was sent do not answer
+                if not recipient.alive:
+                    continue
+                number = self.numbers[id(recipient)]
+                batches[number % workers].append((number, messages))
+                delivered += len(messages)
+
+            for connection, batch in zip(self.connections, batches):
+                connection.send(("deliver", batch))
+            answers = []
+            for connection in self.connections:
+                answers.extend(connection.recv())
+            # answer in the order the senders were served
+            answers.sort(key=lambda answer: self.agents[answer[0]].position)
+            for sender, recipient, message in answers:
+                self.send(self.agents[recipient], message)
+
+        for connection in self.connections:
+            connection.send(("delivered",))
+        return delivered
+
+
+class ReplicaBus(MessageBus):
+    """
+    A class to receive the messages of the own agents of a worker process.
+
+    Messages sent while deciding are collected as usual. The messages posted in
+    the commit phase are dropped, the broker holds the same ones and sends the
+    mailboxes of the own agents in deliver instead.
+
+    Attributes:
+    -----------
+    connection : Connection
+        The connection to the broker.
+    agents : list
+        The agents by number.
+    numbers : dict
+        A dictionary mapping the id of an agent to its number.
+    answers : list or None
+        The (sender number, recipient number, message) tuples sent while receiving.
+    sender : int or None
+        The number of the agent that receives a message and answers it.
+    """
+
+    def __init__(self, connection, agents):
+        """
+        Initialize the ReplicaBus class.
+
+        Parameters:
+        -----------
+        connection : Connection
+            The connection to the broker.
+        agents : list
+            The agents by number.
+        """
+        super().__init__()
+        self.connection = connection
+        self.agents = agents
+        self.numbers = {id(agent): number for number, agent in enumerate(agents)}
+        self.answers = None
+        self.sender = None
+
+    def send(self, recipient, message):
+        """
+        Put a message into the mailbox of a recipient or, while receiving, into the
+        answers for the broker.
+        """
+        if self.answers is None:
+            super().send(recipient, message)
+        else:
+            self.answers.append((self.sender, self.numbers[id(recipient)], message))
+
+    def deliver(self):
+        """
+        Receive the mailboxes of the own agents from the broker and answer until
+        the broker is done.
+
+        Returns:
+        --------
+        int
+            The number of delivered messages.
+        """
+        self.mailboxes = {}
+        delivered = 0
+        while True:
+            request = self.connection.recv()
+            if request[0] == "delivered":
+                return delivered
+            self.answers = []
+            for number, messages in request[1]:
+                recipient = self.agents[number]
+                self.sender = number
+                for message in messages:
+                    recipient.receive(message)
+                delivered += len(messages)
+            answers, self.answers = self.answers, None
+            self.connection.send(answers)
+
+
+def serve_agents(address, worker, workers, seed, options):
+    """
+    Run the agents of a worker process until the broker stops it.
+
+    The worker builds a replica of the world and owns every agent whose number n
+    has n % workers == worker. Every tick it decides for the own agents, sends the
+    plans to the broker and commits the plans of all agents, so its replica stays
+    equal to the world of the broker.
+
+    Parameters:
+    -----------
+    address : str
+        The path of the Unix socket of the broker.
+    worker : int
+        The number of the worker.
+    workers : int
+        The number of worker processes.
+    seed : int
+        The seed of the world.
+    options : dict
+        Keyword arguments for the Environment.
+    """
+    environment, agents = build_world(seed, options)
+    own = agents[worker::workers]
+    scheduler = environment.scheduler
+    with Client(address, family="AF_UNIX") as connection:
+        connection.send(worker)
+        bus = environment.messages = ReplicaBus(connection, agents)
+        while True:
+            request = connection.recv()
+            if request[0] == "tick":
+                scheduler.begin()
+                plans = []
+                for agent in own:
+                    if not (agent.alive and agent.auto_mode):
+                        continue
+                    decision, outbox = scheduler.decide(agent)
+                    outbox = [
+                        (bus.numbers[id(recipient)], message)
+                        for recipient, message in outbox
+                    ]
+                    control = agent.control
+                    plans.append(
+                        (
+                            bus.numbers[id(agent)],
+                            decision,
+                            control.target,
+                            control.exit_vote,
+                            outbox,
+                        )
+                    )
+                connection.send(plans)
+            elif request[0] == "commit":
+                scheduler.commit(unpack_plans(agents, request[1]))
+            elif request[0] == "stop":
+                return
+
+
+class ProcessRuntime:
+    """
+    A class to run the agents of a world in several worker processes.
+
+    The runtime is the broker and the authoritative server: it holds the world,
+    collects the plans of all workers every tick, sends them back to be committed
+    in every process and routes the messages over a Unix socket. Whispers and
+    shouts keep their meaning, as every process replicates the positions of all
+    agents. The agents of one process decide one after another, so the workers
+    use the cores like separate simulations. With the own knowledge mode the
+    games are the same as in a single process, with the team mode the agents of a
+    process share one blackboard.
+
+    Attributes:
+    -----------
+    environment : Environment
+        The authoritative world.
+    agents : list
+        The agents by number.
+    processes : list
+        The worker processes.
+    connections : list
+        The connection to every worker by worker number.
+    directory : str
+        The temporary directory holding the Unix socket.
+    listener : Listener
+        The listener the workers connect to.
+    """
+
+    def __init__(self, seed, workers=2, **options):
+        """
+        Initialize the ProcessRuntime class and start the workers.
+
+        Parameters:
+        -----------
+        seed : int
+            The seed of the world, all processes build the world from it.
+        workers : int, optional
+            The number of worker processes (default is 2).
+        **options
+            Keyword arguments for the Environment, e.g. size=10.
+        """
+        self.directory = tempfile.mkdtemp()
+        address = os.path.join(self.directory, "broker.sock")
+        self.listener = Listener(address, family="AF_UNIX")
+        self.processes = [
+            multiprocessing.Process(
+                target=serve_agents,
+                args=(address, worker, workers, seed, options),
+                daemon=True,
+            )
+            for worker in range(workers)
+        ]
+        for process in self.processes:
+            process.start()
+
+        self.connections = [None] * workers
+        for _ in range(workers):
+            connection = self.listener.accept()
+            self.connections[connection.recv()] = connection
+
+        self.environment, self.agents = build_world(seed, options)
+        self.environment.messages = BrokerBus(self.connections, self.agents)
+
+    def step(self):
+        """
+        Advance the world by one tick, letting every auto agent act once.
+        """
+        environment = self.environment
+        environment.scheduler.begin()
+        for connection in self.connections:
+            connection.send(("tick",))
+        plans = []
+        for connection in self.connections:
+            plans.extend(connection.recv())
+        plans.sort(key=lambda plan: plan[0])
+
+        for connection in self.connections:
+            connection.send(("commit", plans))
+        environment.scheduler.commit(unpack_plans(self.agents, plans))
+
+    def close(self):
+        """
+        Stop the workers and remove the socket. Workers that died are skipped,
+        workers that do not stop in time are terminated.
+        """
+        try:
+            for connection in self.connections:
+                if connection is None:
+                    continue
+                try:
+                    connection.send(("stop",))
+                except OSError:
+                    # the worker is gone already, its error is raised by step
+                    pass
+                try:
+                    connection.close()
+                except OSError:
+                    pass
+            for process in self.processes:
+                process.join(STOP_TIMEOUT)
+                if process.is_alive():
+                    process.terminate()
+                    process.join()
+        finally:
+            self.listener.close()
+            shutil.rmtree(self.directory, ignore_errors=True)
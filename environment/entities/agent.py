@@ -8,14 +8,35 @@ from helpers.neighborhood import (
 import random
 
 
+from environment.blackboard import Blackboard
+from helpers.belief_map import BeliefMap, ControlState, UNKNOWN
+from helpers.messages import Message, MessageKind
+from helpers.trace import (
+    tracer,
+    DEBUG,
+    INFO,
+    WARNING,
+    PERCEPTION,
+    ESTIMATE,
+    MESSAGE,
+    COMBAT,
+    MOVEMENT,
+    GAME,
+)
 from helpers.essentials import (
-    perception_to_target,
-    targets,
+    Action,
+    move_actions,
+    turn_actions,
+    perception_codes,
     delta_to_direction,
     get_direction,
-    parse_pos_str_to_tuple,
 )
 
+# Perception codes, index of Cell.perception_counts
+BREEZE = perception_codes["breeze"]
+STENCH = perception_codes["stench"]
+SHININESS = perception_codes["shininess"]
+
 
 @dataclass
 class Agent(Entity):
@@ -40,12 +61,32 @@ class Agent(Entity):
         The auto mode status of the agent.
     missed_shots_left : int
         The number of missed shots left for the agent.
-    memory : dict
-        Count of perceptions assigned to each cell (default is a grid of the same size as the cell grid of dictionaries with None values for each perception that exists on the cells).
+    beliefs : BeliefMap
+        Perception counts and pit/wumpus probabilities for every cell of the grid.
+    blackboard : Blackboard
+        The private or team blackboard holding the beliefs, inference and planner.
+    control : ControlState
+        The target, arrow target, shininess flag, killed wumpus and exit vote of the
+        agent.
+    last_digest : int or None
+        The belief digest seen by the last stagnation check.
+    stable_checks : int
+        How many stagnation checks in a row saw the same belief digest.
     targeted_cells : list
         A list of targeted cells for the agent.
-    strategy : str
-        The movement strategy of the agent (default is "random").
+    movement_mode : str
+        The movement strategy of the agent, "random" steps to a random safe neighbor
+        and "planned" walks the shortest safe way to the nearest unvisited safe cell
+        (default is "random").
+    inference_mode : str
+        How the pit and wumpus probabilities are estimated, "heuristic" or "exact"
+        (default is "heuristic").
+    knowledge_mode : str
+        "own" keeps private beliefs, "team" shares the blackboard of the environment
+        with all other team agents (default is "own").
+    rng : random.Random
+        The random generator of the agent, seeded from the global one when the agent
+        is placed, so decisions do not depend on the order agents decide in.
     """
 
     entity_type: str = "Agent"
@@ -63,24 +104,57 @@ class Agent(Entity):
     score: int = 0
     auto_mode: bool = True
     missed_shots_left: int = 2
-    memory: dict = field(default_factory=dict)
-    last_memories: list = field(
-        default_factory=list
-    )  # For checking if memory is changing
+    beliefs: BeliefMap = field(default=None)
+    control: ControlState = field(default_factory=ControlState)
+    last_digest: int = None  # For checking if memory is changing
+    stable_checks: int = 0
     targeted_cells: list = field(default_factory=list)
     movement_mode: str = "random"
     vote_admin: bool = False
     vote_state: str = "exit"
+    inference_mode: str = "heuristic"
+    knowledge_mode: str = "own"
+    rng: random.Random = field(default=None, repr=False)
+
+    # One handler per action code, shared by all agents
+    action_handlers = {
+        Action.NEUTRAL: lambda agent: None,
+        Action.MOVE_FRONT: lambda agent: agent.move("front"),
+        Action.MOVE_BACK: lambda agent: agent.move("back"),
+        Action.MOVE_LEFT: lambda agent: agent.move("left"),
+        Action.MOVE_RIGHT: lambda agent: agent.move("right"),
+        Action.TURN_FRONT: lambda agent: agent.change_direction("front"),
+        Action.TURN_BACK: lambda agent: agent.change_direction("back"),
+        Action.TURN_LEFT: lambda agent: agent.change_direction("left"),
+        Action.TURN_RIGHT: lambda agent: agent.change_direction("right"),
+        Action.ATTACK: lambda agent: agent.attack(),
+        Action.COLLECT: lambda agent: agent.collect(),
+        Action.COMMUNICATE: lambda agent: agent.communicate(),
+    }
 
     def __post_init__(self):
         """
         Post-initialization to reveal the initial cell.
         """
         super().__post_init__()
-        self.memory["target"] = None  # Initialize target
-        self.memory["reserved_cells"] = []  # Initialize reserved_cells
-        # self.memory["last_target"] = None
-        self.memory["arrow_target"] = None
+        if self.rng is None:
+            self.rng = random.Random(random.getrandbits(64))
+        if self.knowledge_mode == "team":
+            # the first team agent sets up the blackboard for all others
+            if self.environment.blackboard is None:
+                self.environment.blackboard = Blackboard(
+                    self.environment, None, self.inference_mode, self.movement_mode
+                )
+            self.blackboard = self.environment.blackboard
+        elif self.knowledge_mode == "own":
+            self.blackboard = Blackboard(
+                self.environment, self, self.inference_mode, self.movement_mode
+            )
+        else:
+            raise ValueError(f"Invalid knowledge mode: {self.knowledge_mode}")
+        self.beliefs = self.blackboard.beliefs
+        self.inference = self.blackboard.inference
+        self.planner = self.blackboard.planner
 
         self.reveal_initial_cell()
         # self.perceive()
@@ -95,163 +169,82 @@ class Agent(Entity):
         x, y = self.position
         self.environment.grid[x][y].reveal()
 
-    def reveal_wumpus(self):
+    def observe(self):
         """
-        Reveal the Wumpus if the probability for the cell with the Wumpus is 1.
-        """
-        for pos, data in self.memory.items():
-            if isinstance(pos, tuple) and data.get("wumpus") == 1.0:
-                cell = self.environment.grid[pos[0]][pos[1]]
-                if cell.entity and cell.entity.entity_type == "Wumpus":
-                    cell.entity.reveal()
-                    print(f"{self} revealed a Wumpus at {pos}!")
-
-    def perceive(self):
-        """
-        Logic for the agent to perceive its surroundings.
+        Take over the perceptions of the current cell into the beliefs.
 
         Returns:
         --------
-        list
-            A list of perceptions in the current field.
+        int
+            The flat index of the current cell.
         """
-        # was_visited = False
         x, y = self.position
+        beliefs = self.beliefs
+        i = beliefs.index((x, y))
 
         current_cell = self.environment.grid[x][y]
-        if (x, y) in self.memory:
-            # was_visited = self.memory[(x, y)]["visited"]
-            self.memory[(x, y)]["visited"] = True
-        else:
-            # using numbers, same perception multiple times is possible
-            # also save probabilities of entities
-            self.memory[(x, y)] = {
-                "visited": True,
-                "breeze": 0,
-                "stench": 0,
-                # "shininess": 0,
-                "pit": 0.0,
-                "wumpus": 0.0,
-                # "gold": 0.0,
-            }
-
-        # initialise neighbors in memory
-        for nx, ny in neumann_neighborhood(x, y, self.environment.size):
-            if (nx, ny) not in self.memory:
-                self.memory[(nx, ny)] = {
-                    "visited": False,
-                    "breeze": 0,
-                    "stench": 0,
-                    # "shininess": 0,
-                    "pit": None,
-                    "wumpus": None,
-                    # "gold": None,
-                }
-
-        if current_cell.perceptions:
-            print(f"{self} perceives: {current_cell.perceptions}")
-
-            # reset counts, perceptions can change (shininess)
-            self.memory[(x, y)].update(
-                {
-                    "breeze": 0,
-                    "stench": 0,
-                    # "shininess": 0,
-                }
-            )
+        facts = (beliefs.visited[i], beliefs.breeze[i], beliefs.stench[i])
+        beliefs.visited[i] = 1
 
-            for perception in current_cell.perceptions:
-                if perception == "shininess":
-                    self.memory["shininess"] = True
-                    continue
+        counts = current_cell.perception_counts
+        if any(counts):
+            # take over the counts, perceptions can change (shininess)
+            # using numbers, same perception multiple times is possible
+            beliefs.breeze[i] = counts[BREEZE]
+            beliefs.stench[i] = counts[STENCH]
+            if counts[SHININESS]:
+                self.control.shininess = True
 
-                self.memory[(x, y)][perception] += 1
+        # estimate only what depends on changed facts
+        if facts != (beliefs.visited[i], beliefs.breeze[i], beliefs.stench[i]):
+            self.inference.invalidate(i)
+            self.blackboard.mark_changed(i)
+        return i
 
-        # estimate probabilities
-        for nx, ny in neumann_neighborhood(x, y, self.environment.size):
-            self.estimate_cell((nx, ny))
+    def perceive(self):
+        """
+        Logic for the agent to perceive its surroundings.
 
-        self.reveal_wumpus()
+        The perceptions are taken over into the beliefs and everything depending on
+        them is estimated. On a team blackboard most of it was estimated already
+        at the start of the tick.
+        """
+        x, y = self.position
+        self.observe()
+        current_cell = self.environment.grid[x][y]
+        if any(current_cell.perception_counts) and tracer.enabled(PERCEPTION, DEBUG):
+            tracer.log(
+                PERCEPTION,
+                DEBUG,
+                "Agent at %s perceives: %s",
+                self.position,
+                current_cell.perceptions,
+            )
+        self.blackboard.propagate()
 
-        # print(self.memory)
-        print(f"------ {self} estimates ------")
-        for nx, ny in neumann_neighborhood(x, y, self.environment.size):
-            self.print_probs((nx, ny))
-        print("------------")
+        if tracer.enabled(ESTIMATE, DEBUG):
+            for nx, ny in neumann_neighborhood(x, y, self.environment.size):
+                self.print_probs((nx, ny))
 
     def estimate_cell(self, pos):
         """
-        Estimates entity probabilities of corresponding cell based on data in memory
+        Estimates entity probabilities of corresponding cell based on the beliefs
 
         Parameters:
         -----------
             pos: tuple (int, int)
         """
-
-        if pos in self.memory and self.memory[pos]["visited"]:
-            self.memory[pos].update(
-                {
-                    "pit": 0.0,
-                    "wumpus": 0.0,
-                    # "gold": 0.0,
-                }
-            )
-            return None
-
-        # check neighbors for perceptions
-        for x, y in neumann_neighborhood(pos[0], pos[1], self.environment.size):
-            # only visited cells can have perceptions in memory
-            if (x, y) in self.memory and self.memory[(x, y)]["visited"]:
-
-                for perception, amount in self.memory[(x, y)].items():
-                    if perception in ["visited"] + targets:
-                        continue
-                    target = perception_to_target[perception]
-
-                    if not amount:
-                        self.memory[pos][target] = 0.0
-                        continue
-
-                    # only use max prob (but dont overwrite a 0 or 1)
-                    if (
-                        self.memory[pos][target] != 0
-                        and self.memory[pos][target] != 1.0
-                    ):
-
-                        # get possible neighbors for target (of this neighbor)
-                        # reduce amount by already determined neighbor cells
-                        possible_neighbors = 0
-                        for nx, ny in neumann_neighborhood(x, y, self.environment.size):
-                            if (nx, ny) not in self.memory or (
-                                not self.memory[(nx, ny)]["visited"]
-                                and self.memory[(nx, ny)][target] != 0
-                                and self.memory[(nx, ny)][target] != 1
-                            ):
-                                possible_neighbors += 1
-                            if (nx, ny) in self.memory and self.memory[(nx, ny)][
-                                target
-                            ] == 1.0:
-                                amount -= 1
-
-                        if amount and possible_neighbors == 0:
-                            print(f"{self} warning: not possible")
-                            continue
-
-                        prob = amount / possible_neighbors
-
-                        if (
-                            not self.memory[pos][target]
-                            or self.memory[pos][target] < prob
-                            or prob == 0
-                        ):
-                            self.memory[pos][target] = prob
+        self.inference.estimate(self.beliefs.index(pos))
 
     def print_probs(self, pos):
-        if pos in self.memory:
-            d = dict(filter(lambda item: item[0] in targets, self.memory[pos].items()))
-            print(f"{pos}: {d}")
-        else:
-            print("unknown")
+        tracer.log(
+            ESTIMATE,
+            DEBUG,
+            "Agent at %s estimates %s: %s",
+            self.position,
+            pos,
+            self.beliefs.describe(self.beliefs.index(pos)),
+        )
 
     def decide(self):
         """
@@ -259,102 +252,133 @@ class Agent(Entity):
 
         Returns:
         --------
-        str
-            The decision made by the agent (default is "neutral").
+        Action
+            The decision made by the agent (default is Action.NEUTRAL).
         """
 
         if self.check_memory_stagnation() and not self.vote_admin:
             self.vote_admin = True
             self.vote_state = "exit"
-            self.shout("vote")
+            self.shout(Message(MessageKind.VOTE))
         elif self.vote_admin:
             if self.vote_state == "exit":
-                self.environment.game_over = True
-                for row in self.environment.grid:
-                    for cell in row:
-                        cell.reveal()
+                # the game ends in the commit phase, see TickScheduler
+                self.control.exit_vote = True
             else:
                 self.vote_admin = False
 
         # check if gold has to be collected (new approach)
-        if "shininess" in self.memory and self.memory["shininess"]:
-            self.memory["shininess"] = False
-            return "collect"
+        if self.control.shininess:
+            self.control.shininess = False
+            return Action.COLLECT
 
         # check if wumpus is dead and broadcast
-        if self.memory["arrow_target"]:
-            if self.position == self.memory["arrow_target"]:
+        if self.control.arrow_target:
+            if self.position == self.control.arrow_target:
                 # TODO: maybe shout as own action, but how to transfer data (message)?
-                self.shout(f"wumpus killed: {self.position}")
-                self.memory["arrow_target"] = None
-                self.forget_wumpus(self.position)
+                self.shout(Message(MessageKind.WUMPUS_KILLED, self.position))
+                self.control.arrow_target = None
+                # the beliefs can be shared with the team, so they are only
+                # changed in the commit phase, see perform
+                self.control.killed_wumpus = self.position
             else:
-                return (
-                    f"move_{get_direction(self.position, self.memory['arrow_target'])}"
-                )
+                return move_actions[
+                    get_direction(self.position, self.control.arrow_target)
+                ]
 
         # check if wumpus is clear and shoot
         for cell_pos in neumann_neighborhood(
             self.position[0], self.position[1], self.environment.size
         ):
-            if self.memory[cell_pos]["wumpus"] == 1.0:
+            if self.beliefs.wumpus[self.beliefs.index(cell_pos)] == 1.0:
                 required_direction = get_direction(self.position, cell_pos)
                 if self.direction == required_direction:
-                    self.memory["arrow_target"] = cell_pos
-                    return "attack"
-                return f"turn_{required_direction}"
-
-        # move (safe and coordinated)
-        if not self.memory["target"]:
+                    self.control.arrow_target = cell_pos
+                    # the agent walks to the arrow, its old target is not adjacent then
+                    self.control.target = None
+                    return Action.ATTACK
+                return turn_actions[required_direction]
+
+        # move (safe and coordinated by the reservation table)
+        control = self.control
+        reservations = self.environment.reservations
+        if control.target and reservations.is_blocked(self, control.target):
+            # another agent got the cell
+            control.target = None
+
+        if not control.target and self.planner:
+            control.target = self.plan_next_step()
+
+        if not control.target:
             safe_cells = []
             for x, y in neumann_neighborhood(
                 self.position[0], self.position[1], self.environment.size
             ):
-                if (
-                    (x, y) in self.memory
-                    and self.memory[(x, y)]["pit"] == 0.0
-                    and self.memory[(x, y)]["wumpus"] == 0.0
-                    and (x, y) not in self.memory["reserved_cells"]
-                ):
+                if reservations.is_blocked(self, (x, y)):
+                    continue
+                if self.beliefs.is_safe(self.beliefs.index((x, y))):
                     safe_cells.append((x, y))
-                # also append externaly visited cells to explore them
-                if (
-                    (x, y) not in safe_cells
-                    and (x, y) not in self.memory["reserved_cells"]
-                    and self.environment.grid[x][y].visible
+                    continue
+                # also append externaly visited cells to explore them,
+                # but never step into a revealed pit or wumpus
+                cell = self.environment.grid[x][y]
+                if cell.visible and not (
+                    cell.entity and cell.entity.entity_type in ("Pit", "Wumpus")
                 ):
                     safe_cells.append((x, y))
 
-            if safe_cells:
-                # explore
-                unvisited_cells = []
-                for cell in safe_cells:
-                    if not self.memory[cell]["visited"]:
-                        unvisited_cells.append(cell)
-                if unvisited_cells:
-                    self.memory["target"] = random.choice(unvisited_cells)
-                    return "communicate"
-
-                # go back
-                self.memory["target"] = random.choice(safe_cells)
-                return "communicate"
-            else:
+            if not safe_cells:
                 # TODO: do a risky strat, if all are stuck or Agent cant be reached
-                print(f"{self} is stuck, needs help")
-                self.whisper(f"I am stuck: {self.position}")
-                # reserved cells have to be resetted, beacuse the agent does not move
-                self.memory["reserved_cells"] = []
+                tracer.log(
+                    MOVEMENT, INFO, "Agent at %s is stuck, needs help", self.position
+                )
+                self.whisper(Message(MessageKind.STUCK, self.position))
+                return Action.NEUTRAL
+
+            # explore
+            unvisited_cells = []
+            for cell in safe_cells:
+                if not self.beliefs.visited[self.beliefs.index(cell)]:
+                    unvisited_cells.append(cell)
+            if unvisited_cells:
+                control.target = self.rng.choice(unvisited_cells)
+            else:
+                # go back
+                control.target = self.rng.choice(safe_cells)
 
-        elif self.direction != get_direction(self.position, self.memory["target"]):
-            return f"turn_{get_direction(self.position, self.memory['target'])}"
-        else:
-            action = f"move_{get_direction(self.position, self.memory['target'])}"
-            self.memory["reserved_cells"] = []
-            # self.memory["last_target"] = self.memory["target"]
-            self.memory["target"] = None
-            return action
+        # the target is reserved when the scheduler settles the tick, so the agent
+        # turns or moves right away
+        direction = get_direction(self.position, control.target)
+        if self.direction != direction:
+            return turn_actions[direction]
+        control.target = None
+        return move_actions[direction]
 
-        return "neutral"
+    def plan_next_step(self):
+        """
+        Get the next cell on the shortest safe way to the nearest unvisited safe cell.
+
+        Returns:
+        --------
+        tuple or None
+            The neighbor cell to move to or None if no unvisited safe cell is reachable.
+        """
+        beliefs = self.beliefs
+        index = beliefs.index(self.position)
+        blocked = [
+            n
+            for n in self.planner.neighbor_table[index]
+            if self.environment.reservations.is_blocked(self, beliefs.position(n))
+        ]
+        steps = self.planner.next_steps(index, blocked)
+        if not steps:
+            return None
+        positions = [beliefs.position(step) for step in steps]
+        # keep walking straight if possible, turning costs a tick
+        for pos in positions:
+            if get_direction(self.position, pos) == self.direction:
+                return pos
+        return self.rng.choice(positions)
 
     def act(self, decision=None):
         """
@@ -362,28 +386,33 @@ class Agent(Entity):
 
         Parameters:
         -----------
-        decision : str, optional
+        decision : Action, optional
             The decision to act upon. Given decision, if in manual mode and call decide() if in auto mode.
         """
         self.perceive()
         if self.auto_mode:
             decision = self.decide()
+        self.perform(decision)
 
-        actions = {
-            "move_front": lambda: self.move("front"),
-            "move_back": lambda: self.move("back"),
-            "move_left": lambda: self.move("left"),
-            "move_right": lambda: self.move("right"),
-            "turn_front": lambda: self.change_direction("front"),
-            "turn_back": lambda: self.change_direction("back"),
-            "turn_left": lambda: self.change_direction("left"),
-            "turn_right": lambda: self.change_direction("right"),
-            "attack": self.attack,
-            "collect": self.collect,
-            "communicate": self.communicate,
-            "neutral": lambda: None,
-        }
-        actions.get(decision, lambda: print("Invalid decision"))()
+    def perform(self, decision):
+        """
+        Perform a decided action without perceiving and deciding first. A wumpus
+        killed in the decide phase is forgotten before.
+
+        Parameters:
+        -----------
+        decision : Action
+            The decision to act upon (e.g. Action.MOVE_FRONT).
+        """
+        if self.control.killed_wumpus:
+            self.forget_wumpus(self.control.killed_wumpus)
+            self.control.killed_wumpus = None
+
+        handler = self.action_handlers.get(decision)
+        if handler is None:
+            tracer.log(GAME, WARNING, "Invalid decision %s", decision)
+            return
+        handler(self)
 
     def get_new_position_and_check_bounds(self, direction):
         """
@@ -434,7 +463,7 @@ class Agent(Entity):
         try:
             new_position = self.get_new_position_and_check_bounds(direction)
         except (IndexError, ValueError) as e:
-            print(e)
+            tracer.log(MOVEMENT, DEBUG, "%s", e)
             return
 
         new_cell = self.environment.grid[new_position[0]][new_position[1]]
@@ -451,10 +480,7 @@ class Agent(Entity):
 
         if new_cell.entity is None:
             # Update the grid
-            old_cell = self.environment.grid[self.position[0]][self.position[1]]
-            old_cell.remove_entity()
-            new_cell.set_entity(self)
-            self.position = new_position
+            self.environment.move_entity(self, new_position)
             # self.perceive()
 
     def get_facing_neighbor_cell(self):
@@ -490,12 +516,15 @@ class Agent(Entity):
         Perform an attack action in the direction the agent is facing.
         """
         if self.missed_shots_left == 0:
-            print(f"{self} has no more arrows!")
+            tracer.log(COMBAT, INFO, "Agent at %s has no more arrows!", self.position)
             return
 
         neighbor_cell = self.get_facing_neighbor_cell()
-        if not neighbor_cell.interact(self, interaction_type="attack"):
-            print(f"{self} missed the shot!")
+        # shots out of the grid count as missed
+        if neighbor_cell is None or not neighbor_cell.interact(
+            self, interaction_type="attack"
+        ):
+            tracer.log(COMBAT, INFO, "Agent at %s missed the shot!", self.position)
             self.missed_shots_left -= 1
 
     def collect(self):
@@ -505,20 +534,32 @@ class Agent(Entity):
         neighbor_cell = self.get_facing_neighbor_cell()
 
         if neighbor_cell is None:
-            print(f"{self} is facing out of bounds!")
+            tracer.log(
+                MOVEMENT, DEBUG, "Agent at %s is facing out of bounds!", self.position
+            )
             return
         if not neighbor_cell.interact(self, interaction_type="collect"):
-            print(f"{self} cannot collect from this cell!")
+            tracer.log(
+                GAME, DEBUG, "Agent at %s cannot collect from this cell!", self.position
+            )
 
     def communicate(self):
         """
-        Perform a communication action with other agents in the neighborhood.
-        """
-        if self.memory["target"]:
-            message = f'want to move: {self.position}->{self.memory["target"]}'  # Using single quotes outside
+        Announce the current target to the other agents by reserving it.
 
-        print(f"{self} communicates: {message}")
-        self.whisper(message)
+        Auto agents do not need this, the scheduler reserves their targets every
+        tick. It lets a manual agent keep the others off its next cell.
+        """
+        if not self.control.target:
+            return
+        tracer.log(
+            MESSAGE,
+            DEBUG,
+            "Agent at %s claims %s",
+            self.position,
+            self.control.target,
+        )
+        self.environment.reservations.claim(self, self.control.target)
 
     def whisper(self, message):
         """
@@ -526,44 +567,33 @@ class Agent(Entity):
 
         Parameters:
         -----------
-        message : str
-            The message to whisper.
+        message : Message
+            The message to whisper, it is delivered at the end of the tick.
         """
         x, y = self.position
         neighbors = whisper_neighborhood(x, y, self.environment.size)
         for nx, ny in neighbors:
             cell = self.environment.grid[nx][ny]
             if cell.entity and cell.entity.entity_type == "Agent":
-                cell.entity.receive_message(message)
-
-    def get_all_probabilities(self):
-        """Get dictionary of all position probabilities from memory"""
-        prob_dict = {}
-        for key, value in self.memory.items():
-            # Skip non-position entries
-            if not isinstance(key, tuple):
-                continue
-            # Get probabilities for this position
-            prob_dict[key] = {"pit": value["pit"], "wumpus": value["wumpus"]}
-        return prob_dict
+                self.environment.messages.send(cell.entity, message)
 
     def check_memory_stagnation(self):
-        """Check if memory probabilities haven't changed in last 10 steps"""
-        current_probs = str(self.get_all_probabilities())
-        self.last_memories.append(current_probs)
-
-        if len(self.last_memories) > 20:
-            self.last_memories.pop(0)
-            if len(set(self.last_memories)) == 1:  # All memories are identical
-                return True
-        return False
+        """Check if memory probabilities haven't changed in last 20 checks"""
+        digest = self.beliefs.digest
+        if digest == self.last_digest:
+            self.stable_checks += 1
+        else:
+            # like a full window of 20 memories, the first check does not count
+            self.stable_checks = 0 if self.last_digest is None else 1
+            self.last_digest = digest
+        return self.stable_checks >= 20
 
     def vote(self):
         """Cast a vote if memory is stagnant"""
         if self.check_memory_stagnation():
-            self.shout("exit")
+            self.shout(Message(MessageKind.EXIT))
         else:
-            self.shout("stay")
+            self.shout(Message(MessageKind.STAY))
 
     def shout(self, message):
         """
@@ -571,108 +601,77 @@ class Agent(Entity):
 
         Parameters:
         -----------
-        message : str
-            The message to shout.
+        message : Message
+            The message to shout, it is delivered at the end of the tick.
         """
-        print(f"{self} shouts: {message}")
-        for entity in self.environment.entities:
-            if (
-                entity.entity_type == "Agent" and entity != self
-            ):  # maybe also include self to induce process
-                entity.receive_message(message)
+        tracer.log(MESSAGE, DEBUG, "Agent at %s shouts: %s", self.position, message)
+        for agent in self.environment.entities.agents():
+            if agent is not self:  # maybe also include self to induce process
+                self.environment.messages.send(agent, message)
 
     def receive_message(self, message):
         """
-        Receive a message from another agent.
+        Receive a message of the string protocol from another agent.
 
         Parameters:
         -----------
         message : str
+            The message received, e.g. "safe cell at: (1, 2)".
+        """
+        self.receive(Message.from_string(message))
+
+    def receive(self, message):
+        """
+        Receive a message from another agent.
+
+        Parameters:
+        -----------
+        message : Message
             The message received.
         """
-        print(f"{self} received message: {message}")
+        tracer.log(
+            MESSAGE, DEBUG, "Agent at %s received message: %s", self.position, message
+        )
+        pos = message.position
 
-        if ":" in message:
-            action, data = message.split(":")
-            if "->" in message:
-                pos = None
-                data1, data2 = data.split("->")
-                pos1 = parse_pos_str_to_tuple(data1.strip())
-                pos2 = parse_pos_str_to_tuple(data2.strip())
-            else:
-                pos = parse_pos_str_to_tuple(data.strip())
-        else:
-            data = None
-            pos = None
-            action = message
-
-        match action.strip():
-            case "want to move":
-                self.memory["reserved_cells"].append(pos1)
-                current_target = self.memory.get("target")
-                if current_target and pos2 == current_target:
-                    # TODO: auction
-                    outcome = random.choice([True, False])
-                    if outcome:
-                        self.whisper(f"deny: {pos2}")
-                    else:
-                        self.whisper(f"allow: {pos2}")
-                        self.memory["target"] = None
-                        self.memory["reserved_cells"].append(pos2)
-                else:
-                    self.memory["reserved_cells"].append(pos2)
-            case "deny":
-                self.memory["reserved_cells"].append(pos)
-                self.memory["target"] = None
-            case "allow":
-                pass
-                # do not add add pos to reserved neighbors
-
-            case "wumpus killed":
-                self.forget_wumpus(pos)
-
-            case "I am stuck":
+        match message.kind:
+            case MessageKind.WUMPUS_KILLED:
+                # a team blackboard was updated by the agent that killed it
+                if self.knowledge_mode == "own":
+                    self.forget_wumpus(pos)
+
+            case MessageKind.STUCK:
                 # TODO: maybe answer a safe neighbor cell the recieving Agent knows
-                self.memory["reserved_cells"].append(pos)
                 for cell_pos in neumann_neighborhood(
                     pos[0], pos[1], self.environment.size
                 ):
-                    if cell_pos in self.memory and (
-                        self.memory[cell_pos]["visited"]
-                        or (
-                            self.memory[cell_pos]["wumpus"] == 0.0
-                            and self.memory[cell_pos]["pit"] == 0.0
-                        )
-                    ):
-                        self.whisper(f"safe cell at: {cell_pos}")
-
-            case "safe cell at":
-                if pos in self.memory:
-                    self.memory[pos]["wumpus"] = 0.0
-                    self.memory[pos]["pit"] = 0.0
-                else:
-                    self.memory[pos] = {
-                        "visited": False,
-                        "breeze": 0,
-                        "stench": 0,
-                        # "shininess": 0,
-                        "pit": 0.0,
-                        "wumpus": 0.0,
-                        # "gold": 0.0,
-                    }
-                print(f"{self} added safe cell at {pos} to memory")
-
-            case "vote":
+                    i = self.beliefs.index(cell_pos)
+                    if self.beliefs.visited[i] or self.beliefs.is_safe(i):
+                        self.whisper(Message(MessageKind.SAFE_CELL, cell_pos))
+
+            case MessageKind.SAFE_CELL:
+                i = self.beliefs.index(pos)
+                self.inference.set_safe(i)
+                self.blackboard.mark_changed(i)
+                tracer.log(
+                    MESSAGE,
+                    DEBUG,
+                    "Agent at %s added safe cell at %s to memory",
+                    self.position,
+                    pos,
+                )
+
+            case MessageKind.VOTE:
                 if not self.vote_admin:
                     self.vote()
 
-            case "stay":
+            case MessageKind.STAY:
                 if self.vote_admin:
                     self.vote_state = "stay"
 
     def forget_wumpus(self, pos):
         """
-        Removes everything related to the wumpus from memory at given position
+        Removes everything related to the wumpus from the beliefs at given position
 
         Parameters:
         -----------
@@ -680,16 +679,21 @@ class Agent(Entity):
             where the wumpus was killed
         """
 
-        # prop has to be None and visited to false to reevaluate
-        if pos in self.memory:
-            self.memory[pos]["visited"] = False
-            self.memory[pos]["wumpus"] = None
-            self.memory[pos]["stench"] = 0
+        # prop has to be unknown and visited to false to reevaluate
+        self.forget_wumpus_cell(pos)
 
         for cell_pos in neumann_neighborhood(
             self.position[0], self.position[1], self.environment.size
         ):
-            if cell_pos in self.memory:
-                self.memory[cell_pos]["visited"] = False
-                self.memory[cell_pos]["wumpus"] = None
-                self.memory[cell_pos]["stench"] = 0
+            self.forget_wumpus_cell(cell_pos)
+
+    def forget_wumpus_cell(self, pos):
+        """
+        Resets the wumpus related beliefs of a single cell
+        """
+        i = self.beliefs.index(pos)
+        self.beliefs.visited[i] = 0
+        self.beliefs.set_probability("wumpus", i, UNKNOWN)
+        self.beliefs.stench[i] = 0
+        self.inference.invalidate(i)
+        self.blackboard.mark_changed(i)
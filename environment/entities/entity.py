@@ -1,6 +1,5 @@
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields
 from helpers.neighborhood import neumann_neighborhood, moore_neighborhood
-from helpers.image_processing import load_and_scale_image
 
 # FILE: environment/entity.py
 
@@ -54,9 +53,23 @@ class Entity:
     perception_fields: list = field(default_factory=list)
     direction: str = field(default="front")
 
-    # Class-level cache for images
+    # Class-level cache for images by (entity_type, cell_size)
     _image_cache = {}
 
+    @classmethod
+    def default_image_paths(cls):
+        """
+        Get the image paths the entities of a subclass start with, e.g. to preload
+        them before any entity exists.
+
+        Returns:
+        --------
+        dict
+            A dictionary mapping image keys to image file paths.
+        """
+        image_paths = next(f for f in fields(cls) if f.name == "image_paths")
+        return image_paths.default_factory()
+
     def die(self):
         """
         Mark the entity as dead and remove it from the environment.
@@ -82,15 +95,24 @@ class Entity:
     def update_images(self):
         """
         Load and cache images for the entity based on its type and image paths.
+        Headless environments get no images, so pygame is never imported.
         """
-        if self.entity_type not in Entity._image_cache:
-            Entity._image_cache[self.entity_type] = {}
-            for key, path in self.image_paths.items():
-                Entity._image_cache[self.entity_type][key] = load_and_scale_image(
-                    path, self.environment.cell_size
-                )
+        if self.environment.headless:
+            self.images = {}
+            return
+
+        # Imported lazily so headless worlds never pull in pygame
+        from helpers.image_processing import load_and_scale_image
+
+        # Environments with another cell size need their own scaled images
+        cache_key = self.entity_type, self.environment.cell_size
+        if cache_key not in Entity._image_cache:
+            Entity._image_cache[cache_key] = {
+                key: load_and_scale_image(path, self.environment.cell_size)
+                for key, path in self.image_paths.items()
+            }
 
-        self.images = Entity._image_cache[self.entity_type]
+        self.images = Entity._image_cache[cache_key]
 
     def update_image_key(self, new_image_key):
         """
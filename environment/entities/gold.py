@@ -1,6 +1,7 @@
 # FILE: environment/gold.py
 from .entity import Entity
 from dataclasses import dataclass, field
+from helpers.trace import tracer, INFO, GAME
 
 
 @dataclass
@@ -60,6 +61,6 @@ class Gold(Entity):
             agent.perceive()
 
         if interaction_type == "collect":
-            print(f"{agent} collected a gold!")
+            tracer.log(GAME, INFO, "Agent at %s collected a gold!", agent.position)
             agent.score += self.reward
             self.die()
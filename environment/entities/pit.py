@@ -1,5 +1,6 @@
 from .entity import Entity
 from dataclasses import dataclass, field
+from helpers.trace import tracer, INFO, GAME
 
 # FILE: environment/pit.py
 
@@ -51,6 +52,6 @@ class Pit(Entity):
             The type of interaction (e.g., "neutral").
         """
         if interaction_type == "neutral":
-            print("Agent has fallen into a pit!")
+            tracer.log(GAME, INFO, "Agent at %s has fallen into a pit!", agent.position)
             agent.die()
             self.reveal()
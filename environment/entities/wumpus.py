@@ -1,6 +1,7 @@
 # FILE: environment/wumpus.py
 from .entity import Entity
 from dataclasses import dataclass, field
+from helpers.trace import tracer, INFO, COMBAT
 
 
 @dataclass
@@ -49,14 +50,14 @@ class Wumpus(Entity):
             The type of interaction (e.g., "neutral", "attack").
         """
         if interaction_type == "neutral":
-            print(
-                f"                                                     !!!!!! {agent} has been killed by a Wumpus !!!!!!"
+            tracer.log(
+                COMBAT, INFO, "Agent at %s has been killed by a Wumpus!", agent.position
             )
             agent.die()
             self.reveal()
 
         elif interaction_type == "attack":
-            print(f"{agent} killed a Wumpus!")
+            tracer.log(COMBAT, INFO, "Agent at %s killed a Wumpus!", agent.position)
             agent.score += self.reward
             self.reveal()
             self.die()
@@ -1,6 +1,10 @@
 # FILE: environment/environment.py
 import random
 from environment.cell import Cell
+from environment.message_bus import MessageBus
+from environment.registry import EntityRegistry
+from environment.reservations import ReservationTable
+from environment.scheduler import TickScheduler
 from environment.entities import Wumpus, Pit, Gold, Agent
 
 
@@ -12,17 +16,44 @@ class Environment:
     -----------
     size : int
         The size of the environment grid passed from the main file.
-    cell_size : int
+    cell_size : int or None
         The size of each cell in the grid passed from the main file.
-    grid : list
-        A 2D list representing the grid of cells.
-    entities : list
-        A list to keep track of all entities in the environment.
+    headless : bool
+        Whether the environment runs without pygame images.
+    array_grid : bool
+        Whether the grid is backed by NumPy planes instead of Cell objects.
+    grid : list or ArrayGrid
+        A 2D list representing the grid of cells, or an ArrayGrid with the same indexing.
+    changed_cells : set
+        The (x, y) positions of cells whose image changed, a renderer takes them out
+        to redraw only those.
+    entities : EntityRegistry
+        A registry to keep track of all entities in the environment by type and position.
+    blackboard : Blackboard or None
+        The beliefs shared by agents with knowledge_mode "team", set up by the first
+        of them.
+    scheduler : TickScheduler
+        Advances the environment tick by tick.
+    reservations : ReservationTable
+        The cells agents are heading to, settled once per tick.
+    messages : MessageBus
+        The mailboxes of the agents, delivered at the end of every tick.
     entity_counts : dict
         A dictionary to specify the number of each type of entity.
+    agent_options : dict
+        Keyword arguments passed to every placed agent (e.g. inference_mode).
     """
 
-    def __init__(self, size, cell_size):
+    def __init__(
+        self,
+        size,
+        cell_size=None,
+        headless=False,
+        array_grid=False,
+        agent_options=None,
+        entity_counts=None,
+        executor=None,
+    ):
         """
         Initialize the Environment class and place entities in the grid.
 
@@ -30,16 +61,46 @@ class Environment:
         -----------
         size : int
             The size of the environment grid.
-        cell_size : int
-            The size of each cell in the grid.
+        cell_size : int, optional
+            The size of each cell in the grid (only needed for rendering).
+        headless : bool, optional
+            Build the world without loading any images or importing pygame (default is False).
+        array_grid : bool, optional
+            Store the grid in NumPy planes, which keeps big worlds small (default is False).
+        agent_options : dict, optional
+            Keyword arguments passed to every placed agent (default is None).
+        entity_counts : dict, optional
+            Numbers of entities per type overriding the defaults, e.g. {Agent: 50}
+            (default is None).
+        executor : concurrent.futures.Executor, optional
+            A thread pool the agents decide in every tick (default is None).
         """
         self.size = size
         self.cell_size = cell_size
-        self.grid = [[Cell() for _ in range(size)] for _ in range(size)]
+        self.headless = headless
+        self.array_grid = array_grid
+        self.agent_options = agent_options or {}
+        # Cells whose image changed since the renderer last drew them
+        self.changed_cells = set()
+        if array_grid:
+            # Imported lazily so the default grid does not need NumPy
+            from environment.array_grid import ArrayGrid
+
+            self.grid = ArrayGrid(size, self.changed_cells)
+        else:
+            self.grid = [
+                [Cell(position=(x, y), changes=self.changed_cells) for y in range(size)]
+                for x in range(size)
+            ]
         self.game_over = False
-        self.entities = []
+        self.entities = EntityRegistry()
+        self.messages = MessageBus()
+        self.blackboard = None
+        self.scheduler = TickScheduler(self, executor)
+        self.reservations = ReservationTable(self)
         # Entities defined first will be placed first
         self.entity_counts = {Wumpus: 1, Gold: 10, Pit: 10, Agent: 5}
+        self.entity_counts.update(entity_counts or {})
         self.place_entities()
 
         # pre-determined test field:
@@ -100,9 +161,10 @@ class Environment:
         cell = self.grid[x][y]
         # Check if the cell is empty
         if cell.entity is None:
-            entity = entity_type(self, (x, y))
+            options = self.agent_options if entity_type is Agent else {}
+            entity = entity_type(self, (x, y), **options)
             cell.set_entity(entity)
-            self.entities.append(entity)
+            self.entities.add(entity)
             self.update_perceptions(entity)
 
     def update_perceptions(self, entity):
@@ -115,8 +177,11 @@ class Environment:
             The entity whose perception fields need to be updated.
         """
         entity.calculate_perception_fields()
+        if self.array_grid:
+            self.grid.add_perception(entity)
+            return
         for px, py in entity.perception_fields:
-            self.grid[px][py].perceptions.append(entity.perception_type)
+            self.grid[px][py].add_perception(entity.perception_type)
 
     def remove_entity(self, entity):
         """
@@ -129,11 +194,79 @@ class Environment:
         """
         x, y = entity.position
         cell = self.grid[x][y]
-        for px, py in cell.entity.perception_fields:
-            self.grid[px][py].perceptions.remove(cell.entity.perception_type)
+        if self.array_grid:
+            self.grid.remove_perception(entity)
+        else:
+            for px, py in cell.entity.perception_fields:
+                self.grid[px][py].remove_perception(cell.entity.perception_type)
         self.entities.remove(entity)
         cell.remove_entity()
 
+    def move_entity(self, entity, new_position):
+        """
+        Move an entity to an empty cell.
+
+        Parameters:
+        -----------
+        entity : Entity
+            The entity to move.
+        new_position : tuple
+            The (x, y) position of the empty cell.
+        """
+        old_cell = self.grid[entity.position[0]][entity.position[1]]
+        old_cell.remove_entity()
+        self.grid[new_position[0]][new_position[1]].set_entity(entity)
+        self.entities.move(entity, new_position)
+
+    def get_auto_agents(self):
+        """
+        Get all alive agents that are controlled by the simulation.
+
+        Returns:
+        --------
+        list
+            A list of alive agents with auto_mode set to True.
+        """
+        return [agent for agent in self.entities.agents() if agent.auto_mode]
+
+    def publish_perceptions(self, agents):
+        """
+        Let the team agents publish their perceptions and settle the blackboard, so
+        one inference pass per tick serves the whole team.
+
+        Parameters:
+        -----------
+        agents : list
+            The agents about to act.
+        """
+        if not self.blackboard:
+            return
+        for agent in agents:
+            if agent.knowledge_mode == "team":
+                agent.observe()
+        self.blackboard.settle()
+
+    def step(self):
+        """
+        Advance the simulation by one tick, letting every auto agent act once.
+        The agents decide on the world of the start of the tick and their actions
+        and messages are committed afterwards, see TickScheduler.
+        """
+        self.scheduler.step()
+
+    def is_done(self):
+        """
+        Check if the episode has ended.
+
+        Returns:
+        --------
+        bool
+            True if the agents ended the game or no auto agent is alive anymore.
+        """
+        return self.game_over or not any(
+            agent.auto_mode for agent in self.entities.agents()
+        )
+
     def get_all_agents_in_range(self, position, range=None):
         """
         Get all agents within a specified range of a position.
@@ -0,0 +1,268 @@
+# FILE: environment/gym_environment.py
+import random
+import numpy as np
+from environment.environment import Environment
+from environment.entities import Agent
+from helpers.essentials import Action, directions
+
+# Value of unknown probabilities in the belief planes of the observations
+UNKNOWN_PROBABILITY = -1.0
+
+# Order of the belief planes in the observations
+BELIEF_PLANES = ("pit", "wumpus", "visited")
+
+
+class GymEnvironment:
+    """
+    A class to train policies against N Environments with a reset/step API.
+
+    The worlds are full Environments, so the agents keep their beliefs and the
+    rules are the ones of the game, but the policy decides instead of
+    Agent.decide: every step commits one Action code per agent through the
+    TickScheduler and lets the agents perceive the result, nothing is drawn.
+    Finished worlds are reset right away with the next seed, so the worlds never
+    have to be waited for.
+
+    Observations are a dictionary of arrays with a leading (num_worlds, num_agents)
+    shape:
+
+    - "perceptions": uint8 (..., 3) breeze, stench and shininess counts of the
+      cell of the agent, see Cell.perceptions
+    - "position": int64 (..., 2) the (x, y) position of the agent
+    - "direction": int8 (...) the direction code, see helpers.essentials.directions
+    - "beliefs": float32 (..., 3, size, size) the pit and wumpus probabilities
+      (UNKNOWN_PROBABILITY where unknown) and the visited cells of the agent
+
+    Dead agents observe zeros and their actions are ignored.
+
+    Attributes:
+    -----------
+    num_worlds : int
+        The number of worlds.
+    size : int
+        The size of each world grid.
+    num_agents : int
+        The number of agents per world.
+    max_ticks : int or None
+        The number of ticks after which a world is cut off.
+    environments : list
+        The current Environment of every world.
+    agents : list
+        The agents of every world by index.
+    seeds : list
+        The seed of the current episode of every world.
+    ticks : numpy.ndarray
+        An int64 array (num_worlds,) with the ticks since the last reset.
+    completed : list
+        (seed, ticks, score) of every finished episode, the score summed over its
+        agents.
+    """
+
+    def __init__(
+        self,
+        num_worlds,
+        size=10,
+        entity_counts=None,
+        agent_options=None,
+        max_ticks=500,
+        autoreset=True,
+    ):
+        """
+        Initialize the GymEnvironment class, call reset before stepping.
+
+        Parameters:
+        -----------
+        num_worlds : int
+            The number of worlds.
+        size : int, optional
+            The size of each world grid (default is 10).
+        entity_counts : dict, optional
+            Numbers of entities per type overriding the defaults of Environment,
+            e.g. {Agent: 3} (default is None).
+        agent_options : dict, optional
+            Keyword arguments passed to every agent, e.g. {"inference_mode":
+            "exact"} (default is None).
+        max_ticks : int, optional
+            Cut a world off after this many ticks, None for no limit
+            (default is 500).
+        autoreset : bool, optional
+            Reset finished worlds in step (default is True).
+        """
+        self.num_worlds = num_worlds
+        self.size = size
+        self.entity_counts = entity_counts
+        # the policy acts for the agents, the scheduler must not decide for them
+        self.agent_options = {**(agent_options or {}), "auto_mode": False}
+        self.max_ticks = max_ticks
+        self.autoreset = autoreset
+        counts = {Agent: 5}
+        counts.update(entity_counts or {})
+        self.num_agents = counts[Agent]
+        self.environments = [None] * num_worlds
+        self.agents = [[] for _ in range(num_worlds)]
+        self.seeds = [None] * num_worlds
+        self.next_seed = None
+        self.ticks = np.zeros(num_worlds, dtype=np.int64)
+        self.completed = []
+
+    def reset(self, seed=None, worlds=None):
+        """
+        Build new worlds for all or some of the worlds.
+
+        Parameters:
+        -----------
+        seed : int, optional
+            The seed of the first reset world, the following ones and later
+            automatic resets count up (default is None for random worlds).
+        worlds : iterable, optional
+            The indices of the worlds to reset (default is all worlds).
+
+        Returns:
+        --------
+        dict
+            The observations of all worlds.
+        """
+        if seed is not None:
+            self.next_seed = seed
+        for w in range(self.num_worlds) if worlds is None else worlds:
+            self.reset_world(w)
+        return self.observe()
+
+    def reset_world(self, w):
+        """
+        Build a new world for world w and let its agents perceive their cells.
+        """
+        seed = self.next_seed
+        if seed is not None:
+            random.seed(seed)
+            self.next_seed = seed + 1
+        environment = Environment(
+            self.size,
+            headless=True,
+            agent_options=self.agent_options,
+            entity_counts=self.entity_counts,
+        )
+        self.environments[w] = environment
+        self.agents[w] = list(environment.entities.agents())
+        self.seeds[w] = seed
+        self.ticks[w] = 0
+        self.perceive(environment, self.agents[w])
+
+    def perceive(self, environment, agents):
+        """
+        Let the alive agents of a world take over the perceptions of their cells.
+        """
+        alive = [agent for agent in agents if agent.alive]
+        environment.publish_perceptions(alive)
+        for agent in alive:
+            agent.perceive()
+
+    def step(self, actions):
+        """
+        Advance all worlds by one tick.
+
+        Parameters:
+        -----------
+        actions : array_like
+            An int array (num_worlds, num_agents) with one Action code per agent.
+
+        Returns:
+        --------
+        tuple
+            The observations, the rewards (num_worlds, num_agents) as the change of
+            the agent scores and the done flags (num_worlds,). With autoreset, the
+            observations of finished worlds are the ones of their new episode.
+
+        Raises:
+        -------
+        ValueError
+            If an action is not an Action code.
+        """
+        actions = np.asarray(actions)
+        rewards = np.zeros((self.num_worlds, self.num_agents), dtype=np.int64)
+        dones = np.zeros(self.num_worlds, dtype=np.bool_)
+
+        for w, environment in enumerate(self.environments):
+            agents = self.agents[w]
+            scores = [agent.score for agent in agents]
+            scheduler = environment.scheduler
+            scheduler.begin()
+            scheduler.commit(
+                [
+                    (agent, (Action(int(actions[w, a])), []))
+                    for a, agent in enumerate(agents)
+                    if agent.alive
+                ]
+            )
+            self.perceive(environment, agents)
+            for a, agent in enumerate(agents):
+                rewards[w, a] = agent.score - scores[a]
+            self.ticks[w] += 1
+            dones[w] = self.is_done(w)
+
+        for w in np.nonzero(dones)[0]:
+            score = sum(agent.score for agent in self.agents[w])
+            self.completed.append((self.seeds[w], int(self.ticks[w]), score))
+            if self.autoreset:
+                self.reset_world(w)
+        return self.observe(), rewards, dones
+
+    def is_done(self, w):
+        """
+        Check if world w has ended.
+
+        Returns:
+        --------
+        bool
+            True if no agent is alive, no wumpus and gold is left, the agents voted
+            to end the game or the world ran out of ticks.
+        """
+        environment = self.environments[w]
+        entities = environment.entities
+        return (
+            environment.game_over
+            or not entities.agents()
+            or not (entities.of_type("Wumpus") or entities.of_type("Gold"))
+            or (self.max_ticks is not None and self.ticks[w] >= self.max_ticks)
+        )
+
+    def observe(self):
+        """
+        Get the observations of all agents.
+
+        Returns:
+        --------
+        dict
+            The "perceptions", "position", "direction" and "beliefs" arrays.
+        """
+        shape = (self.num_worlds, self.num_agents)
+        cells = self.size * self.size
+        perceptions = np.zeros(shape + (3,), dtype=np.uint8)
+        positions = np.zeros(shape + (2,), dtype=np.int64)
+        agent_directions = np.zeros(shape, dtype=np.int8)
+        beliefs = np.zeros(shape + (len(BELIEF_PLANES), cells), dtype=np.float32)
+
+        for w, environment in enumerate(self.environments):
+            grid = environment.grid
+            for a, agent in enumerate(self.agents[w]):
+                if not agent.alive:
+                    continue
+                x, y = agent.position
+                perceptions[w, a] = grid[x][y].perception_counts
+                positions[w, a] = x, y
+                agent_directions[w, a] = directions.index(agent.direction)
+                # the belief arrays share their memory with NumPy, no copies
+                memory = agent.beliefs
+                beliefs[w, a, 0] = np.frombuffer(memory.pit, dtype=np.float32)
+                beliefs[w, a, 1] = np.frombuffer(memory.wumpus, dtype=np.float32)
+                beliefs[w, a, 2] = np.frombuffer(memory.visited, dtype=np.uint8)
+
+        np.nan_to_num(beliefs, copy=False, nan=UNKNOWN_PROBABILITY)
+        return {
+            "perceptions": perceptions,
+            "position": positions,
+            "direction": agent_directions,
+            "beliefs": beliefs.reshape(
+                shape + (len(BELIEF_PLANES), self.size, self.size)
+            ),
+        }
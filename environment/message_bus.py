@@ -0,0 +1,105 @@
+# FILE: environment/message_bus.py
+import contextlib
+import threading
+
+
+class MessageBus:
+    """
+    A class to pass messages between agents at the end of a tick.
+
+    Sent messages wait in a mailbox per recipient and are delivered together by
+    deliver, so a receiver never runs in the middle of the sender's action.
+    Answers sent while messages are delivered are delivered in the same call.
+    Inside collect, the messages a thread sends are held back instead, so agents
+    deciding in parallel can post them later in a fixed order. Recipients are
+    served by their position, so the answers they send do not depend on the order
+    the agents are stored in either.
+
+    Attributes:
+    -----------
+    mailboxes : dict
+        A dictionary mapping the id of a recipient to the recipient and its list of
+        waiting messages.
+    """
+
+    def __init__(self):
+        """
+        Initialize the MessageBus class with empty mailboxes.
+        """
+        self.mailboxes = {}
+        self.local = threading.local()
+
+    def __len__(self):
+        return sum(len(messages) for _, messages in self.mailboxes.values())
+
+    def send(self, recipient, message):
+        """
+        Put a message into the mailbox of a recipient.
+
+        Parameters:
+        -----------
+        recipient : Agent
+            The agent to receive the message.
+        message : Message
+            The message to send.
+        """
+        outbox = getattr(self.local, "outbox", None)
+        if outbox is not None:
+            outbox.append((recipient, message))
+            return
+        mailbox = self.mailboxes.get(id(recipient))
+        if mailbox is None:
+            self.mailboxes[id(recipient)] = (recipient, [message])
+        else:
+            mailbox[1].append(message)
+
+    @contextlib.contextmanager
+    def collect(self):
+        """
+        Hold back the messages the current thread sends until post is called.
+
+        Yields:
+        -------
+        list
+            The held back (recipient, message) pairs in the order they were sent.
+        """
+        outbox = self.local.outbox = []
+        try:
+            yield outbox
+        finally:
+            self.local.outbox = None
+
+    def post(self, outbox):
+        """
+        Put held back messages into the mailboxes of their recipients.
+
+        Parameters:
+        -----------
+        outbox : list
+            (recipient, message) pairs as collected by collect.
+        """
+        for recipient, message in outbox:
+            self.send(recipient, message)
+
+    def deliver(self):
+        """
+        Deliver all waiting messages, including the answers they cause.
+
+        Returns:
+        --------
+        int
+            The number of delivered messages.
+        """
+        delivered = 0
+        while self.mailboxes:
+            mailboxes, self.mailboxes = self.mailboxes, {}
+            for recipient, messages in sorted(
+                mailboxes.values(), key=lambda mailbox: mailbox[0].position
+            ):
+                # agents that died since the message was sent do not answer
+                if not recipient.alive:
+                    continue
+                for message in messages:
+                    recipient.receive(message)
+                delivered += len(messages)
+        return delivered
@@ -0,0 +1,126 @@
+# FILE: environment/registry.py
+
+
+class EntityRegistry:
+    """
+    A class to keep track of all entities in the environment.
+
+    Besides iterating all entities in the order they were added, the registry
+    keeps an index per entity type and a position index, so adding, removing and
+    looking up entities is O(1). Entities are keyed by id, because dataclass
+    entities are not hashable.
+
+    Attributes:
+    -----------
+    by_type : dict
+        A dictionary mapping entity types (e.g. "Agent") to {id: entity} dictionaries.
+    positions : dict
+        A dictionary mapping (x, y) positions to the entity at that position.
+    """
+
+    def __init__(self):
+        """
+        Initialize the EntityRegistry class without entities.
+        """
+        self.entities = {}
+        self.by_type = {}
+        self.positions = {}
+
+    def __iter__(self):
+        return iter(list(self.entities.values()))
+
+    def __len__(self):
+        return len(self.entities)
+
+    def __contains__(self, entity):
+        return id(entity) in self.entities
+
+    def add(self, entity):
+        """
+        Add an entity to the registry.
+
+        Parameters:
+        -----------
+        entity : Entity
+            The entity to add.
+        """
+        key = id(entity)
+        self.entities[key] = entity
+        self.by_type.setdefault(entity.entity_type, {})[key] = entity
+        self.positions[entity.position] = entity
+
+    def remove(self, entity):
+        """
+        Remove an entity from the registry.
+
+        Parameters:
+        -----------
+        entity : Entity
+            The entity to remove.
+
+        Raises:
+        -------
+        ValueError
+            If the entity is not in the registry.
+        """
+        key = id(entity)
+        if key not in self.entities:
+            raise ValueError("Entity is not in the registry")
+        del self.entities[key]
+        del self.by_type[entity.entity_type][key]
+        if self.positions.get(entity.position) is entity:
+            del self.positions[entity.position]
+
+    def move(self, entity, new_position):
+        """
+        Move an entity to a new position and update the position index.
+
+        Parameters:
+        -----------
+        entity : Entity
+            The entity to move.
+        new_position : tuple
+            The new (x, y) position.
+        """
+        if self.positions.get(entity.position) is entity:
+            del self.positions[entity.position]
+        entity.position = new_position
+        self.positions[new_position] = entity
+
+    def of_type(self, entity_type):
+        """
+        Get all entities of a type.
+
+        Parameters:
+        -----------
+        entity_type : str
+            The type of the entities (e.g. "Agent").
+
+        Returns:
+        --------
+        dict_values
+            A view of the entities of the type in the order they were added.
+        """
+        return self.by_type.get(entity_type, {}).values()
+
+    def agents(self):
+        """
+        Get all agents, dead agents are removed from the registry.
+
+        Returns:
+        --------
+        dict_values
+            A view of the alive agents in the order they were added.
+        """
+        return self.of_type("Agent")
+
+    def at(self, position):
+        """
+        Get the entity at a position.
+
+        Returns:
+        --------
+        Entity or None
+            The entity at the position or None if there is none.
+        """
+        return self.positions.get(position)
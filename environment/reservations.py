@@ -0,0 +1,128 @@
+# FILE: environment/reservations.py
+
+
+class ReservationTable:
+    """
+    A class to settle the move intents of all agents of a tick at once.
+
+    Every agent with a target cell has an intent for it. An intent is either a
+    move in this tick or a claim of an agent that still turns towards its target.
+    settle grants every contested cell to the intent with the highest priority:
+    moves before claims, then the higher score, then the lower position. A move
+    into a cell of another agent is only granted if that agent moves away first
+    in the same tick. Granted claims stay reserved for the next tick, so other
+    agents do not pick them as targets.
+
+    Attributes:
+    -----------
+    environment : Environment
+        The environment the agents move in.
+    reserved : dict
+        A dictionary mapping reserved (x, y) cells to the agent holding them.
+    """
+
+    def __init__(self, environment):
+        """
+        Initialize the ReservationTable class without reservations.
+
+        Parameters:
+        -----------
+        environment : Environment
+            The environment the agents move in.
+        """
+        self.environment = environment
+        self.reserved = {}
+
+    def is_blocked(self, agent, cell):
+        """
+        Check if a cell is reserved by or occupied by another agent.
+
+        Parameters:
+        -----------
+        agent : Agent
+            The agent that wants to move to the cell.
+        cell : tuple
+            The (x, y) cell.
+
+        Returns:
+        --------
+        bool
+            True if the agent should not pick the cell as target.
+        """
+        holder = self.reserved.get(cell)
+        if holder is not None and holder is not agent and holder.alive:
+            return True
+        occupant = self.environment.entities.at(cell)
+        return (
+            occupant is not None
+            and occupant is not agent
+            and occupant.entity_type == "Agent"
+        )
+
+    def claim(self, agent, cell):
+        """
+        Reserve a cell for an agent outside of the tick, e.g. for a manual agent.
+        """
+        self.reserved[cell] = agent
+
+    def settle(self, intents):
+        """
+        Grant or deny the intents of a tick.
+
+        Parameters:
+        -----------
+        intents : list
+            (agent, cell, moving) tuples, moving is True for a move in this tick
+            and False for a claim.
+
+        Returns:
+        --------
+        tuple
+            The granted moves as (agent, cell) pairs in the order they have to be
+            performed and the list of agents whose intent was denied.
+        """
+        winners = {}
+        denied = []
+        for agent, cell, moving in sorted(
+            intents,
+            key=lambda intent: (
+                not intent[2],
+                -intent[0].score,
+                intent[0].position,
+            ),
+        ):
+            if cell in winners:
+                denied.append(agent)
+            else:
+                winners[cell] = (agent, moving)
+
+        # order the moves so agents leave cells before others enter them
+        pending = [(agent, cell) for cell, (agent, moving) in winners.items() if moving]
+        leaving = {id(agent) for agent, _ in pending}
+        left = set()
+        moves = []
+        while pending:
+            waiting = []
+            for agent, cell in pending:
+                occupant = self.environment.entities.at(cell)
+                if (
+                    occupant is None
+                    or occupant.entity_type != "Agent"
+                    or id(occupant) in left
+                ):
+                    moves.append((agent, cell))
+                    left.add(id(agent))
+                elif id(occupant) in leaving:
+                    waiting.append((agent, cell))
+                else:
+                    denied.append(agent)
+            if len(waiting) == len(pending):
+                # agents moving in a circle wait for each other forever
+                denied.extend(agent for agent, _ in waiting)
+                break
+            pending = waiting
+
+        self.reserved = {
+            cell: agent for cell, (agent, moving) in winners.items() if not moving
+        }
+        return moves, denied
@@ -0,0 +1,201 @@
+# FILE: environment/runtime.py
+import asyncio
+from helpers.essentials import Action
+from helpers.trace import tracer, DEBUG, GAME
+
+
+class AgentRuntime:
+    """
+    A class to run the auto agents of an environment as asyncio tasks.
+
+    Every agent lives in its own coroutine: it waits for its turn in a tick,
+    thinks (perceives and decides, see TickScheduler.decide) and awaits the commit
+    of its action. The agents think one after another with a yield to the event
+    loop in between, so a render loop or other worlds on the same loop keep
+    running while a tick is computed. With a deadline, agents that did not start
+    thinking before it ran out skip the tick and hold their claims. They think
+    first and regardless of the deadline in the next tick, so others are not
+    starved. The deadline only bounds when an agent may start thinking: a decide
+    that has started runs to completion and blocks the loop meanwhile.
+
+    Messages still wait in the MessageBus and are delivered in the commit phase,
+    which is shared with the TickScheduler, so without a deadline the runtime
+    produces the same games as Environment.step.
+
+    Attributes:
+    -----------
+    environment : Environment
+        The environment the agents act in.
+    deadline : float or None
+        The think budget of a tick in seconds, None to let every agent think.
+    tasks : dict
+        A dictionary mapping the id of an agent to its task.
+    turns : dict
+        A dictionary mapping the id of an agent to the future of its next turn.
+    plans : dict
+        A dictionary mapping the id of an agent to the future of its plan in the
+        current tick.
+    late : set
+        The ids of the agents that skipped the current tick.
+    due : set
+        The ids of the agents that skipped the last tick and think in any case.
+    expires : float or None
+        The loop time the think budget of the current tick runs out at.
+    thinking : asyncio.Lock
+        The lock that lets the agents think one after another.
+    committed : asyncio.Future or None
+        The future of the ids of the agents whose action was performed in the
+        current tick.
+    """
+
+    def __init__(self, environment, deadline=None):
+        """
+        Initialize the AgentRuntime class without tasks.
+
+        Parameters:
+        -----------
+        environment : Environment
+            The environment the agents act in.
+        deadline : float, optional
+            The think budget of a tick in seconds (default is None for no limit).
+        """
+        self.environment = environment
+        self.deadline = deadline
+        self.tasks = {}
+        self.turns = {}
+        self.plans = {}
+        self.late = set()
+        self.due = set()
+        self.expires = None
+        self.thinking = asyncio.Lock()
+        self.committed = None
+
+    def turn(self, agent):
+        """
+        Get the future of the next turn of an agent, resolved with the tick number.
+        """
+        future = self.turns.get(id(agent))
+        if future is None:
+            future = self.turns[id(agent)] = asyncio.get_running_loop().create_future()
+        return future
+
+    async def live(self, agent):
+        """
+        The coroutine of an agent, it acts once per tick until the agent dies.
+
+        Parameters:
+        -----------
+        agent : Agent
+            The agent to run.
+        """
+        scheduler = self.environment.scheduler
+        while agent.alive:
+            tick = await self.turn(agent)
+            del self.turns[id(agent)]
+            async with self.thinking:
+                loop = asyncio.get_running_loop()
+                if (
+                    self.expires is not None
+                    and loop.time() > self.expires
+                    and id(agent) not in self.due
+                ):
+                    # out of time, keep the claim and wait for the next tick
+                    plan = Action.NEUTRAL, []
+                    self.late.add(id(agent))
+                    tracer.log(
+                        GAME, DEBUG, "Agent at %s skips tick %d", agent.position, tick
+                    )
+                else:
+                    try:
+                        plan = scheduler.decide(agent)
+                    except Exception as error:
+                        # fail the tick instead of letting it wait forever
+                        self.plans[id(agent)].set_exception(error)
+                        raise
+                self.plans[id(agent)].set_result(plan)
+                # let the render loop and the other agents run
+                await asyncio.sleep(0)
+            performed = await self.act(agent)
+            if not performed and plan[0] != Action.NEUTRAL:
+                tracer.log(
+                    GAME, DEBUG, "Agent at %s could not %s", agent.position, plan[0]
+                )
+
+    async def act(self, agent):
+        """
+        Wait until the actions of the current tick are committed.
+
+        Returns:
+        --------
+        bool
+            True if the action of the agent was performed.
+        """
+        performed = await self.committed
+        return id(agent) in performed
+
+    def spawn(self, agents):
+        """
+        Start a task for every agent that does not have one yet.
+        """
+        for agent in agents:
+            task = self.tasks.get(id(agent))
+            if task is None or task.done():
+                self.tasks[id(agent)] = asyncio.create_task(self.live(agent))
+
+    async def step(self):
+        """
+        Advance the environment by one tick, letting every auto agent act once.
+        """
+        scheduler = self.environment.scheduler
+        agents = scheduler.begin()
+        self.spawn(agents)
+
+        loop = asyncio.get_running_loop()
+        self.expires = None
+        if self.deadline is not None:
+            self.expires = loop.time() + self.deadline
+        self.plans = {id(agent): loop.create_future() for agent in agents}
+        self.committed = loop.create_future()
+        # the agents that were late think first
+        self.due, self.late = self.late, set()
+        for agent in sorted(agents, key=lambda agent: id(agent) not in self.due):
+            self.turn(agent).set_result(scheduler.tick)
+
+        try:
+            results = await asyncio.gather(*self.plans.values())
+            performed = scheduler.commit(zip(agents, results))
+        except BaseException:
+            # agents waiting for the commit would never take another turn, so
+            # stop them all, the next step starts them again
+            self.committed.cancel()
+            self.abort()
+            raise
+        self.committed.set_result({id(agent) for agent, _ in performed})
+        # let the agents see the commit before the next tick starts
+        await asyncio.sleep(0)
+
+    def abort(self):
+        """
+        Cancel the tasks of all agents after a failed tick. The errors of agents
+        that failed are raised by step, so they are marked as retrieved here.
+        """
+        for task in self.tasks.values():
+            if task.done():
+                if not task.cancelled():
+                    task.exception()
+            else:
+                task.cancel()
+        self.tasks.clear()
+        self.turns.clear()
+        self.plans = {}
+        self.late = set()
+        self.due = set()
+
+    def close(self):
+        """
+        Cancel the tasks of all agents.
+        """
+        for task in self.tasks.values():
+            task.cancel()
+        self.tasks.clear()
+        self.turns.clear()
@@ -0,0 +1,161 @@
+# FILE: environment/scheduler.py
+from helpers.essentials import (
+    Action,
+    direction_to_delta,
+    move_directions,
+    turn_actions,
+)
+from helpers.trace import tracer, DEBUG, GAME
+
+# Kinds of actions in the order they are committed within a tick, shots and
+# pickups happen before anyone steps into the cells, the moves come last in the
+# order of the reservation table
+commit_order = [
+    list(turn_actions.values()),
+    [Action.ATTACK],
+    [Action.COLLECT],
+    [Action.COMMUNICATE],
+    [Action.NEUTRAL],
+]
+commit_ranks = {
+    action: rank for rank, actions in enumerate(commit_order) for action in actions
+}
+
+
+class TickScheduler:
+    """
+    A class to advance an environment tick by tick in two phases.
+
+    In the decide phase every agent perceives and decides while the world does
+    not change, optionally fanned out to an executor. Messages sent while
+    deciding are held back. In the commit phase the held back messages are posted,
+    the move intents are settled by the ReservationTable of the environment and
+    the actions are performed: all other actions ordered by their kind and the
+    position of the agent at the start of the tick, then the granted moves in the
+    order of the table. The order therefore only depends on the world and not on
+    the order the agents are stored or decided in.
+
+    Attributes:
+    -----------
+    environment : Environment
+        The environment to advance.
+    executor : concurrent.futures.Executor or None
+        The pool the decisions are computed in, None to decide one after another.
+    tick : int
+        The number of ticks stepped so far.
+    """
+
+    def __init__(self, environment, executor=None):
+        """
+        Initialize the TickScheduler class.
+
+        Parameters:
+        -----------
+        environment : Environment
+            The environment to advance.
+        executor : concurrent.futures.Executor, optional
+            A thread pool to decide in parallel (default is None). The agents are
+            decided in place, so a process pool can not be used.
+        """
+        self.environment = environment
+        self.executor = executor
+        self.tick = 0
+
+    def decide(self, agent):
+        """
+        Let an agent perceive and decide without changing the world.
+
+        Returns:
+        --------
+        tuple
+            The decision and the (recipient, message) pairs the agent sent.
+        """
+        with self.environment.messages.collect() as outbox:
+            agent.perceive()
+            decision = agent.decide()
+        return decision, outbox
+
+    def begin(self):
+        """
+        Start a new tick and let the team agents publish their perceptions.
+
+        Returns:
+        --------
+        list
+            The auto agents that act in the tick.
+        """
+        self.tick += 1
+        tracer.tick = self.tick
+        tracer.log(GAME, DEBUG, "------ SIM STEP %d ------", self.tick)
+
+        agents = self.environment.get_auto_agents()
+        self.environment.publish_perceptions(agents)
+        return agents
+
+    def commit(self, plans):
+        """
+        Post the messages, settle the move intents and perform the actions of a
+        tick.
+
+        Parameters:
+        -----------
+        plans : list
+            (agent, (decision, outbox)) pairs as returned by decide.
+
+        Returns:
+        --------
+        list
+            The (agent, decision) pairs that were performed, in order.
+        """
+        environment = self.environment
+        plans = sorted(plans, key=lambda plan: plan[0].position)
+        for agent, (decision, outbox) in plans:
+            environment.messages.post(outbox)
+            if agent.control.exit_vote:
+                agent.control.exit_vote = False
+                environment.game_over = True
+
+        intents = []
+        actions = []
+        decisions = {}
+        for agent, (decision, outbox) in plans:
+            if decision in move_directions:
+                dx, dy = direction_to_delta[move_directions[decision]]
+                cell = (agent.position[0] + dx, agent.position[1] + dy)
+                intents.append((agent, cell, True))
+                decisions[id(agent)] = decision
+                continue
+            if agent.control.target:
+                intents.append((agent, agent.control.target, False))
+            actions.append((agent, decision))
+        moves, denied = environment.reservations.settle(intents)
+        for agent in denied:
+            agent.control.target = None
+
+        actions.sort(key=lambda action: commit_ranks[action[1]])
+        actions.extend((agent, decisions[id(agent)]) for agent, _ in moves)
+        performed = []
+        for agent, decision in actions:
+            # agents can die and be removed while others act
+            if agent.alive:
+                agent.perform(decision)
+                performed.append((agent, decision))
+        environment.messages.deliver()
+
+        if environment.game_over:
+            # the agents voted to end the game, show them the whole grid
+            for row in environment.grid:
+                for cell in row:
+                    cell.reveal()
+        return performed
+
+    def step(self):
+        """
+        Advance the environment by one tick, letting every auto agent act once.
+        """
+        agents = self.begin()
+        if self.executor:
+            results = list(self.executor.map(self.decide, agents))
+        else:
+            results = [self.decide(agent) for agent in agents]
+        self.commit(zip(agents, results))
@@ -0,0 +1,368 @@
+# FILE: environment/vector_environment.py
+import numpy as np
+from helpers.essentials import Action, directions, direction_to_delta, perceptions
+
+# Codes of the entity plane
+EMPTY = 0
+WUMPUS = 1
+GOLD = 2
+PIT = 3
+AGENT = 4
+
+# Order of the perception channels in the observations
+PERCEPTIONS = tuple(perceptions)
+
+# Deltas indexed by direction code (same order as helpers.essentials.directions)
+DX = np.array([direction_to_delta[d][0] for d in directions], dtype=np.int64)
+DY = np.array([direction_to_delta[d][1] for d in directions], dtype=np.int64)
+
+WUMPUS_REWARD = 1000
+GOLD_REWARD = 100
+
+
+class VectorEnvironment:
+    """
+    A class to represent N independent Wumpus worlds stacked into NumPy arrays.
+
+    All worlds advance one tick with a single call to step. The rules follow
+    Agent.move, Agent.attack, Agent.collect and Cell.interact, agents of the same
+    world act one after another in the order of their index, like in Environment.step.
+
+    Attributes:
+    -----------
+    num_worlds : int
+        The number of worlds.
+    size : int
+        The size of each world grid.
+    entity_counts : dict
+        The number of wumpus, gold, pits and agents per world.
+    cells : numpy.ndarray
+        An int8 array (num_worlds, size, size) with the entity code of each cell.
+    visible : numpy.ndarray
+        A bool array (num_worlds, size, size) with the visibility of each cell.
+    gold_revealed : numpy.ndarray
+        A bool array (num_worlds, size, size), revealed gold shines on its neighbors.
+    positions : numpy.ndarray
+        An int64 array (num_worlds, num_agents, 2) with the agent positions.
+    agent_directions : numpy.ndarray
+        An int8 array (num_worlds, num_agents) with the direction codes of the agents.
+    alive : numpy.ndarray
+        A bool array (num_worlds, num_agents) with the alive status of the agents.
+    scores : numpy.ndarray
+        An int64 array (num_worlds, num_agents) with the scores of the agents.
+    missed_shots_left : numpy.ndarray
+        An int8 array (num_worlds, num_agents) with the missed shots left.
+    ticks : numpy.ndarray
+        An int64 array (num_worlds,) with the ticks since the last reset.
+    """
+
+    def __init__(self, num_worlds, size=10, entity_counts=None, missed_shots=2):
+        """
+        Initialize the VectorEnvironment class, call reset before stepping.
+
+        Parameters:
+        -----------
+        num_worlds : int
+            The number of independent worlds.
+        size : int, optional
+            The size of each world grid (default is 10).
+        entity_counts : dict, optional
+            The number of "wumpus", "gold", "pit" and "agent" entities per world
+            (default is the setup of Environment).
+        missed_shots : int, optional
+            The number of missed shots each agent has (default is 2).
+        """
+        self.num_worlds = num_worlds
+        self.size = size
+        self.entity_counts = entity_counts or {
+            "wumpus": 1,
+            "gold": 10,
+            "pit": 10,
+            "agent": 5,
+        }
+        self.missed_shots = missed_shots
+        if sum(self.entity_counts.values()) > size * size:
+            raise ValueError("Too many entities for the environment size")
+
+        num_agents = self.entity_counts["agent"]
+        self.num_agents = num_agents
+        self.cells = np.zeros((num_worlds, size, size), dtype=np.int8)
+        self.visible = np.zeros((num_worlds, size, size), dtype=np.bool_)
+        self.gold_revealed = np.zeros((num_worlds, size, size), dtype=np.bool_)
+        self.positions = np.zeros((num_worlds, num_agents, 2), dtype=np.int64)
+        self.agent_directions = np.zeros((num_worlds, num_agents), dtype=np.int8)
+        self.alive = np.zeros((num_worlds, num_agents), dtype=np.bool_)
+        self.scores = np.zeros((num_worlds, num_agents), dtype=np.int64)
+        self.missed_shots_left = np.zeros((num_worlds, num_agents), dtype=np.int8)
+        self.ticks = np.zeros(num_worlds, dtype=np.int64)
+        self.worlds = np.arange(num_worlds)
+
+    @classmethod
+    def from_environments(cls, environments):
+        """
+        Create a VectorEnvironment with the layouts of existing environments.
+
+        Parameters:
+        -----------
+        environments : list
+            Environments of the same size, built with the default entity counts.
+
+        Returns:
+        --------
+        VectorEnvironment
+            The stacked worlds in the state of the given environments.
+        """
+        size = environments[0].size
+        codes = {"Wumpus": WUMPUS, "Gold": GOLD, "Pit": PIT, "Agent": AGENT}
+        num_agents = max(
+            len(environment.entities.agents()) for environment in environments
+        )
+        vector = cls(
+            len(environments),
+            size,
+            {"wumpus": 0, "gold": 0, "pit": 0, "agent": num_agents},
+        )
+        for w, environment in enumerate(environments):
+            a = 0
+            for entity in environment.entities:
+                x, y = entity.position
+                vector.cells[w, x, y] = codes[entity.entity_type]
+                if entity.entity_type == "Gold":
+                    vector.gold_revealed[w, x, y] = entity.revealed
+                elif entity.entity_type == "Agent":
+                    vector.positions[w, a] = entity.position
+                    vector.agent_directions[w, a] = directions.index(entity.direction)
+                    vector.alive[w, a] = entity.alive
+                    vector.scores[w, a] = entity.score
+                    vector.missed_shots_left[w, a] = entity.missed_shots_left
+                    a += 1
+            for x in range(size):
+                for y in range(size):
+                    vector.visible[w, x, y] = environment.grid[x][y].visible
+        return vector
+
+    def reset(self, seed=None, worlds=None):
+        """
+        Place new random entities in all or some of the worlds.
+
+        Parameters:
+        -----------
+        seed : int or sequence, optional
+            One seed for all reset worlds or one seed per reset world (default is None).
+        worlds : array_like, optional
+            The indices or a bool mask of the worlds to reset (default is all worlds).
+
+        Returns:
+        --------
+        numpy.ndarray
+            The observations of all worlds, see observe.
+        """
+        if worlds is None:
+            worlds = self.worlds
+        worlds = np.asarray(worlds)
+        if worlds.dtype == np.bool_:
+            worlds = np.nonzero(worlds)[0]
+        count = len(worlds)
+        cell_count = self.size * self.size
+
+        # A random permutation of the cells per world, entities take the first slots
+        if seed is None or np.isscalar(seed):
+            keys = np.random.default_rng(seed).random((count, cell_count))
+        else:
+            keys = np.stack([np.random.default_rng(s).random(cell_count) for s in seed])
+        order = np.argsort(keys, axis=1)
+
+        self.cells[worlds] = EMPTY
+        self.visible[worlds] = False
+        self.gold_revealed[worlds] = False
+        self.ticks[worlds] = 0
+
+        start = 0
+        for code, key in ((WUMPUS, "wumpus"), (GOLD, "gold"), (PIT, "pit")):
+            end = start + self.entity_counts[key]
+            slots = order[:, start:end]
+            rows = np.repeat(worlds, slots.shape[1])
+            flat = slots.ravel()
+            self.cells[rows, flat // self.size, flat % self.size] = code
+            start = end
+
+        slots = order[:, start : start + self.num_agents]
+        xs, ys = slots // self.size, slots % self.size
+        rows = np.repeat(worlds, self.num_agents)
+        self.cells[rows, xs.ravel(), ys.ravel()] = AGENT
+        self.visible[rows, xs.ravel(), ys.ravel()] = True
+        self.positions[worlds, :, 0] = xs
+        self.positions[worlds, :, 1] = ys
+        self.agent_directions[worlds] = directions.index("front")
+        self.alive[worlds] = True
+        self.scores[worlds] = 0
+        self.missed_shots_left[worlds] = self.missed_shots
+
+        return self.observe()
+
+    def step(self, actions):
+        """
+        Advance all worlds by one tick.
+
+        Parameters:
+        -----------
+        actions : array_like
+            An int array (num_worlds, num_agents) with one Action code per agent.
+            Actions of dead agents and Action.COMMUNICATE are ignored.
+
+        Returns:
+        --------
+        tuple
+            The observations (see observe), the rewards (num_worlds, num_agents)
+            and the done flags (num_worlds,).
+        """
+        actions = np.asarray(actions)
+        scores_before = self.scores.copy()
+
+        for a in range(self.num_agents):
+            action = actions[:, a]
+            active = self.alive[:, a]
+
+            turn = (
+                active & (action >= Action.TURN_FRONT) & (action <= Action.TURN_RIGHT)
+            )
+            self.agent_directions[turn, a] = action[turn] - Action.TURN_FRONT
+
+            move = (
+                active & (action >= Action.MOVE_FRONT) & (action <= Action.MOVE_RIGHT)
+            )
+            if move.any():
+                self.move(a, np.nonzero(move)[0], action[move] - Action.MOVE_FRONT)
+
+            attack = active & (action == Action.ATTACK)
+            if attack.any():
+                self.attack(a, np.nonzero(attack)[0])
+
+            collect = active & (action == Action.COLLECT)
+            if collect.any():
+                self.collect(a, np.nonzero(collect)[0])
+
+        self.ticks += 1
+        rewards = self.scores - scores_before
+        return self.observe(), rewards, self.get_dones()
+
+    def move(self, a, worlds, direction_codes):
+        """
+        Move agent a in the given worlds, see Agent.move.
+        """
+        x = self.positions[worlds, a, 0]
+        y = self.positions[worlds, a, 1]
+        new_x = x + DX[direction_codes]
+        new_y = y + DY[direction_codes]
+        in_bounds = (
+            (new_x >= 0) & (new_x < self.size) & (new_y >= 0) & (new_y < self.size)
+        )
+        worlds, x, y = worlds[in_bounds], x[in_bounds], y[in_bounds]
+        new_x, new_y = new_x[in_bounds], new_y[in_bounds]
+
+        self.visible[worlds, new_x, new_y] = True
+        target = self.cells[worlds, new_x, new_y]
+
+        # Wumpus and pits kill the agent
+        deadly = (target == WUMPUS) | (target == PIT)
+        self.alive[worlds[deadly], a] = False
+        self.cells[worlds[deadly], x[deadly], y[deadly]] = EMPTY
+
+        # Gold starts to shine on its neighbors, the agent stays in place
+        gold = target == GOLD
+        self.gold_revealed[worlds[gold], new_x[gold], new_y[gold]] = True
+
+        # Agents block the cell, only empty cells can be entered
+        free = target == EMPTY
+        worlds, x, y = worlds[free], x[free], y[free]
+        new_x, new_y = new_x[free], new_y[free]
+        self.cells[worlds, x, y] = EMPTY
+        self.cells[worlds, new_x, new_y] = AGENT
+        self.positions[worlds, a, 0] = new_x
+        self.positions[worlds, a, 1] = new_y
+
+    def get_facing_cells(self, a, worlds):
+        """
+        Get the cells agent a is facing in the given worlds.
+
+        Returns:
+        --------
+        tuple
+            The x and y coordinates and a mask of the cells within bounds.
+        """
+        codes = self.agent_directions[worlds, a]
+        x = self.positions[worlds, a, 0] + DX[codes]
+        y = self.positions[worlds, a, 1] + DY[codes]
+        in_bounds = (x >= 0) & (x < self.size) & (y >= 0) & (y < self.size)
+        return x, y, in_bounds
+
+    def attack(self, a, worlds):
+        """
+        Let agent a shoot in the given worlds, see Agent.attack.
+        Shots out of the grid count as missed.
+        """
+        worlds = worlds[self.missed_shots_left[worlds, a] > 0]
+        x, y, in_bounds = self.get_facing_cells(a, worlds)
+        target = np.full(len(worlds), EMPTY, dtype=np.int8)
+        target[in_bounds] = self.cells[worlds[in_bounds], x[in_bounds], y[in_bounds]]
+
+        hit = target == WUMPUS
+        self.scores[worlds[hit], a] += WUMPUS_REWARD
+        self.visible[worlds[hit], x[hit], y[hit]] = True
+        self.cells[worlds[hit], x[hit], y[hit]] = EMPTY
+
+        missed = target == EMPTY
+        self.missed_shots_left[worlds[missed], a] -= 1
+
+    def collect(self, a, worlds):
+        """
+        Let agent a collect in the given worlds, see Agent.collect.
+        """
+        x, y, in_bounds = self.get_facing_cells(a, worlds)
+        worlds, x, y = worlds[in_bounds], x[in_bounds], y[in_bounds]
+        gold = self.cells[worlds, x, y] == GOLD
+        worlds, x, y = worlds[gold], x[gold], y[gold]
+        self.scores[worlds, a] += GOLD_REWARD
+        self.cells[worlds, x, y] = EMPTY
+        self.gold_revealed[worlds, x, y] = False
+
+    def observe(self):
+        """
+        Get the perceptions on the cell of every agent.
+
+        Returns:
+        --------
+        numpy.ndarray
+            A uint8 array (num_worlds, num_agents, 3) with the breeze, stench and
+            shininess counts, zero for dead agents.
+        """
+        sources = (
+            self.cells == PIT,
+            self.cells == WUMPUS,
+            (self.cells == GOLD) & self.gold_revealed,
+        )
+        x = self.positions[:, :, 0]
+        y = self.positions[:, :, 1]
+        rows = self.worlds[:, None]
+        observations = np.zeros((self.num_worlds, self.num_agents, 3), dtype=np.uint8)
+        for dx, dy in zip(DX, DY):
+            nx, ny = x + dx, y + dy
+            valid = (nx >= 0) & (nx < self.size) & (ny >= 0) & (ny < self.size)
+            nx, ny = np.clip(nx, 0, self.size - 1), np.clip(ny, 0, self.size - 1)
+            for channel, source in enumerate(sources):
+                observations[:, :, channel] += source[rows, nx, ny] & valid
+        observations[~self.alive] = 0
+        return observations
+
+    def get_dones(self):
+        """
+        Get the done flags of all worlds.
+
+        Returns:
+        --------
+        numpy.ndarray
+            True for worlds without alive agents or without wumpus and gold left.
+        """
+        no_agents = ~self.alive.any(axis=1)
+        no_rewards = ~((self.cells == WUMPUS) | (self.cells == GOLD)).any(axis=(1, 2))
+        return no_agents | no_rewards
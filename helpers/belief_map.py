@@ -0,0 +1,152 @@
+from array import array
+from dataclasses import dataclass
+import math
+
+# Sentinel for probabilities that have not been estimated yet
+UNKNOWN = float("nan")
+
+
+def is_unknown(probability):
+    """
+    Check if a probability from a BeliefMap has not been estimated yet.
+    """
+    return math.isnan(probability)
+
+
+def probability_hash(target, index, probability):
+    """
+    Hash one probability of a BeliefMap for its digest.
+    """
+    # hash(nan) depends on the object, all unknown probabilities have to hash equal
+    return hash((target, index, None if is_unknown(probability) else probability))
+
+
+class BeliefMap:
+    """
+    A class to store what an agent believes about every cell of the grid.
+
+    Every attribute is a flat array with one entry per cell, the cell (x, y)
+    is stored at index x * size + y.
+
+    Attributes:
+    -----------
+    size : int
+        The size of the grid.
+    pit : array
+        float32 probabilities of a pit in each cell (UNKNOWN if not estimated).
+    wumpus : array
+        float32 probabilities of a wumpus in each cell (UNKNOWN if not estimated).
+    visited : bytearray
+        1 for every cell the agent has visited.
+    breeze : array
+        int8 counts of breeze perceived in each visited cell.
+    stench : array
+        int8 counts of stench perceived in each visited cell.
+    digest : int
+        A rolling hash of all probabilities, equal digests mean equal beliefs.
+        It is 0 while every probability is unknown.
+    """
+
+    def __init__(self, size):
+        """
+        Initialize the BeliefMap class with unknown probabilities for every cell.
+
+        Parameters:
+        -----------
+        size : int
+            The size of the grid.
+        """
+        cells = size * size
+        self.size = size
+        self.pit = array("f", [UNKNOWN]) * cells
+        self.wumpus = array("f", [UNKNOWN]) * cells
+        self.visited = bytearray(cells)
+        self.breeze = array("b", [0]) * cells
+        self.stench = array("b", [0]) * cells
+        self.digest = 0
+
+        # Lookup by the names used in helpers.essentials, probabilities are only
+        # read through it and written with set_probability to keep the digest
+        self.probabilities = {"pit": self.pit, "wumpus": self.wumpus}
+        self.counts = {"breeze": self.breeze, "stench": self.stench}
+
+    def index(self, pos):
+        """
+        Get the flat index of a position.
+        """
+        return pos[0] * self.size + pos[1]
+
+    def position(self, index):
+        """
+        Get the position of a flat index.
+        """
+        return divmod(index, self.size)
+
+    def set_probability(self, target, index, probability):
+        """
+        Set the pit or wumpus probability of a cell and update the digest.
+
+        Parameters:
+        -----------
+        target : str
+            "pit" or "wumpus".
+        index : int
+            The flat index of the cell.
+        probability : float
+            The new probability (UNKNOWN to forget it).
+        """
+        plane = self.probabilities[target]
+        old = plane[index]
+        plane[index] = probability
+        new = plane[index]
+        if old != new and not (is_unknown(old) and is_unknown(new)):
+            self.digest ^= probability_hash(target, index, old)
+            self.digest ^= probability_hash(target, index, new)
+
+    def set_safe(self, index):
+        """
+        Mark a cell as free of pits and wumpus.
+        """
+        self.set_probability("pit", index, 0.0)
+        self.set_probability("wumpus", index, 0.0)
+
+    def is_safe(self, index):
+        """
+        Check if a cell is known to be free of pits and wumpus.
+        """
+        return self.pit[index] == 0.0 and self.wumpus[index] == 0.0
+
+    def describe(self, index):
+        """
+        Get the probabilities of a cell in a readable form.
+        """
+        return {
+            target: None if is_unknown(plane[index]) else plane[index]
+            for target, plane in self.probabilities.items()
+        }
+
+
+@dataclass
+class ControlState:
+    """
+    A class to represent the small control state of an agent next to its beliefs.
+
+    Attributes:
+    -----------
+    target : tuple or None
+        The cell the agent wants to move to next.
+    arrow_target : tuple or None
+        The cell the agent shot at and walks to afterwards.
+    shininess : bool
+        Whether the agent perceived gold that is not collected yet.
+    killed_wumpus : tuple or None
+        The cell of a wumpus the agent killed, forgotten in the commit phase.
+    exit_vote : bool
+        Whether the agent voted to end the game, which ends in the commit phase.
+    """
+
+    target: tuple = None
+    arrow_target: tuple = None
+    shininess: bool = False
+    killed_wumpus: tuple = None
+    exit_vote: bool = False
@@ -1,6 +1,12 @@
+from enum import IntEnum
+
 perception_to_target = {"breeze": "pit", "stench": "wumpus", "shininess": "gold"}
 targets = ["pit", "wumpus", "gold"]
 
+# Small int codes of the perceptions, used as index of perception count vectors
+perceptions = ["breeze", "stench", "shininess"]
+perception_codes = {perception: code for code, perception in enumerate(perceptions)}
+
 delta_to_direction = {
     (1, 0): "right",
     (-1, 0): "left",
@@ -17,4 +23,39 @@ def parse_pos_str_to_tuple(s):
 def get_direction(subject_pos, target_pos):
     dx = target_pos[0] - subject_pos[0]
     dy = target_pos[1] - subject_pos[1]
-    return delta_to_direction[(dx, dy)]
\ No newline at end of file
+    return delta_to_direction[(dx, dy)]
+
+directions = ["front", "back", "left", "right"]
+
+direction_to_delta = {
+    direction: delta for delta, direction in delta_to_direction.items()
+}
+
+
+class Action(IntEnum):
+    """
+    Compact action codes returned by Agent.decide and performed by Agent.act.
+    """
+
+    NEUTRAL = 0
+    MOVE_FRONT = 1
+    MOVE_BACK = 2
+    MOVE_LEFT = 3
+    MOVE_RIGHT = 4
+    TURN_FRONT = 5
+    TURN_BACK = 6
+    TURN_LEFT = 7
+    TURN_RIGHT = 8
+    ATTACK = 9
+    COLLECT = 10
+    COMMUNICATE = 11
+
+
+# Action codes to move or turn in a direction
+move_actions = {
+    direction: Action(Action.MOVE_FRONT + i) for i, direction in enumerate(directions)
+}
+turn_actions = {
+    direction: Action(Action.TURN_FRONT + i) for i, direction in enumerate(directions)
+}
+move_directions = {action: direction for direction, action in move_actions.items()}
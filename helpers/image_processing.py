@@ -1,7 +1,255 @@
+import math
+import threading
+from collections import OrderedDict
+from concurrent.futures import CancelledError, ThreadPoolExecutor
 import pygame
 
-# Dictionary to cache loaded images
-image_cache = {}
+
+class AssetManager:
+    """
+    A class to load sprites scaled to a size and keep them between uses.
+
+    Sprites are cached by (path, size), so the same file can be used at several
+    cell sizes (e.g. per zoom level of the viewport). When more than max_images
+    sprites are cached, the least recently used ones are evicted. Every sprite is
+    converted to the pixel format of the display when it is loaded, so blitting
+    it does not convert it again every frame.
+
+    Sprites can be preloaded in a background thread. A sprite that is still
+    loading is waited for instead of being loaded twice. Without threads (e.g. in
+    the browser with pygbag) preloading loads right away.
+
+    The sprites of one size can be packed into a single texture atlas, the cache
+    then hands out subsurfaces of the atlas.
+
+    Attributes:
+    -----------
+    max_images : int
+        The number of scaled sprites kept before the least recently used are
+        evicted.
+    images : collections.OrderedDict
+        A dictionary mapping (path, size) to the scaled sprite, least recently
+        used first.
+    sources : dict
+        A dictionary mapping paths to the loaded, unscaled images.
+    pending : dict
+        A dictionary mapping (path, size) to the future of a sprite that is
+        preloaded.
+    atlases : dict
+        A dictionary mapping sizes to their texture atlas.
+    generation : int
+        The number of clears so far, loads started before a clear are not cached.
+    """
+
+    def __init__(self, max_images=256):
+        """
+        Initialize the AssetManager class without any sprites.
+
+        Parameters:
+        -----------
+        max_images : int, optional
+            The number of scaled sprites kept (default is 256).
+        """
+        self.max_images = max_images
+        self.images = OrderedDict()
+        self.sources = {}
+        self.pending = {}
+        self.atlases = {}
+        self.generation = 0
+        self.lock = threading.Lock()
+        self.executor = None
+
+    def source(self, path, generation=None):
+        """
+        Get the unscaled image of a file, loaded on first use.
+        """
+        image = self.sources.get(path)
+        if image is None:
+            image = pygame.image.load(path)
+            with self.lock:
+                if generation is None or generation == self.generation:
+                    self.sources[path] = image
+        return image
+
+    def load(self, path, size, generation=None):
+        """
+        Load a sprite, scale it to fit within a square of the size and cache it.
+        A preload (started with the generation of the cache) is not cached if the
+        cache was cleared in the meantime.
+
+        Returns:
+        --------
+        pygame.Surface
+            The scaled sprite.
+        """
+        try:
+            image = self.source(path, generation)
+            original_width, original_height = image.get_size()
+
+            # Calculate the scaling factor to fit the image within the size
+            scaling_factor = min(size / original_width, size / original_height)
+            new_width = max(int(original_width * scaling_factor), 1)
+            new_height = max(int(original_height * scaling_factor), 1)
+            scaled_image = pygame.transform.smoothscale(image, (new_width, new_height))
+
+            # Converting needs a display, headless tools keep the format of the file
+            if pygame.display.get_surface() is not None:
+                scaled_image = scaled_image.convert_alpha()
+
+            with self.lock:
+                # a preload that was cleared meanwhile must not bring back an old
+                # sprite
+                if generation is None or generation == self.generation:
+                    self.store((path, size), scaled_image)
+            return scaled_image
+        finally:
+            # a failed preload is retried by the next get instead of failing again
+            if generation is not None:
+                with self.lock:
+                    if generation == self.generation:
+                        self.pending.pop((path, size), None)
+
+    def store(self, key, image):
+        """
+        Cache a sprite and evict the least recently used ones beyond max_images.
+        Call with the lock held.
+        """
+        self.images[key] = image
+        self.images.move_to_end(key)
+        while len(self.images) > self.max_images:
+            self.images.popitem(last=False)
+
+    def get(self, path, size):
+        """
+        Get a sprite scaled to fit within a square of the size.
+
+        Parameters:
+        -----------
+        path : str
+            The file path to the image.
+        size : int
+            The size of the square, usually the cell size.
+
+        Returns:
+        --------
+        pygame.Surface
+            The scaled sprite.
+        """
+        key = path, size
+        with self.lock:
+            image = self.images.get(key)
+            if image is not None:
+                self.images.move_to_end(key)
+                return image
+            future = self.pending.get(key)
+        if future is not None:
+            try:
+                return future.result()
+            except CancelledError:
+                # the cache was cleared before the preload started
+                pass
+        return self.load(path, size)
+
+    def preload(self, paths, sizes):
+        """
+        Load sprites in a background thread, so they are ready when needed.
+
+        Parameters:
+        -----------
+        paths : iterable
+            The file paths to the images.
+        sizes : iterable
+            The sizes to load every image at.
+        """
+        sizes = list(sizes)
+        for path in paths:
+            for size in sizes:
+                if not self.submit(path, size):
+                    # No threads, e.g. in the browser with pygbag
+                    self.get(path, size)
+
+    def submit(self, path, size):
+        """
+        Start loading a sprite in the background unless it is cached or loading.
+
+        Returns:
+        --------
+        bool
+            False if no thread could be started.
+        """
+        key = path, size
+        with self.lock:
+            if key in self.images or key in self.pending:
+                return True
+            try:
+                if self.executor is None:
+                    self.executor = ThreadPoolExecutor(max_workers=1)
+                self.pending[key] = self.executor.submit(
+                    self.load, path, size, self.generation
+                )
+            except RuntimeError:
+                return False
+        return True
+
+    def build_atlas(self, paths, size):
+        """
+        Pack the sprites of the paths at a size into one texture atlas.
+
+        The sprites are placed in a square grid of slots of the size. The cached
+        sprites are replaced by subsurfaces of the atlas, so they share its pixels.
+
+        Parameters:
+        -----------
+        paths : iterable
+            The file paths to the images.
+        size : int
+            The size of the sprites.
+
+        Returns:
+        --------
+        pygame.Surface
+            The texture atlas.
+        """
+        paths = list(dict.fromkeys(paths))
+        columns = max(math.ceil(math.sqrt(len(paths))), 1)
+        rows = max(math.ceil(len(paths) / columns), 1)
+        atlas = pygame.Surface((columns * size, rows * size), pygame.SRCALPHA)
+        if pygame.display.get_surface() is not None:
+            atlas = atlas.convert_alpha()
+        atlas.fill((0, 0, 0, 0))
+
+        regions = {}
+        for index, path in enumerate(paths):
+            image = self.get(path, size)
+            rect = image.get_rect(
+                topleft=((index % columns) * size, (index // columns) * size)
+            )
+            atlas.blit(image, rect)
+            regions[path] = rect
+
+        with self.lock:
+            for path, rect in regions.items():
+                self.store((path, size), atlas.subsurface(rect))
+            self.atlases[size] = atlas
+        return atlas
+
+    def clear(self):
+        """
+        Remove all sprites, sources and atlases, e.g. after the files changed.
+        Pending preloads are cancelled or, if they already run, not cached.
+        """
+        with self.lock:
+            self.generation += 1
+            for future in self.pending.values():
+                future.cancel()
+            self.pending.clear()
+            self.images.clear()
+            self.sources.clear()
+            self.atlases.clear()
+
+
+# The sprites of the game, shared by all environments and renderers
+assets = AssetManager()
 
 
 def load_and_scale_image(image_path, cell_size):
@@ -20,23 +268,4 @@ def load_and_scale_image(image_path, cell_size):
     pygame.Surface
         The loaded and scaled image.
     """
-    # Check if the image is already in the cache
-    if image_path in image_cache:
-        return image_cache[image_path]
-
-    # Load the image from the file
-    image = pygame.image.load(image_path)
-    original_width, original_height = image.get_size()
-
-    # Calculate the scaling factor to fit the image within the cell size
-    scaling_factor = min(cell_size / original_width, cell_size / original_height)
-    new_width = int(original_width * scaling_factor)
-    new_height = int(original_height * scaling_factor)
-
-    # Scale the image
-    scaled_image = pygame.transform.smoothscale(image, (new_width, new_height))
-
-    # Cache the scaled image
-    image_cache[image_path] = scaled_image
-
-    return scaled_image
+    return assets.get(image_path, cell_size)
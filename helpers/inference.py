@@ -0,0 +1,519 @@
+from collections import deque
+from functools import lru_cache
+from helpers.belief_map import is_unknown
+from helpers.essentials import perception_to_target
+from helpers.neighborhood import neighbor_indices
+from helpers.trace import tracer, WARNING, ESTIMATE
+
+
+def same_probability(a, b):
+    """
+    Check if two probabilities are equal, two unknown probabilities are equal as well.
+    """
+    return a == b or (is_unknown(a) and is_unknown(b))
+
+
+class HeuristicInference:
+    """
+    A class to keep the pit and wumpus probabilities of a BeliefMap up to date.
+
+    Changed facts put the affected cells on a worklist. propagate estimates the
+    cells on the worklist and puts the cells depending on every changed
+    probability back on it, until nothing changes anymore.
+
+    Attributes:
+    -----------
+    beliefs : BeliefMap
+        The beliefs to keep up to date.
+    owner : object
+        The owner of the beliefs, used in warnings.
+    worklist : deque
+        The flat indices of the cells that have to be estimated.
+    queued : bytearray
+        1 for every cell that is on the worklist.
+    """
+
+    def __init__(self, beliefs, owner=None):
+        """
+        Initialize the HeuristicInference class with an empty worklist.
+
+        Parameters:
+        -----------
+        beliefs : BeliefMap
+            The beliefs to keep up to date.
+        owner : object, optional
+            The owner of the beliefs, used in warnings (default is None).
+        """
+        self.beliefs = beliefs
+        self.owner = owner
+        self.worklist = deque()
+        self.queued = bytearray(beliefs.size * beliefs.size)
+        self.neighbor_table = neighbor_indices("neumann", beliefs.size)
+
+    def neighbors(self, index):
+        """
+        Get the flat indices of the Neumann neighbors of a cell.
+        """
+        return self.neighbor_table[index]
+
+    def enqueue(self, index):
+        """
+        Put a cell on the worklist if it is not on it already.
+        """
+        if not self.queued[index]:
+            self.queued[index] = 1
+            self.worklist.append(index)
+
+    def invalidate(self, index):
+        """
+        Put everything on the worklist that depends on the facts of a cell.
+
+        Call this when a cell was visited, its perception counts changed or its
+        probabilities were set from outside (e.g. "safe cell at", "wumpus killed").
+        """
+        table = self.neighbor_table
+        self.enqueue(index)
+        for n in table[index]:
+            self.enqueue(n)
+            for m in table[n]:
+                self.enqueue(m)
+
+    def set_safe(self, index):
+        """
+        Mark a cell as free of pits and wumpus from outside and invalidate it.
+        """
+        self.beliefs.set_safe(index)
+        self.invalidate(index)
+
+    def enqueue_dependents(self, index):
+        """
+        Put every cell on the worklist whose estimate uses the probabilities of a cell,
+        these are the cells sharing a visited neighbor with it.
+        """
+        table = self.neighbor_table
+        visited = self.beliefs.visited
+        for n in table[index]:
+            if visited[n]:
+                for m in table[n]:
+                    self.enqueue(m)
+
+    def propagate(self):
+        """
+        Estimate the cells on the worklist until the probabilities reach a fixpoint.
+
+        Returns:
+        --------
+        set
+            The flat indices of the cells whose probabilities changed.
+        """
+        changed = set()
+        while self.worklist:
+            index = self.worklist.popleft()
+            self.queued[index] = 0
+            if self.estimate(index):
+                changed.add(index)
+                self.enqueue_dependents(index)
+        return changed
+
+    def estimate(self, i):
+        """
+        Estimates entity probabilities of a cell based on the perceptions of its
+        visited neighbors.
+
+        Parameters:
+        -----------
+        i : int
+            The flat index of the cell.
+
+        Returns:
+        --------
+        bool
+            True if a probability of the cell changed.
+        """
+        beliefs = self.beliefs
+        before = (beliefs.pit[i], beliefs.wumpus[i])
+
+        if beliefs.visited[i]:
+            beliefs.set_safe(i)
+        else:
+            # check neighbors for perceptions
+            for n in self.neighbor_table[i]:
+                # only visited cells can have perceptions
+                if beliefs.visited[n]:
+                    self.estimate_from(i, n)
+
+        return not (
+            same_probability(before[0], beliefs.pit[i])
+            and same_probability(before[1], beliefs.wumpus[i])
+        )
+
+    def estimate_from(self, i, n):
+        """
+        Update the probabilities of cell i with the perceptions of its visited neighbor n.
+        """
+        beliefs = self.beliefs
+        for perception, counts in beliefs.counts.items():
+            amount = counts[n]
+            target = perception_to_target[perception]
+            plane = beliefs.probabilities[target]
+
+            if not amount:
+                beliefs.set_probability(target, i, 0.0)
+                continue
+
+            # only use max prob (but dont overwrite a 0 or 1)
+            if plane[i] != 0 and plane[i] != 1.0:
+
+                # get possible neighbors for target (of this neighbor)
+                # reduce amount by already determined neighbor cells
+                possible_neighbors = 0
+                for m in self.neighbor_table[n]:
+                    if not beliefs.visited[m] and plane[m] != 0 and plane[m] != 1:
+                        possible_neighbors += 1
+                    if plane[m] == 1.0:
+                        amount -= 1
+
+                if amount and possible_neighbors == 0:
+                    tracer.log(ESTIMATE, WARNING, "%s: not possible", str(self.owner))
+                    continue
+
+                prob = amount / possible_neighbors
+
+                if is_unknown(plane[i]) or plane[i] < prob or prob == 0:
+                    beliefs.set_probability(target, i, prob)
+
+
+class ExactInference(HeuristicInference):
+    """
+    A class to compute exact pit and wumpus probabilities by model counting.
+
+    The unvisited cells next to visited cells (the frontier) are the variables,
+    the perception counts of the visited cells are the constraints. The frontier
+    is split into independent connected components, every component is solved by
+    enumerating the assignments that are consistent with its constraints (inconsistent
+    partial assignments are pruned) and the results are memoized by the shape of the
+    component, see normalize_component. Each assignment is weighted with the prior density
+    of the target. Components with more than max_component_size variables or without
+    a consistent assignment fall back to a local estimate.
+
+    Attributes:
+    -----------
+    priors : dict
+        The prior probability of a pit and of a wumpus in an unknown cell.
+    max_component_size : int
+        The largest component that is solved exactly.
+    safe_facts : bytearray
+        1 for every cell known to be safe, because it was visited or reported as safe.
+    """
+
+    def __init__(self, beliefs, owner=None, priors=None, max_component_size=24):
+        """
+        Initialize the ExactInference class.
+
+        Parameters:
+        -----------
+        beliefs : BeliefMap
+            The beliefs to keep up to date.
+        owner : object, optional
+            The owner of the beliefs, used in warnings (default is None).
+        priors : dict, optional
+            The prior probability of a "pit" and of a "wumpus" in an unknown cell
+            (default is 0.2 for both).
+        max_component_size : int, optional
+            The largest component that is solved exactly (default is 24).
+        """
+        super().__init__(beliefs, owner)
+        self.priors = {"pit": 0.2, "wumpus": 0.2}
+        if priors:
+            self.priors.update(priors)
+        self.max_component_size = max_component_size
+        self.safe_facts = bytearray(beliefs.size * beliefs.size)
+
+    def invalidate(self, index):
+        """
+        Put everything on the worklist that depends on the facts of a cell,
+        see HeuristicInference.invalidate.
+        """
+        if self.beliefs.visited[index]:
+            # the agent survived this cell, it stays safe even if it is forgotten
+            self.safe_facts[index] = 1
+        super().invalidate(index)
+
+    def set_safe(self, index):
+        """
+        Record that a cell is free of pits and wumpus and invalidate it.
+        """
+        self.safe_facts[index] = 1
+        super().set_safe(index)
+
+    def propagate(self):
+        """
+        Solve every frontier component that contains a cell of the worklist.
+
+        Returns:
+        --------
+        set
+            The flat indices of the cells whose probabilities changed.
+        """
+        seeds = list(self.worklist)
+        self.worklist.clear()
+        for index in seeds:
+            self.queued[index] = 0
+
+        changed = set()
+        for perception, target in perception_to_target.items():
+            if perception not in self.beliefs.counts:
+                continue
+            self.solve_region(seeds, perception, target, changed)
+        return changed
+
+    def is_safe_fact(self, index):
+        return self.beliefs.visited[index] or self.safe_facts[index]
+
+    def classify(self, index, counts):
+        """
+        Classify a cell for one perception.
+
+        Returns:
+        --------
+        str
+            "safe" for known or forced safe cells, "unknown" for cells without
+            visited neighbors and "variable" for frontier cells.
+        """
+        if self.is_safe_fact(index):
+            return "safe"
+        has_constraint = False
+        for n in self.neighbor_table[index]:
+            if self.beliefs.visited[n]:
+                if not counts[n]:
+                    return "safe"
+                has_constraint = True
+        return "variable" if has_constraint else "unknown"
+
+    def solve_region(self, seeds, perception, target, changed):
+        """
+        Recompute the probabilities of one target for the seeds and their components.
+        """
+        counts = self.beliefs.counts[perception]
+        plane = self.beliefs.probabilities[target]
+        seen = set()
+
+        def write(index, probability):
+            if not same_probability(plane[index], probability):
+                self.beliefs.set_probability(target, index, probability)
+                changed.add(index)
+
+        for seed in seeds:
+            if seed in seen:
+                continue
+            kind = self.classify(seed, counts)
+            if kind == "safe":
+                write(seed, 0.0)
+            elif kind == "unknown":
+                write(seed, float("nan"))
+            else:
+                variables, constraints = self.collect_component(seed, counts, seen)
+                probabilities = self.solve_component(
+                    variables, constraints, self.priors[target]
+                )
+                if probabilities is None:
+                    probabilities = self.estimate_locally(variables, constraints)
+                for index, probability in zip(variables, probabilities):
+                    write(index, probability)
+
+    def collect_component(self, start, counts, seen):
+        """
+        Collect the frontier component of a variable cell.
+
+        Returns:
+        --------
+        tuple
+            The variables in breadth first order and the constraints as
+            (count, tuple of variable positions) pairs sorted by the constrained cell.
+        """
+        variables = [start]
+        seen.add(start)
+        constraint_cells = set()
+        k = 0
+        while k < len(variables):
+            for n in self.neighbor_table[variables[k]]:
+                if not self.beliefs.visited[n] or n in constraint_cells:
+                    continue
+                constraint_cells.add(n)
+                for m in self.neighbor_table[n]:
+                    if m not in seen and self.classify(m, counts) == "variable":
+                        seen.add(m)
+                        variables.append(m)
+            k += 1
+
+        position = {index: k for k, index in enumerate(variables)}
+        constraints = []
+        for n in sorted(constraint_cells):
+            members = tuple(
+                position[m] for m in self.neighbor_table[n] if m in position
+            )
+            constraints.append((counts[n], members))
+        return variables, constraints
+
+    def solve_component(self, variables, constraints, prior):
+        """
+        Compute the exact probabilities of the variables of one component.
+
+        Returns:
+        --------
+        list or None
+            The probability of each variable, None if the component is too big or
+            has no consistent assignment.
+        """
+        if len(variables) > self.max_component_size:
+            return None
+
+        order, shape = normalize_component(len(variables), constraints)
+        solved = solve_shape(len(variables), shape, prior)
+        if solved is None:
+            return None
+        probabilities = [0.0] * len(variables)
+        for k, probability in zip(order, solved):
+            probabilities[k] = probability
+        return probabilities
+
+    def estimate_locally(self, variables, constraints):
+        """
+        Estimate the variables of a component that cannot be solved exactly, using the
+        highest share of a constraint count per variable (1.0 only if it is forced).
+        """
+        probabilities = [0.0] * len(variables)
+        for count, members in constraints:
+            if not members:
+                continue
+            share = min(count / len(members), 1.0)
+            for k in members:
+                probabilities[k] = max(probabilities[k], share)
+        return probabilities
+
+
+def normalize_component(num_variables, constraints):
+    """
+    Renumber the variables of a component by their first appearance in the
+    constraints, so components of the same shape anywhere in any grid are equal.
+
+    Parameters:
+    -----------
+    num_variables : int
+        The number of variables.
+    constraints : list
+        (count, tuple of variable positions) pairs sorted by the constrained cell.
+
+    Returns:
+    --------
+    tuple
+        The variable positions in their new order and the constraints with the
+        new numbers, sorted within every constraint.
+    """
+    numbers = {}
+    order = []
+    for _, members in constraints:
+        for k in members:
+            if k not in numbers:
+                numbers[k] = len(order)
+                order.append(k)
+    for k in range(num_variables):
+        if k not in numbers:
+            numbers[k] = len(order)
+            order.append(k)
+    shape = tuple(
+        (count, tuple(sorted(numbers[k] for k in members)))
+        for count, members in constraints
+    )
+    return order, shape
+
+
+@lru_cache(maxsize=10000)
+def solve_shape(num_variables, constraints, prior):
+    """
+    Solve a normalized component once, shared by all agents.
+
+    Returns:
+    --------
+    tuple or None
+        The probability of each variable, see enumerate_assignments.
+    """
+    probabilities = enumerate_assignments(num_variables, constraints, prior)
+    return None if probabilities is None else tuple(probabilities)
+
+
+def enumerate_assignments(num_variables, constraints, prior):
+    """
+    Enumerate all assignments of 0/1 variables that satisfy the constraints.
+
+    Parameters:
+    -----------
+    num_variables : int
+        The number of variables.
+    constraints : list
+        (count, tuple of variable positions) pairs, the variables of each
+        constraint have to sum up to its count.
+    prior : float
+        The prior probability of a variable being 1.
+
+    Returns:
+    --------
+    list or None
+        The probability of each variable being 1, None if no assignment is consistent.
+        Variables that are 1 (or 0) in every consistent assignment get exactly 1.0 (0.0).
+    """
+    var_constraints = [[] for _ in range(num_variables)]
+    for c, (_, members) in enumerate(constraints):
+        for k in members:
+            var_constraints[k].append(c)
+    targets_left = [count for count, _ in constraints]
+    unassigned = [len(members) for _, members in constraints]
+
+    values = [0] * num_variables
+    total = [0.0, 0]
+    weighted = [0.0] * num_variables
+    ones = [0] * num_variables
+    weights = (1.0 - prior, prior)
+
+    def assign(k, weight):
+        if k == num_variables:
+            total[0] += weight
+            total[1] += 1
+            for v in range(num_variables):
+                if values[v]:
+                    weighted[v] += weight
+                    ones[v] += 1
+            return
+        for value in (0, 1):
+            # prune if a constraint can no longer be met
+            consistent = True
+            for c in var_constraints[k]:
+                left = targets_left[c] - value
+                if left < 0 or left > unassigned[c] - 1:
+                    consistent = False
+                    break
+            if not consistent:
+                continue
+            for c in var_constraints[k]:
+                targets_left[c] -= value
+                unassigned[c] -= 1
+            values[k] = value
+            assign(k + 1, weight * weights[value])
+            for c in var_constraints[k]:
+                targets_left[c] += value
+                unassigned[c] += 1
+        values[k] = 0
+
+    assign(0, 1.0)
+
+    if not total[1] or not total[0]:
+        return None
+    probabilities = []
+    for v in range(num_variables):
+        if ones[v] == total[1]:
+            probabilities.append(1.0)
+        elif ones[v] == 0:
+            probabilities.append(0.0)
+        else:
+            probabilities.append(weighted[v] / total[0])
+    return probabilities
@@ -0,0 +1,85 @@
+from dataclasses import dataclass
+from enum import IntEnum
+from helpers.essentials import parse_pos_str_to_tuple
+
+
+class MessageKind(IntEnum):
+    """
+    The kinds of messages agents send to each other.
+    """
+
+    WUMPUS_KILLED = 0
+    STUCK = 1
+    SAFE_CELL = 2
+    VOTE = 3
+    STAY = 4
+    EXIT = 5
+
+
+# The text of every kind in the string protocol
+message_texts = {
+    MessageKind.WUMPUS_KILLED: "wumpus killed",
+    MessageKind.STUCK: "I am stuck",
+    MessageKind.SAFE_CELL: "safe cell at",
+    MessageKind.VOTE: "vote",
+    MessageKind.STAY: "stay",
+    MessageKind.EXIT: "exit",
+}
+text_to_kind = {text: kind for kind, text in message_texts.items()}
+
+
+@dataclass(frozen=True, slots=True)
+class Message:
+    """
+    A class to represent a message between agents.
+
+    Messages are passed around as records, the string protocol (e.g.
+    "safe cell at: (1, 2)") is only used by str() and from_string.
+
+    Attributes:
+    -----------
+    kind : MessageKind
+        What the message is about.
+    position : tuple or None
+        The (x, y) position the message is about, e.g. the cell an agent stands on.
+    """
+
+    kind: MessageKind
+    position: tuple = None
+
+    def __str__(self):
+        text = message_texts[self.kind]
+        if self.position is not None:
+            return f"{text}: {self.position}"
+        return text
+
+    @classmethod
+    def from_string(cls, message):
+        """
+        Parse a message of the string protocol.
+
+        Parameters:
+        -----------
+        message : str
+            The message, e.g. "I am stuck: (1, 2)".
+
+        Returns:
+        --------
+        Message
+            The parsed message.
+
+        Raises:
+        -------
+        ValueError
+            If the kind of the message is unknown.
+        """
+        if ":" not in message:
+            text, position = message, None
+        else:
+            text, data = message.split(":")
+            position = parse_pos_str_to_tuple(data.strip())
+
+        kind = text_to_kind.get(text.strip())
+        if kind is None:
+            raise ValueError(f"Unknown message: {message}")
+        return cls(kind, position)
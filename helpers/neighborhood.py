@@ -1,4 +1,7 @@
-def moore_neighborhood(x, y, size, multiplier=1):
+from functools import lru_cache
+
+
+def build_moore_neighborhood(x, y, size, multiplier=1):
     """
     Calculate the Moore neighborhood for a given position.
 
@@ -30,7 +33,7 @@ def moore_neighborhood(x, y, size, multiplier=1):
     return neighbors
 
 
-def neumann_neighborhood(x, y, size, multiplier=1):
+def build_neumann_neighborhood(x, y, size, multiplier=1):
     """
     Calculate the Neumann neighborhood for a given position.
 
@@ -62,7 +65,7 @@ def neumann_neighborhood(x, y, size, multiplier=1):
     return neighbors
 
 
-def whisper_neighborhood(x, y, size):
+def build_whisper_neighborhood(x, y, size, multiplier=1):
     """
     Calculate the Whisper neighborhood for a given position.
 
@@ -74,6 +77,8 @@ def whisper_neighborhood(x, y, size):
         The y-coordinate of the position.
     size : int
         The size of the grid.
+    multiplier : int
+        Unused, the whisper neighborhood has a fixed range.
 
     Returns:
     --------
@@ -81,12 +86,163 @@ def whisper_neighborhood(x, y, size):
         A list of (x, y) tuples representing the neighboring positions.
     """
 
-    moore_neighbors = moore_neighborhood(x, y, size, multiplier=1)
-    neumann_neighbors_2 = neumann_neighborhood(x, y, size, multiplier=2)
-    neumann_neighbors_1 = neumann_neighborhood(x, y, size, multiplier=1)
+    moore_neighbors = build_moore_neighborhood(x, y, size, multiplier=1)
+    neumann_neighbors_2 = build_neumann_neighborhood(x, y, size, multiplier=2)
+    neumann_neighbors_1 = build_neumann_neighborhood(x, y, size, multiplier=1)
 
     # Combine the two neighborhoods and remove duplicates (set does this automaticly)
     combined_neighbors = list(
         set(moore_neighbors + neumann_neighbors_2) # - set(neumann_neighbors_1)
     )
     return combined_neighbors
+
+
+
+builders = {
+    "moore": build_moore_neighborhood,
+    "neumann": build_neumann_neighborhood,
+    "whisper": build_whisper_neighborhood,
+}
+
+
+# Grids up to this size share tables with the neighborhoods of all cells, the
+# cells of bigger grids get their neighbors computed when asked, so the memory
+# does not grow with the size of the world
+TABLE_SIZE_LIMIT = 64
+
+
+@lru_cache(maxsize=16)
+def position_table(kind, size, multiplier=1):
+    """
+    Build the neighborhoods of all cells of a small grid once and share them.
+
+    Parameters:
+    -----------
+    kind : str
+        The kind of neighborhood ("moore", "neumann" or "whisper").
+    size : int
+        The size of the grid, at most TABLE_SIZE_LIMIT.
+    multiplier : int
+        The range multiplier for the neighborhood.
+
+    Returns:
+    --------
+    tuple
+        A tuple of (x, y) tuples per cell, the cell (x, y) is at index x * size + y.
+    """
+    build = builders[kind]
+    return tuple(
+        tuple(build(x, y, size, multiplier)) for x in range(size) for y in range(size)
+    )
+
+
+@lru_cache(maxsize=16)
+def index_table(kind, size, multiplier=1):
+    """
+    Like position_table, but the neighbors are flat indices (x * size + y).
+    """
+    return tuple(
+        tuple(nx * size + ny for nx, ny in neighbors)
+        for neighbors in position_table(kind, size, multiplier)
+    )
+
+
+def neighborhood(kind, x, y, size, multiplier=1):
+    """
+    Get a neighborhood from the shared table of a small grid or compute it.
+
+    Returns:
+    --------
+    tuple
+        A tuple of (x, y) tuples representing the neighboring positions.
+    """
+    if size <= TABLE_SIZE_LIMIT:
+        return position_table(kind, size, multiplier)[x * size + y]
+    return tuple(builders[kind](x, y, size, multiplier))
+
+
+def neighbors_by_index(index, size, kind="neumann", multiplier=1):
+    """
+    Get the flat indices of the neighbors of a cell by its flat index.
+    """
+    if size <= TABLE_SIZE_LIMIT:
+        return index_table(kind, size, multiplier)[index]
+    x, y = divmod(index, size)
+    return tuple(nx * size + ny for nx, ny in builders[kind](x, y, size, multiplier))
+
+
+class NeighborIndices:
+    """
+    A class to look up the flat neighbor indices of the cells of a big grid like
+    an index_table, computing them per cell.
+
+    Attributes:
+    -----------
+    kind : str
+        The kind of neighborhood.
+    size : int
+        The size of the grid.
+    multiplier : int
+        The range multiplier for the neighborhood.
+    """
+
+    def __init__(self, kind, size, multiplier=1):
+        self.kind = kind
+        self.size = size
+        self.multiplier = multiplier
+
+    def __getitem__(self, index):
+        return neighbors_by_index(index, self.size, self.kind, self.multiplier)
+
+    def __len__(self):
+        return self.size * self.size
+
+
+def neighbor_indices(kind, size, multiplier=1):
+    """
+    Get the flat neighbor indices of all cells, indexed by flat cell index.
+
+    Returns:
+    --------
+    tuple or NeighborIndices
+        The shared index_table of a small grid, a NeighborIndices otherwise.
+    """
+    if size <= TABLE_SIZE_LIMIT:
+        return index_table(kind, size, multiplier)
+    return NeighborIndices(kind, size, multiplier)
+
+
+def moore_neighborhood(x, y, size, multiplier=1):
+    """
+    Get the Moore neighborhood for a given position, see neighborhood.
+
+    Returns:
+    --------
+    tuple
+        A tuple of (x, y) tuples representing the neighboring positions.
+    """
+    return neighborhood("moore", x, y, size, multiplier)
+
+
+def neumann_neighborhood(x, y, size, multiplier=1):
+    """
+    Get the Neumann neighborhood for a given position, see neighborhood.
+
+    Returns:
+    --------
+    tuple
+        A tuple of (x, y) tuples representing the neighboring positions.
+    """
+    return neighborhood("neumann", x, y, size, multiplier)
+
+
+def whisper_neighborhood(x, y, size):
+    """
+    Get the Whisper neighborhood for a given position, see neighborhood.
+
+    Returns:
+    --------
+    tuple
+        A tuple of (x, y) tuples representing the neighboring positions.
+    """
+    return neighborhood("whisper", x, y, size)
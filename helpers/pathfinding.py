@@ -0,0 +1,244 @@
+import heapq
+from array import array
+from collections import deque
+from helpers.neighborhood import neighbor_indices
+
+UNREACHABLE = -1
+
+
+class DistanceField:
+    """
+    A class to plan the way of an agent to the nearest unvisited safe cell.
+
+    The field stores for every known safe cell the number of steps over known safe
+    cells to the nearest unvisited safe cell (the goals). It does not depend on the
+    position of the agent, so it is cached and only changed when the safe cells or
+    the goals change: new safe cells and goals are relaxed into the field, and the
+    region whose distances came through removed ones is repaired. Both happen
+    when the field is needed next. The field is only built from scratch once.
+
+    Attributes:
+    -----------
+    beliefs : BeliefMap
+        The beliefs the safe cells are taken from.
+    distances : array
+        The steps to the nearest goal per cell (UNREACHABLE if there is no way).
+    safe : bytearray
+        1 for every cell the field considers safe.
+    goals : bytearray
+        1 for every cell the field considers an unvisited safe cell.
+    pending : set
+        The cells that became safe cells or goals since the field was last used.
+    removed : set
+        The cells that stopped being safe cells or goals since then.
+    stale : bool
+        Whether the field has to be rebuilt before it is used.
+    """
+
+    def __init__(self, beliefs):
+        """
+        Initialize the DistanceField class with an empty, stale field.
+
+        Parameters:
+        -----------
+        beliefs : BeliefMap
+            The beliefs the safe cells are taken from.
+        """
+        cells = beliefs.size * beliefs.size
+        self.beliefs = beliefs
+        self.neighbor_table = neighbor_indices("neumann", beliefs.size)
+        self.distances = array("i", [UNREACHABLE]) * cells
+        self.safe = bytearray(cells)
+        self.goals = bytearray(cells)
+        self.pending = set()
+        self.removed = set()
+        self.stale = True
+
+    def is_safe(self, index):
+        return self.beliefs.visited[index] or self.beliefs.is_safe(index)
+
+    def update(self, indices):
+        """
+        Take over the changed beliefs of some cells.
+
+        Parameters:
+        -----------
+        indices : iterable
+            The flat indices of cells whose beliefs may have changed.
+        """
+        for index in indices:
+            safe = 1 if self.is_safe(index) else 0
+            goal = 1 if safe and not self.beliefs.visited[index] else 0
+            if safe == self.safe[index] and goal == self.goals[index]:
+                continue
+            if safe < self.safe[index] or goal < self.goals[index]:
+                # distances can grow around the cell
+                self.removed.add(index)
+            else:
+                self.pending.add(index)
+            self.safe[index] = safe
+            self.goals[index] = goal
+
+    def rebuild(self):
+        """
+        Compute the whole field with a breadth first search from all goals.
+        """
+        distances = self.distances
+        for index in range(len(distances)):
+            distances[index] = UNREACHABLE
+        queue = deque()
+        for index, goal in enumerate(self.goals):
+            if goal:
+                distances[index] = 0
+                queue.append(index)
+        self.spread(queue)
+        self.pending.clear()
+        self.removed.clear()
+        self.stale = False
+
+    def repair(self):
+        """
+        Raise the distances that came through cells that stopped being safe cells
+        or goals.
+
+        The affected region is found in the order of the old distances: a cell is
+        affected if its distance is one more than that of an affected cell and no
+        neighbor outside the region is one step closer to a goal. Only the region
+        is cleared and filled again from its border, the rest of the field keeps
+        its distances.
+        """
+        distances = self.distances
+        safe = self.safe
+        goals = self.goals
+        table = self.neighbor_table
+        affected = set(self.removed)
+        heap = [
+            (distances[index], index)
+            for index in self.removed
+            if distances[index] != UNREACHABLE
+        ]
+        heapq.heapify(heap)
+        while heap:
+            distance, index = heapq.heappop(heap)
+            for n in table[index]:
+                if (
+                    n in affected
+                    or not safe[n]
+                    or goals[n]
+                    or distances[n] != distance + 1
+                ):
+                    continue
+                if not any(
+                    safe[m] and distances[m] == distance and m not in affected
+                    for m in table[n]
+                ):
+                    affected.add(n)
+                    heapq.heappush(heap, (distance + 1, n))
+
+        for index in affected:
+            distances[index] = UNREACHABLE
+        seeds = []
+        for index in affected:
+            if goals[index]:
+                distances[index] = 0
+            elif safe[index]:
+                # enter the region from its best neighbor outside
+                best = UNREACHABLE
+                for n in table[index]:
+                    if safe[n] and distances[n] != UNREACHABLE:
+                        if best == UNREACHABLE or distances[n] + 1 < best:
+                            best = distances[n] + 1
+                if best == UNREACHABLE:
+                    continue
+                distances[index] = best
+            else:
+                continue
+            seeds.append(index)
+        seeds.sort(key=distances.__getitem__)
+        self.spread(deque(seeds))
+        self.removed.clear()
+
+    def relax(self):
+        """
+        Lower the distances around the cells that became safe cells or goals.
+        """
+        distances = self.distances
+        queue = deque()
+        for index in self.pending:
+            if self.goals[index]:
+                distances[index] = 0
+            else:
+                # a new safe cell joins the field through its best neighbor
+                best = UNREACHABLE
+                for n in self.neighbor_table[index]:
+                    if self.safe[n] and distances[n] != UNREACHABLE:
+                        if best == UNREACHABLE or distances[n] + 1 < best:
+                            best = distances[n] + 1
+                if best == UNREACHABLE:
+                    continue
+                distances[index] = best
+            queue.append(index)
+        self.spread(queue)
+        self.pending.clear()
+
+    def spread(self, queue):
+        """
+        Spread the distances from the cells in the queue over the safe cells.
+        """
+        distances = self.distances
+        safe = self.safe
+        table = self.neighbor_table
+        while queue:
+            index = queue.popleft()
+            step = distances[index] + 1
+            for n in table[index]:
+                if safe[n] and (distances[n] == UNREACHABLE or step < distances[n]):
+                    distances[n] = step
+                    queue.append(n)
+
+    def get_distances(self):
+        """
+        Get the current field, rebuilt, repaired or relaxed if necessary.
+
+        Returns:
+        --------
+        array
+            The steps to the nearest goal per cell (UNREACHABLE if there is no way).
+        """
+        if self.stale:
+            self.rebuild()
+            return self.distances
+        if self.removed:
+            self.repair()
+        if self.pending:
+            self.relax()
+        return self.distances
+
+    def next_steps(self, index, blocked=()):
+        """
+        Get the neighbors of a cell that lead towards the nearest goal.
+
+        Parameters:
+        -----------
+        index : int
+            The flat index of the cell the agent stands on.
+        blocked : container, optional
+            Flat indices of cells that must not be entered (default is empty).
+
+        Returns:
+        --------
+        list
+            The flat indices of the best neighbors, empty if no goal is reachable.
+        """
+        distances = self.get_distances()
+        best = []
+        best_distance = UNREACHABLE
+        for n in self.neighbor_table[index]:
+            distance = distances[n]
+            if not self.safe[n] or distance == UNREACHABLE or n in blocked:
+                continue
+            if best_distance == UNREACHABLE or distance < best_distance:
+                best, best_distance = [n], distance
+            elif distance == best_distance:
+                best.append(n)
+        return best
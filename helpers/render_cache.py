@@ -0,0 +1,80 @@
+import pygame
+
+
+class RenderCache:
+    """
+    A class to keep fonts and rendered text between frames.
+
+    Fonts are built once per size. Text is rendered into a slot (e.g. the second
+    line of the scoreboard) and the surface is reused as long as the slot shows
+    the same text, a new text evicts the old surface of the slot.
+
+    Attributes:
+    -----------
+    fonts : dict
+        A dictionary mapping font sizes to fonts.
+    texts : dict
+        A dictionary mapping slots to the (text, size, color) they show and the
+        rendered surface.
+    """
+
+    def __init__(self):
+        """
+        Initialize the RenderCache class without fonts and texts.
+        """
+        self.fonts = {}
+        self.texts = {}
+
+    def font(self, size):
+        """
+        Get the default font in a size, built on first use.
+
+        Parameters:
+        -----------
+        size : int
+            The size of the font.
+
+        Returns:
+        --------
+        pygame.font.Font
+            The font.
+        """
+        font = self.fonts.get(size)
+        if font is None:
+            font = self.fonts[size] = pygame.font.Font(None, size)
+        return font
+
+    def text(self, slot, text, size, color):
+        """
+        Get a text rendered with antialiasing, rendered only if the slot showed
+        something else before.
+
+        Parameters:
+        -----------
+        slot : hashable
+            Where the text is shown, e.g. ("scoreboard", 1).
+        text : str
+            The text to render.
+        size : int
+            The size of the font.
+        color : tuple
+            The color of the text.
+
+        Returns:
+        --------
+        pygame.Surface
+            The rendered text.
+        """
+        key = text, size, color
+        cached = self.texts.get(slot)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        surface = self.font(size).render(text, True, color)
+        self.texts[slot] = key, surface
+        return surface
+
+    def clear(self):
+        """
+        Remove all rendered texts, the fonts are kept.
+        """
+        self.texts.clear()
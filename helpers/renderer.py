@@ -0,0 +1,391 @@
+import pygame
+from helpers.image_processing import assets
+from helpers.viewport import Viewport
+
+# Default colors of the grid
+GRID_COLOR = (200, 200, 200)
+BACKGROUND_COLOR = (0, 0, 0)
+CELL_REVEAL_COLOR = (30, 30, 30)
+
+# Below this cell size the cells are drawn as colored blocks instead of sprites
+LOD_CELL_SIZE = 6
+
+# Colors of the entities in the level of detail mode
+ENTITY_COLORS = {
+    "Agent": (60, 200, 60),
+    "Wumpus": (220, 50, 50),
+    "Pit": (70, 90, 230),
+    "Gold": (240, 200, 40),
+}
+ENTITY_COLOR = (255, 255, 255)
+
+
+class GridRenderer:
+    """
+    A class to draw an environment incrementally onto a surface.
+
+    The first frame is drawn completely. After that only the cells in the
+    changed_cells of the environment are redrawn, together with the overlays
+    (e.g. the scoreboard) whose content changed or that lie on a redrawn cell.
+    draw returns the rectangles that changed, so they can be pushed with
+    pygame.display.update instead of flipping the whole screen.
+
+    The cells are placed by a Viewport, so big worlds can be scrolled and zoomed.
+    Only the cells inside the window are drawn, a moved camera draws the next
+    frame completely. Sprites are loaded once per zoom level from the assets, the
+    neighbouring zoom levels are preloaded in the background. Below LOD_CELL_SIZE
+    the cells are drawn as blocks of one color from a color array, which is kept
+    up to date with the changed cells and blitted through pygame.surfarray.
+
+    Attributes:
+    -----------
+    surface : pygame.Surface
+        The surface to draw on, usually the screen.
+    environment : Environment
+        The environment to draw.
+    cell_size : int
+        The cell size in pixels the sprites of the entities were scaled for.
+    viewport : Viewport
+        The camera placing the cells on the surface.
+    colors : tuple
+        The grid, background and reveal colors.
+    background : pygame.Surface or None
+        The hidden grid with the grid lines of the current view.
+    view : tuple or None
+        The state of the viewport the last frame was drawn with.
+    paths : set
+        The image paths of the sprites drawn so far, preloaded for other zoom
+        levels.
+    preloaded : int or None
+        The cell size the neighbouring zoom levels were last preloaded for.
+    lod : numpy.ndarray or None
+        A uint8 array (size, size, 3) with the color of every cell, built with the
+        first frame in the level of detail mode.
+    overlays : dict
+        A dictionary mapping the name of an overlay to its last content key and
+        the rectangles it covered.
+    full : bool
+        Whether the next frame is drawn completely.
+    """
+
+    def __init__(
+        self,
+        surface,
+        environment,
+        cell_size,
+        grid_color=GRID_COLOR,
+        background_color=BACKGROUND_COLOR,
+        reveal_color=CELL_REVEAL_COLOR,
+        viewport=None,
+    ):
+        """
+        Initialize the GridRenderer class, the first frame is drawn completely.
+
+        Parameters:
+        -----------
+        surface : pygame.Surface
+            The surface to draw on.
+        environment : Environment
+            The environment to draw.
+        cell_size : int
+            The cell size in pixels the sprites of the entities were scaled for.
+        grid_color : tuple, optional
+            The color of the grid lines (default is GRID_COLOR).
+        background_color : tuple, optional
+            The color of hidden cells (default is BACKGROUND_COLOR).
+        reveal_color : tuple, optional
+            The color of revealed cells (default is CELL_REVEAL_COLOR).
+        viewport : Viewport, optional
+            The camera placing the cells (default is None for a fixed view with
+            cells of cell_size).
+        """
+        self.surface = surface
+        self.environment = environment
+        self.cell_size = cell_size
+        if viewport is None:
+            width, height = surface.get_size()
+            viewport = Viewport(width, height, environment.size, cell_size)
+        self.viewport = viewport
+        self.colors = grid_color, background_color, reveal_color
+        self.background = None
+        self.view = None
+        self.paths = set()
+        self.preloaded = None
+        self.lod = None
+        self.overlays = {}
+        self.full = True
+
+    def render_background(self):
+        """
+        Render the hidden cells of the current view with their grid lines into one
+        surface.
+
+        Every cell has a frame of one pixel, so the lines between two cells are two
+        pixels wide. The frames are drawn as one line per row and column edge.
+
+        Returns:
+        --------
+        pygame.Surface
+            A surface of the size of the drawing surface.
+        """
+        grid_color, background_color, _ = self.colors
+        background = pygame.Surface(self.surface.get_size()).convert(self.surface)
+        background.fill(background_color)
+        x0, y0, x1, y1 = self.viewport.visible_range()
+        if x0 >= x1 or y0 >= y1:
+            return background
+        top_left = self.viewport.cell_rect(x0, y0)
+        bottom_right = self.viewport.cell_rect(x1 - 1, y1 - 1)
+        top, bottom = top_left.top, bottom_right.bottom - 1
+        left, right = top_left.left, bottom_right.right - 1
+        for x in range(x0, x1):
+            rect = self.viewport.cell_rect(x, y0)
+            for line in (rect.left, rect.right - 1):
+                pygame.draw.line(background, grid_color, (line, top), (line, bottom))
+        for y in range(y0, y1):
+            rect = self.viewport.cell_rect(x0, y)
+            for line in (rect.top, rect.bottom - 1):
+                pygame.draw.line(background, grid_color, (left, line), (right, line))
+        return background
+
+    def invalidate(self):
+        """
+        Draw the next frame completely, e.g. after the window was covered.
+        """
+        self.full = True
+
+    def lod_mode(self):
+        """
+        Check if the cells are too small for sprites and drawn as blocks.
+        """
+        return self.viewport.cell_size < LOD_CELL_SIZE
+
+    def cell_rect(self, x, y):
+        """
+        Get the rectangle of the cell at (x, y).
+        """
+        return self.viewport.cell_rect(x, y)
+
+    def cells_in(self, rect):
+        """
+        Get the positions of all cells a rectangle touches.
+        """
+        return self.viewport.cells_in(rect)
+
+    def lod_color(self, cell):
+        """
+        Get the color of a cell in the level of detail mode.
+        """
+        if cell.current_image is not None:
+            return ENTITY_COLORS.get(cell.entity.entity_type, ENTITY_COLOR)
+        return self.colors[2] if cell.visible else self.colors[1]
+
+    def render_lod(self):
+        """
+        Build the colors of all cells for the level of detail mode.
+
+        Returns:
+        --------
+        numpy.ndarray
+            A uint8 array (size, size, 3) indexed by [x, y] like surfarray.
+        """
+        # Imported lazily so the sprite mode does not need NumPy
+        import numpy as np
+
+        size = self.environment.size
+        grid = self.environment.grid
+        colors = np.empty((size, size, 3), dtype=np.uint8)
+        colors[:] = self.colors[1]
+        if self.environment.array_grid:
+            # only revealed cells with an entity show more than the reveal color
+            colors[grid.visible] = self.colors[2]
+            positions = zip(*np.nonzero(grid.visible & (grid.entity_ids >= 0)))
+        else:
+            positions = ((x, y) for x in range(size) for y in range(size))
+        for x, y in positions:
+            colors[x, y] = self.lod_color(grid[x][y])
+        return colors
+
+    def draw_lod(self):
+        """
+        Draw the cells of the current view from the color array, scaled to blocks
+        of the cell size.
+        """
+        self.surface.fill(self.colors[1])
+        x0, y0, x1, y1 = self.viewport.visible_range()
+        if x0 >= x1 or y0 >= y1:
+            return
+        blocks = pygame.surfarray.make_surface(self.lod[x0:x1, y0:y1])
+        size = self.viewport.cell_size
+        if size != 1:
+            blocks = pygame.transform.scale(
+                blocks, ((x1 - x0) * size, (y1 - y0) * size)
+            )
+        self.surface.blit(blocks, self.viewport.cell_rect(x0, y0).topleft)
+
+    def sprite(self, cell, image):
+        """
+        Get the image of a cell at the current cell size, loaded once per zoom
+        level from the file of the image.
+        """
+        entity = cell.entity
+        path = entity.image_paths.get(entity.current_image_key)
+        if path is None:
+            return image
+        self.paths.add(path)
+        size = self.viewport.cell_size
+        if size == self.cell_size:
+            return image
+        return assets.get(path, size)
+
+    def preload_zoom_levels(self):
+        """
+        Load the sprites for zooming in or out once more in the background.
+        """
+        viewport = self.viewport
+        size = viewport.cell_size
+        sizes = {
+            min(max(zoomed, viewport.min_cell_size), viewport.max_cell_size)
+            for zoomed in (size * 2, round(size / 2))
+        }
+        assets.preload(
+            self.paths,
+            [
+                zoomed
+                for zoomed in sizes
+                if zoomed >= LOD_CELL_SIZE and zoomed != self.cell_size
+            ],
+        )
+
+    def draw_cell(self, x, y):
+        """
+        Draw the cell at (x, y) with its grid line, reveal fill and image, or as
+        one block in the level of detail mode.
+
+        Returns:
+        --------
+        pygame.Rect
+            The rectangle of the cell.
+        """
+        rect = self.cell_rect(x, y)
+        if self.lod_mode():
+            self.surface.fill(self.lod[x, y], rect)
+            return rect
+
+        cell = self.environment.grid[x][y]
+        if cell.visible:
+            # the fill covers the grid line, like on a freshly cleared screen
+            self.surface.fill(self.colors[2], rect)
+        else:
+            self.surface.blit(self.background, rect, rect)
+
+        image = cell.current_image
+        if image is not None:
+            image = self.sprite(cell, image)
+            draw_x = rect.x + (rect.width - image.get_width()) // 2
+            draw_y = rect.y + (rect.height - image.get_height()) // 2
+            self.surface.blit(image, (draw_x, draw_y))
+        return rect
+
+    def erase(self, rect, cells):
+        """
+        Clear the area of an overlay and note the cells below it for redrawing.
+        """
+        if self.lod_mode():
+            self.surface.fill(self.colors[1], rect)
+        else:
+            self.surface.blit(self.background, rect, rect)
+        cells.update(self.cells_in(rect))
+
+    def draw(self, overlays=()):
+        """
+        Draw what changed since the last frame.
+
+        Parameters:
+        -----------
+        overlays : iterable, optional
+            (name, key, draw) tuples drawn over the grid in order. key describes
+            the content (e.g. the scores shown), draw(surface) draws it and returns
+            the rectangles it covered (default is no overlays).
+
+        Returns:
+        --------
+        list
+            The rectangles of the surface that changed.
+        """
+        overlays = list(overlays)
+        changed = self.environment.changed_cells
+        lod = self.lod_mode()
+        if self.lod is not None:
+            # the colors are kept up to date once built, also out of the view
+            grid = self.environment.grid
+            for x, y in changed:
+                self.lod[x, y] = self.lod_color(grid[x][y])
+        elif lod:
+            self.lod = self.render_lod()
+
+        dirty = []
+        if self.full or self.viewport.state != self.view:
+            self.full = False
+            self.overlays = {}
+            self.view = self.viewport.state
+            self.background = None
+            x0, y0, x1, y1 = self.viewport.visible_range()
+            if lod:
+                self.draw_lod()
+                cells = set()
+            else:
+                self.background = self.render_background()
+                self.surface.blit(self.background, (0, 0))
+                # the background already shows the hidden, empty cells
+                grid = self.environment.grid
+                cells = {
+                    (x, y)
+                    for x in range(x0, x1)
+                    for y in range(y0, y1)
+                    if grid[x][y].visible or grid[x][y].current_image is not None
+                }
+            dirty.append(self.surface.get_rect())
+        else:
+            # cells outside the window are not drawn
+            x0, y0, x1, y1 = self.viewport.visible_range()
+            cells = {(x, y) for x, y in changed if x0 <= x < x1 and y0 <= y < y1}
+            # overlays that are gone leave their area behind
+            names = {name for name, _, _ in overlays}
+            for name in [name for name in self.overlays if name not in names]:
+                for rect in self.overlays.pop(name)[1]:
+                    self.erase(rect, cells)
+                    dirty.append(rect)
+        changed.clear()
+
+        # an overlay is redrawn on a clean area, so erase every overlay with new
+        # content or on a changed cell, which can uncover more overlays
+        stale = {name for name, key, _ in overlays if name not in self.overlays}
+        erased = True
+        while erased:
+            erased = False
+            cell_rects = [self.cell_rect(x, y) for x, y in cells]
+            for name, key, _ in overlays:
+                if name in stale:
+                    continue
+                last_key, rects = self.overlays[name]
+                if last_key != key or any(
+                    rect.collidelist(cell_rects) != -1 for rect in rects
+                ):
+                    stale.add(name)
+                    for rect in rects:
+                        self.erase(rect, cells)
+                        dirty.append(rect)
+                    erased = True
+
+        dirty.extend(self.draw_cell(x, y) for x, y in cells)
+        for name, key, draw in overlays:
+            if name in stale:
+                rects = draw(self.surface)
+                self.overlays[name] = key, rects
+                dirty.extend(rects)
+
+        if self.paths and self.preloaded != self.viewport.cell_size:
+            self.preloaded = self.viewport.cell_size
+            self.preload_zoom_levels()
+        return dirty
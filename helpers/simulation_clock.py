@@ -0,0 +1,155 @@
+# How the simulation is advanced, see SimulationClock
+MODES = ("fixed", "turbo", "unlimited")
+
+
+class SimulationClock:
+    """
+    A class to decide how many simulation ticks run per frame, independent of the
+    frame rate.
+
+    - "fixed": a tick every timestep seconds, rendered at fps frames per second.
+      After a stall at most max_catch_up ticks are made up.
+    - "turbo": as many ticks as fit into a share of each frame, only the last
+      state of a frame is rendered.
+    - "unlimited": one tick per frame without a frame rate limit, every state is
+      rendered as fast as possible.
+
+    Attributes:
+    -----------
+    mode : str
+        One of MODES.
+    timestep : float
+        The seconds between two ticks in the fixed mode.
+    fps : int
+        The frame rate of the fixed and the turbo mode.
+    budget : float
+        The share of a frame the turbo mode spends on ticks.
+    max_catch_up : int
+        The maximum number of ticks the fixed mode runs at once.
+    accumulator : float
+        The seconds not yet turned into ticks.
+    last_time : float or None
+        The time of the last call to due.
+    """
+
+    def __init__(self, timestep=1.0, fps=30, mode="fixed", budget=0.8, max_catch_up=5):
+        """
+        Initialize the SimulationClock class.
+
+        Parameters:
+        -----------
+        timestep : float, optional
+            The seconds between two ticks in the fixed mode (default is 1.0).
+        fps : int, optional
+            The frame rate of the fixed and the turbo mode (default is 30).
+        mode : str, optional
+            One of MODES (default is "fixed").
+        budget : float, optional
+            The share of a frame the turbo mode spends on ticks (default is 0.8).
+        max_catch_up : int, optional
+            The maximum number of ticks the fixed mode runs at once (default is 5).
+
+        Raises:
+        -------
+        ValueError
+            If the mode is unknown.
+        """
+        self.timestep = timestep
+        self.fps = fps
+        self.budget = budget
+        self.max_catch_up = max_catch_up
+        self.set_mode(mode)
+
+    def set_mode(self, mode):
+        """
+        Switch to another mode and start counting anew.
+
+        Raises:
+        -------
+        ValueError
+            If the mode is unknown.
+        """
+        if mode not in MODES:
+            raise ValueError(f"Invalid clock mode: {mode}")
+        self.mode = mode
+        self.reset()
+
+    def next_mode(self):
+        """
+        Switch to the mode after the current one in MODES.
+
+        Returns:
+        --------
+        str
+            The new mode.
+        """
+        self.set_mode(MODES[(MODES.index(self.mode) + 1) % len(MODES)])
+        return self.mode
+
+    def reset(self):
+        """
+        Forget the time that passed, e.g. after the simulation was paused.
+        """
+        self.accumulator = 0.0
+        self.last_time = None
+
+    def frame_wait(self, elapsed):
+        """
+        Get the seconds to wait for the next frame. Wait with asyncio.sleep, so
+        ticks computed as tasks run in the meantime.
+
+        Parameters:
+        -----------
+        elapsed : float
+            The seconds the current frame took so far.
+
+        Returns:
+        --------
+        float
+            The rest of the frame, 0 in the unlimited mode.
+        """
+        if self.mode == "unlimited":
+            return 0
+        return max(1 / self.fps - elapsed, 0)
+
+    def tick_budget(self):
+        """
+        Get the seconds of ticks per frame in the turbo mode, None otherwise.
+        """
+        if self.mode == "turbo":
+            return self.budget / self.fps
+        return None
+
+    def due(self, now):
+        """
+        Get the number of ticks to run in the current frame.
+
+        Parameters:
+        -----------
+        now : float
+            The current time in seconds.
+
+        Returns:
+        --------
+        int or None
+            The number of ticks, None in the turbo mode for as many as fit into
+            tick_budget.
+        """
+        if self.mode == "turbo":
+            return None
+        if self.mode == "unlimited":
+            return 1
+
+        if self.last_time is None:
+            # the first tick is due right away
+            self.last_time = now
+            self.accumulator = self.timestep
+        self.accumulator += now - self.last_time
+        self.last_time = now
+        ticks = int(self.accumulator // self.timestep)
+        self.accumulator -= ticks * self.timestep
+        if ticks > self.max_catch_up:
+            # drop the backlog instead of fast forwarding
+            ticks = self.max_catch_up
+            self.accumulator = 0.0
+        return ticks
@@ -0,0 +1,151 @@
+import sys
+from collections import deque
+
+# Levels, a category only records messages of its level and above
+DEBUG = 10
+INFO = 20
+WARNING = 30
+OFF = 100
+level_names = {DEBUG: "DEBUG", INFO: "INFO", WARNING: "WARNING"}
+
+# Categories
+PERCEPTION = "perception"
+ESTIMATE = "estimate"
+MESSAGE = "message"
+COMBAT = "combat"
+MOVEMENT = "movement"
+GAME = "game"
+categories = [PERCEPTION, ESTIMATE, MESSAGE, COMBAT, MOVEMENT, GAME]
+
+
+class Tracer:
+    """
+    A class to record what happens in the game by level and category.
+
+    Messages are %-style format strings with their arguments. They are only
+    formatted when a record is echoed or dumped, so pass cheap immutable values
+    (e.g. positions instead of agents) and check enabled before computing
+    expensive arguments. Records below the level of their category are dropped
+    right away, which keeps a disabled tracer close to free.
+
+    Attributes:
+    -----------
+    levels : dict
+        A dictionary mapping every category to its minimum level.
+    buffer : deque
+        The last records as (tick, category, level, message, args) tuples.
+    echo : bool
+        Whether records are also printed when they are recorded.
+    tick : int
+        The current tick, stored with every record.
+    """
+
+    def __init__(self, level=WARNING, buffer_size=1000, echo=True):
+        """
+        Initialize the Tracer class.
+
+        Parameters:
+        -----------
+        level : int, optional
+            The minimum level of all categories (default is WARNING).
+        buffer_size : int, optional
+            The number of records kept in the ring buffer (default is 1000).
+        echo : bool, optional
+            Print records when they are recorded (default is True).
+        """
+        self.levels = dict.fromkeys(categories, level)
+        self.buffer = deque(maxlen=buffer_size)
+        self.echo = echo
+        self.tick = 0
+
+    def configure(self, level=None, only=None, echo=None, buffer_size=None):
+        """
+        Change what is recorded.
+
+        Parameters:
+        -----------
+        level : int, optional
+            The new minimum level (default is None to keep the levels).
+        only : list, optional
+            Set the level only for these categories and turn the others off
+            (default is None for all categories).
+        echo : bool, optional
+            Print records when they are recorded (default is None to keep it).
+        buffer_size : int, optional
+            The new size of the ring buffer, the newest records are kept
+            (default is None to keep it).
+        """
+        if level is not None:
+            for category in self.levels:
+                if only is None or category in only:
+                    self.levels[category] = level
+                else:
+                    self.levels[category] = OFF
+        if echo is not None:
+            self.echo = echo
+        if buffer_size is not None:
+            self.buffer = deque(self.buffer, maxlen=buffer_size)
+
+    def enabled(self, category, level):
+        """
+        Check if a message of a category and level would be recorded.
+        """
+        return level >= self.levels[category]
+
+    def log(self, category, level, message, *args):
+        """
+        Record a message if its category is enabled for its level.
+
+        Parameters:
+        -----------
+        category : str
+            The category of the message (e.g. PERCEPTION).
+        level : int
+            The level of the message (e.g. DEBUG).
+        message : str
+            A %-style format string.
+        *args
+            The arguments of the format string.
+        """
+        if level < self.levels[category]:
+            return
+        record = (self.tick, category, level, message, args)
+        self.buffer.append(record)
+        if self.echo:
+            print(self.format(record))
+
+    def format(self, record):
+        """
+        Format a record as a line of text.
+        """
+        tick, category, level, message, args = record
+        text = message % args if args else message
+        return f"[{tick}] {level_names.get(level, level)} {category}: {text}"
+
+    def dump(self, file=None, last=None):
+        """
+        Print the records of the ring buffer.
+
+        Parameters:
+        -----------
+        file : file, optional
+            Where to print to (default is None for sys.stdout).
+        last : int, optional
+            Only print the newest records (default is None for all).
+        """
+        file = file or sys.stdout
+        records = list(self.buffer)
+        if last is not None:
+            records = records[-last:]
+        for record in records:
+            print(self.format(record), file=file)
+
+    def clear(self):
+        """
+        Remove all records from the ring buffer.
+        """
+        self.buffer.clear()
+
+
+# The tracer used by the game
+tracer = Tracer()
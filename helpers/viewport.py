@@ -0,0 +1,169 @@
+import pygame
+
+
+class Viewport:
+    """
+    A class to map the cells of a world onto the pixels of a window, scrolled and
+    zoomed like a camera.
+
+    The zoom is the size of a cell in whole pixels. The offset is the pixel of the
+    zoomed world shown in the top left corner of the window, it is kept inside the
+    world so the camera can not leave it.
+
+    Attributes:
+    -----------
+    width : int
+        The width of the window in pixels.
+    height : int
+        The height of the window in pixels.
+    world_size : int
+        The size of the world grid.
+    cell_size : int
+        The size of a cell in pixels at the current zoom.
+    min_cell_size : int
+        The smallest cell size zooming out can reach.
+    max_cell_size : int
+        The largest cell size zooming in can reach.
+    x : int
+        The horizontal offset of the camera in pixels.
+    y : int
+        The vertical offset of the camera in pixels.
+    """
+
+    def __init__(
+        self,
+        width,
+        height,
+        world_size,
+        cell_size=None,
+        min_cell_size=1,
+        max_cell_size=128,
+    ):
+        """
+        Initialize the Viewport class, showing the top left corner of the world.
+
+        Parameters:
+        -----------
+        width : int
+            The width of the window in pixels.
+        height : int
+            The height of the window in pixels.
+        world_size : int
+            The size of the world grid.
+        cell_size : int, optional
+            The size of a cell in pixels (default is None to fit the world into
+            the window).
+        min_cell_size : int, optional
+            The smallest cell size zooming out can reach (default is 1).
+        max_cell_size : int, optional
+            The largest cell size zooming in can reach (default is 128).
+        """
+        self.width = width
+        self.height = height
+        self.world_size = world_size
+        self.min_cell_size = min_cell_size
+        self.max_cell_size = max(max_cell_size, min_cell_size)
+        self.x = self.y = 0
+        if cell_size is None:
+            self.fit()
+        else:
+            self.cell_size = cell_size
+            self.clamp()
+
+    @property
+    def state(self):
+        """
+        Get the (x, y, cell_size) of the camera, a change means every pixel moved.
+        """
+        return self.x, self.y, self.cell_size
+
+    def fit(self):
+        """
+        Zoom out until the whole world fits into the window.
+        """
+        fitting = min(self.width, self.height) // self.world_size
+        self.cell_size = min(max(fitting, self.min_cell_size), self.max_cell_size)
+        self.x = self.y = 0
+        self.clamp()
+
+    def clamp(self):
+        """
+        Keep the camera inside the world.
+        """
+        world = self.world_size * self.cell_size
+        self.x = min(max(self.x, 0), max(world - self.width, 0))
+        self.y = min(max(self.y, 0), max(world - self.height, 0))
+
+    def pan(self, dx, dy):
+        """
+        Move the camera by (dx, dy) pixels.
+        """
+        self.x += dx
+        self.y += dy
+        self.clamp()
+
+    def zoom(self, factor, anchor=None):
+        """
+        Scale the cells by a factor, keeping the point below an anchor in place.
+
+        Parameters:
+        -----------
+        factor : float
+            The factor to scale the cell size by, e.g. 2 or 0.5.
+        anchor : tuple, optional
+            The (x, y) pixel of the window that stays in place (default is None
+            for the center of the window).
+
+        Returns:
+        --------
+        bool
+            True if the cell size changed.
+        """
+        size = round(self.cell_size * factor)
+        if size == self.cell_size:
+            # small cells would never grow by rounding
+            size += 1 if factor > 1 else -1
+        size = min(max(size, self.min_cell_size), self.max_cell_size)
+        if size == self.cell_size:
+            return False
+        if anchor is None:
+            anchor = self.width // 2, self.height // 2
+        ax, ay = anchor
+        self.x = (self.x + ax) * size // self.cell_size - ax
+        self.y = (self.y + ay) * size // self.cell_size - ay
+        self.cell_size = size
+        self.clamp()
+        return True
+
+    def visible_range(self):
+        """
+        Get the cells inside the window.
+
+        Returns:
+        --------
+        tuple
+            The (x0, y0, x1, y1) bounds of the visible cells, x1 and y1 exclusive.
+        """
+        size = self.cell_size
+        x0, y0 = self.x // size, self.y // size
+        x1 = min(-(-(self.x + self.width) // size), self.world_size)
+        y1 = min(-(-(self.y + self.height) // size), self.world_size)
+        return x0, y0, x1, y1
+
+    def cell_rect(self, x, y):
+        """
+        Get the rectangle of the cell at (x, y) in window pixels.
+        """
+        size = self.cell_size
+        return pygame.Rect(x * size - self.x, y * size - self.y, size, size)
+
+    def cells_in(self, rect):
+        """
+        Get the positions of all cells a window rectangle touches.
+        """
+        size = self.cell_size
+        x0 = max((rect.left + self.x) // size, 0)
+        y0 = max((rect.top + self.y) // size, 0)
+        x1 = min((rect.right - 1 + self.x) // size, self.world_size - 1)
+        y1 = min((rect.bottom - 1 + self.y) // size, self.world_size - 1)
+        return [(x, y) for x in range(x0, x1 + 1) for y in range(y0, y1 + 1)]
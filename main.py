@@ -2,23 +2,50 @@
 import pygame
 from pygame.locals import *
 from environment import Environment
+from environment.runtime import AgentRuntime
+from helpers.image_processing import assets
+from helpers.render_cache import RenderCache
+from helpers.renderer import GridRenderer
+from helpers.simulation_clock import SimulationClock
+from helpers.viewport import Viewport
 import asyncio  # Necessary for pygbag
 import csv
+import heapq
+import time
 from datetime import datetime
-from environment.entities import Wumpus, Gold
+from environment.entities import Agent, Wumpus, Pit, Gold
+from helpers.essentials import Action, move_actions
+from helpers.trace import tracer, INFO, GAME, MOVEMENT
 
 # Run pygbag main.py to play the game in the browser
 
 # Initialize Pygame
 pygame.init()
 
+# Fonts and texts are rendered once and reused by all frames
+render_cache = RenderCache()
+
+# Show what happens in the game, press L to dump the recorded trace
+tracer.configure(level=INFO, echo=True)
+
 # Set up the game window
 WIDTH, HEIGHT = 900, 900
 GRID_SIZE = 10
-CELL_SIZE = WIDTH // GRID_SIZE
+# The size the sprites are loaded at, big worlds are zoomed out by the viewport
+CELL_SIZE = max(WIDTH // GRID_SIZE, 32)
 screen = pygame.display.set_mode((WIDTH, HEIGHT))
 pygame.display.set_caption("Wumpus World")
 
+# Load the sprites of all entities in the background while the game starts up,
+# with SPRITE_ATLAS they are packed into one texture atlas
+SPRITE_ATLAS = True
+SPRITE_PATHS = [
+    path
+    for entity in (Agent, Wumpus, Pit, Gold)
+    for path in entity.default_image_paths().values()
+]
+assets.preload(SPRITE_PATHS, [CELL_SIZE])
+
 # Define colors
 GRID_COLOR = (200, 200, 200)
 TEXT_COLOR = (255, 255, 255)
@@ -45,14 +72,35 @@ class WumpusGame:
         The threshold time for key hold.
     all_agents : list
         List to keep track of all agents and their scores.
+    clock : SimulationClock
+        Decides how many ticks run per frame, T switches between the fixed, turbo
+        and unlimited mode.
+    viewport : Viewport
+        The camera on the world, the mouse wheel zooms, dragging with the right
+        mouse button scrolls and Home shows the whole world again.
     """
 
     def __init__(self):
         """
         Initialize the WumpusGame class.
         """
+        if SPRITE_ATLAS and CELL_SIZE not in assets.atlases:
+            assets.build_atlas(SPRITE_PATHS, CELL_SIZE)
         # Initialize the environment and agent
         self.environment = Environment(size=GRID_SIZE, cell_size=CELL_SIZE)
+        # Shows the whole world at first, the mouse wheel zooms and dragging with
+        # the right mouse button scrolls
+        self.viewport = Viewport(WIDTH, HEIGHT, GRID_SIZE)
+        # Redraws only the changed cells of the environment inside the viewport
+        self.renderer = GridRenderer(
+            screen,
+            self.environment,
+            CELL_SIZE,
+            GRID_COLOR,
+            BACKGROUND_COLOR,
+            CELL_REVEAL_COLOR,
+            self.viewport,
+        )
         # Search the first agent with auto_mode set to False
         self.agent = self.get_next_agent()
         self.game_over = False  # Add a game_over flag
@@ -69,9 +117,13 @@ class WumpusGame:
         # List to keep track of all agents and their scores
         self.all_agents = []
 
-        # Interval for calling the act function (default 1 second)
-        self.act_interval = 1000  # 1000  # milliseconds
-        self.last_act_time = 0  # last time the act function was called
+        # One tick per second at 30 frames per second, independent of each other
+        self.clock = SimulationClock(timestep=1.0, fps=30)
+
+        # The agents think as asyncio tasks next to the frame loop, a tick may
+        # take a few frames but a slow planner can not freeze the window
+        self.runtime = AgentRuntime(self.environment, deadline=1 / 60)
+        self.tick_task = None  # the tick that is currently computed
 
         self.DEBUG = True
         self.debug_allow_next_step = True
@@ -88,85 +140,97 @@ class WumpusGame:
         try:
             return next(
                 agent
-                for agent in self.environment.entities
-                if agent.entity_type == "Agent" and not agent.auto_mode and agent.alive
+                for agent in self.environment.entities.agents()
+                if not agent.auto_mode and agent.alive
             )
         except StopIteration:
-            print("No alive agent with auto_mode set to False found.")
+            tracer.log(GAME, INFO, "No alive agent with auto_mode set to False found.")
             return None
 
     def draw_environment(self):
         """
-        Draw the game environment including the grid and entities.
+        Draw the cells that changed since the last frame and the overlays on top.
         """
-        # Clear the screen
-        screen.fill(BACKGROUND_COLOR)
-
-        # Draw the grid and entities in one loop
-        for x in range(GRID_SIZE):
-            for y in range(GRID_SIZE):
-                rect = pygame.Rect(x * CELL_SIZE, y * CELL_SIZE, CELL_SIZE, CELL_SIZE)
-                pygame.draw.rect(screen, GRID_COLOR, rect, 1)
-
-                cell = self.environment.grid[x][y]
-                if cell.visible:
-                    pygame.draw.rect(
-                        screen, CELL_REVEAL_COLOR, rect
-                    )  # Fill with grey color
-
-                if cell.current_image is not None:
-                    image = cell.current_image
-                    draw_x = x * CELL_SIZE + (CELL_SIZE - image.get_width()) // 2
-                    draw_y = y * CELL_SIZE + (CELL_SIZE - image.get_height()) // 2
-                    screen.blit(image, (draw_x, draw_y))
-
-        # Draw the scoreboard
-        self.draw_scoreboard()
+        scoreboard = self.get_scoreboard_lines()
+        overlays = [
+            (
+                "scoreboard",
+                scoreboard,
+                lambda surface: self.draw_scoreboard(surface, scoreboard),
+            )
+        ]
 
         # Draw the game over label if the game is over
         if self.game_over:
-            self.draw_game_over_label()
-            self.draw_restart_button()
+            label = self.get_game_over_lines()
+            overlays.append(
+                (
+                    "game over",
+                    label,
+                    lambda surface: self.draw_game_over_label(surface, label),
+                )
+            )
+            overlays.append(("restart", None, self.draw_restart_button))
 
-        # Update the display once
-        pygame.display.flip()
+        # Only push the changed parts of the screen
+        rects = self.renderer.draw(overlays)
+        if rects:
+            pygame.display.update(rects)
 
-    def draw_game_over_label(self):
-        """
-        Draw the game over label.
+    def get_game_over_lines(self):
         """
+        Get the text of the game over label.
 
-        total_score = self.environment.entity_counts[Wumpus] * 1000 + self.environment.entity_counts[Gold] * 100
-        agent_score = sum([agent.score for agent in self.environment.entities if agent.entity_type == 'Agent'])
-        font = pygame.font.Font(None, 72)
-        game_over_text1 = "Agents decided to end the game"
-        game_over_text2 = f"Score: {agent_score} / {total_score} points"
-        text_surface1 = font.render(game_over_text1, True, (255, 0, 0))
-        screen.blit(
-            text_surface1,
-            (
-                WIDTH // 2 - text_surface1.get_width() // 2,
-                HEIGHT // 3 - text_surface1.get_height() // 2,
-            ),
+        Returns:
+        --------
+        tuple
+            The lines of the label.
+        """
+        total_score = (
+            self.environment.entity_counts[Wumpus] * 1000
+            + self.environment.entity_counts[Gold] * 100
         )
-        text_surface2 = font.render(game_over_text2, True, (255, 0, 0))
-        screen.blit(
-            text_surface2,
-            (
-                WIDTH // 2 - text_surface2.get_width() // 2,
-                HEIGHT // 2 - text_surface2.get_height() // 2,
-            ),
+        agent_score = sum(agent.score for agent in self.environment.entities.agents())
+        return (
+            "Agents decided to end the game",
+            f"Score: {agent_score} / {total_score} points",
         )
 
-    def draw_restart_button(self):
+    def draw_game_over_label(self, surface, lines):
+        """
+        Draw the game over label.
+
+        Returns:
+        --------
+        list
+            The rectangles covered by the label.
+        """
+        rects = []
+        for i, (line, height) in enumerate(zip(lines, (HEIGHT // 3, HEIGHT // 2))):
+            text_surface = render_cache.text(("game over", i), line, 72, (255, 0, 0))
+            rects.append(
+                surface.blit(
+                    text_surface,
+                    (
+                        WIDTH // 2 - text_surface.get_width() // 2,
+                        height - text_surface.get_height() // 2,
+                    ),
+                )
+            )
+        return rects
+
+    def draw_restart_button(self, surface):
         """
         Draw the restart button.
+
+        Returns:
+        --------
+        list
+            The rectangle of the button.
         """
-        font = pygame.font.Font(None, 36)
-        pygame.draw.rect(screen, (255, 255, 255), self.restart_button)
-        restart_text = "Restart"
-        text_surface = font.render(restart_text, True, (0, 0, 0))
-        screen.blit(
+        pygame.draw.rect(surface, (255, 255, 255), self.restart_button)
+        text_surface = render_cache.text("restart", "Restart", 36, (0, 0, 0))
+        surface.blit(
             text_surface,
             (
                 self.restart_button.x
@@ -175,37 +239,43 @@ class WumpusGame:
                 + (self.restart_button.height - text_surface.get_height()) // 2,
             ),
         )
+        return [self.restart_button.copy()]
 
-    def draw_scoreboard(self):
+    def get_scoreboard_lines(self):
         """
-        Draw the scoreboard for the top 3 agents alive.
+        Get the text of the scoreboard for the top 3 agents alive.
+
+        Returns:
+        --------
+        tuple
+            The header and one line per agent.
         """
-        font = pygame.font.Font(None, 36)
-        y_offset = 10
+        # Get the top 3 agents by score
+        top_agents = heapq.nlargest(
+            3, self.environment.entities.agents(), key=lambda a: a.score
+        )
+        return ("Top 3 Agent Scores",) + tuple(
+            f"Agent {agent.position}: {agent.score}" for agent in top_agents
+        )
 
-        # Draw the header
-        header_text = "Top 3 Agent Scores"
-        header_surface = font.render(header_text, True, (255, 255, 255))
-        screen.blit(header_surface, (10, y_offset))
-        y_offset += 40
+    def draw_scoreboard(self, surface, lines):
+        """
+        Draw the scoreboard.
 
-        # Get the top 3 agents by score
-        top_agents = sorted(
-            [
-                agent
-                for agent in self.environment.entities
-                if agent.entity_type == "Agent"
-            ],
-            key=lambda a: a.score,
-            reverse=True,
-        )[:3]
-
-        # Draw the scores
-        for agent in top_agents:
-            score_text = f"Agent {agent.position}: {agent.score}"
-            text_surface = font.render(score_text, True, (255, 255, 255))
-            screen.blit(text_surface, (10, y_offset))
+        Returns:
+        --------
+        list
+            The rectangles covered by the lines.
+        """
+        y_offset = 10
+        rects = []
+        for i, line in enumerate(lines):
+            text_surface = render_cache.text(
+                ("scoreboard", i), line, 36, (255, 255, 255)
+            )
+            rects.append(surface.blit(text_surface, (10, y_offset)))
             y_offset += 40
+        return rects
 
     def check_agent_status(self):
         """
@@ -245,33 +315,71 @@ class WumpusGame:
                 direction = direction_map[key]
                 if self.agent.direction == direction:
                     try:
-                        self.agent.act(f"move_{direction}")
+                        self.agent.act(move_actions[direction])
                     except (IndexError, ValueError) as e:
-                        print(e)
+                        tracer.log(MOVEMENT, INFO, "%s", e)
                 self.agent.change_direction(direction)
             # Check if the key is Space for attacking or Enter for collecting
             elif key == K_SPACE:
-                self.agent.act("attack")
+                self.agent.act(Action.ATTACK)
             elif key == K_RETURN:
-                self.agent.act("collect")
+                self.agent.act(Action.COLLECT)
             elif key == K_c:
-                self.agent.act("communicate")
+                self.agent.act(Action.COMMUNICATE)
         else:
 
             # game controll
             if key == K_d:
                 self.DEBUG = not self.DEBUG
+                # do not make up the ticks of the pause
+                self.clock.reset()
             elif key == K_s and self.DEBUG and not self.debug_allow_next_step:
                 self.debug_allow_next_step = True
+            elif key == K_l:
+                tracer.dump()
+            elif key == K_t:
+                tracer.log(GAME, INFO, "Clock mode: %s", self.clock.next_mode())
+            elif key in (K_PLUS, K_EQUALS, K_KP_PLUS):
+                self.clock.timestep /= 2
+            elif key in (K_MINUS, K_KP_MINUS):
+                self.clock.timestep *= 2
+            elif key == K_HOME:
+                self.viewport.fit()
+
+    async def advance(self, ticks=None, budget=None):
+        """
+        Run ticks one after another until the game is over.
+
+        Parameters:
+        -----------
+        ticks : int, optional
+            The maximum number of ticks (default is None for no limit).
+        budget : float, optional
+            Stop after this many seconds (default is None for no limit).
+        """
+        start = time.perf_counter()
+        count = 0
+        while ticks is None or count < ticks:
+            if self.environment.game_over or self.environment.is_done():
+                return
+            await self.runtime.step()
+            count += 1
+            if budget is not None and time.perf_counter() - start >= budget:
+                return
+
+    def tick_idle(self):
+        """
+        Check if no tick is being computed.
+        """
+        return self.tick_task is None or self.tick_task.done()
 
     async def run(self):
         """
         Run the main game loop.
         """
-        # Set up the clock for event handling and frame rate
-        clock = pygame.time.Clock()
         # Main game loop
         while self.running:
+            frame_start = time.perf_counter()
 
             # Get the current time and pressed keys
             current_time = pygame.time.get_ticks()
@@ -282,6 +390,9 @@ class WumpusGame:
                 # Check if the event is a quit event
                 if event.type == QUIT:
                     self.running = False
+                # Draw everything again when the window was covered
+                elif event.type == WINDOWEXPOSED:
+                    self.renderer.invalidate()
                 # Check if the event is a key press event for a selected agent
                 elif event.type == KEYDOWN and self.agent:
                     self.handle_key_event(event.key)
@@ -293,6 +404,12 @@ class WumpusGame:
                 if event.type == MOUSEBUTTONDOWN and self.game_over:
                     if self.restart_button.collidepoint(event.pos):
                         self.restart_game()
+                # Zoom around the mouse and scroll while the right button is held
+                elif event.type == MOUSEWHEEL and event.y:
+                    factor = 2 if event.y > 0 else 0.5
+                    self.viewport.zoom(factor, pygame.mouse.get_pos())
+                elif event.type == MOUSEMOTION and event.buttons[2]:
+                    self.viewport.pan(-event.rel[0], -event.rel[1])
             # Check if the agent is set and the key is held
             if (
                 self.agent
@@ -304,32 +421,39 @@ class WumpusGame:
                         self.key_hold_time = current_time
                         break
 
-            if (self.DEBUG and self.debug_allow_next_step) or not self.DEBUG:
+            if self.tick_task is not None and self.tick_task.done():
+                # a tick that failed ends the game with its error instead of
+                # leaving it frozen
+                task, self.tick_task = self.tick_task, None
+                if not task.cancelled() and task.exception() is not None:
+                    raise task.exception()
+
+            if self.game_over or not self.tick_idle():
+                pass
+            elif self.DEBUG:
+                # Step a single tick per press of S
                 if self.debug_allow_next_step:
                     self.debug_allow_next_step = False
+                    self.tick_task = asyncio.create_task(self.advance(1))
+            elif self.clock.mode == "fixed":
+                # Compute the due ticks next to the frames
+                ticks = self.clock.due(current_time / 1000)
+                if ticks:
+                    self.tick_task = asyncio.create_task(self.advance(ticks))
+            else:
+                # Fill the frame with ticks and only draw the last state
+                await self.advance(
+                    self.clock.due(current_time / 1000), self.clock.tick_budget()
+                )
+
+            self.check_agent_status()
+            self.draw_environment()
+            # Wait for the next frame, the agents think in the meantime
+            await asyncio.sleep(
+                self.clock.frame_wait(time.perf_counter() - frame_start)
+            )
 
-                # Call act for every agent in auto mode at the specified interval
-                if (
-                    not self.game_over
-                    and current_time - self.last_act_time >= self.act_interval
-                ):
-                    print(
-                        "------------------------------------- SIM STEP --------------------------------------------"
-                    )
-                    for agent in self.environment.entities:
-                        if (
-                            agent.entity_type == "Agent"
-                            and agent.auto_mode
-                            and agent.alive
-                        ):
-                            agent.act()
-                    self.last_act_time = current_time
-
-                self.check_agent_status()
-                self.draw_environment()
-            clock.tick(30)
-            await asyncio.sleep(0)
-
+        self.runtime.close()
         self.save_scores_to_csv()
         # pygame.quit()
 
@@ -337,6 +461,9 @@ class WumpusGame:
         """
         Restart the game by reinitializing the game state.
         """
+        if self.tick_task:
+            self.tick_task.cancel()
+        self.runtime.close()
         self.__init__()  # Reinitialize the game state
         asyncio.create_task(self.run())  # Schedule the game loop
 
@@ -345,9 +472,7 @@ class WumpusGame:
         Save the scores of all agents to a CSV file.
         """
         # Add remaining agents to the list
-        self.all_agents.extend(
-            agent for agent in self.environment.entities if agent.entity_type == "Agent"
-        )
+        self.all_agents.extend(self.environment.entities.agents())
 
         # Get the current timestamp
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -0,0 +1,448 @@
+# FILE: simulation.py
+import argparse
+import asyncio
+import concurrent.futures
+import contextlib
+import os
+import random
+import time
+from environment import Environment
+from environment.distributed import ProcessRuntime
+from environment.entities import Agent
+from environment.runtime import AgentRuntime
+from helpers.trace import tracer, DEBUG
+
+# Run python simulation.py to evaluate the agents without a window
+
+
+def run_episode(
+    size=10,
+    seed=None,
+    max_ticks=500,
+    quiet=True,
+    array_grid=False,
+    agent_options=None,
+    entity_counts=None,
+    executor=None,
+):
+    """
+    Run a single headless episode as fast as possible.
+
+    Parameters:
+    -----------
+    size : int, optional
+        The size of the environment grid (default is 10).
+    seed : int, optional
+        The seed for the random generator, None for a random world (default is None).
+    max_ticks : int, optional
+        The maximum number of ticks before the episode is cut off (default is 500).
+    quiet : bool, optional
+        Suppress the console output of the agents (default is True).
+    array_grid : bool, optional
+        Store the grid in NumPy planes (default is False).
+    agent_options : dict, optional
+        Keyword arguments passed to every agent, e.g. {"inference_mode": "exact"}
+        (default is None).
+    entity_counts : dict, optional
+        Numbers of entities per type overriding the defaults (default is None).
+    executor : concurrent.futures.Executor, optional
+        A thread pool the agents decide in (default is None).
+
+    Returns:
+    --------
+    dict
+        The number of ticks, the total score and the number of surviving agents.
+    """
+    if seed is not None:
+        random.seed(seed)
+
+    with contextlib.ExitStack() as stack:
+        if quiet:
+            devnull = stack.enter_context(open(os.devnull, "w"))
+            stack.enter_context(contextlib.redirect_stdout(devnull))
+
+        environment = Environment(
+            size=size,
+            headless=True,
+            array_grid=array_grid,
+            agent_options=agent_options,
+            entity_counts=entity_counts,
+            executor=executor,
+        )
+        agents = environment.get_auto_agents()
+        ticks = 0
+        while ticks < max_ticks and not environment.is_done():
+            environment.step()
+            ticks += 1
+
+    return episode_result(environment, agents, seed, ticks)
+
+
+def episode_result(environment, agents, seed, ticks):
+    """
+    Summarize an episode.
+
+    Returns:
+    --------
+    dict
+        The number of ticks, the total score and the number of surviving agents.
+    """
+    return {
+        "seed": seed,
+        "ticks": ticks,
+        "score": sum(agent.score for agent in agents),
+        "alive": sum(agent.alive for agent in agents),
+        "game_over": environment.game_over,
+    }
+
+
+async def run_episode_async(
+    size=10,
+    seed=None,
+    max_ticks=500,
+    array_grid=False,
+    agent_options=None,
+    entity_counts=None,
+    deadline=None,
+):
+    """
+    Run a single headless episode with the agents as asyncio tasks, so many
+    episodes can share one event loop. See run_episode for the parameters.
+
+    Parameters:
+    -----------
+    deadline : float, optional
+        The think budget of a tick in seconds, see AgentRuntime (default is None).
+
+    Returns:
+    --------
+    dict
+        The number of ticks, the total score and the number of surviving agents.
+    """
+    # seed and build the world before the first await, other episodes on the loop
+    # use the same random generator
+    if seed is not None:
+        random.seed(seed)
+    environment = Environment(
+        size=size,
+        headless=True,
+        array_grid=array_grid,
+        agent_options=agent_options,
+        entity_counts=entity_counts,
+    )
+    runtime = AgentRuntime(environment, deadline)
+    agents = environment.get_auto_agents()
+    ticks = 0
+    try:
+        while ticks < max_ticks and not environment.is_done():
+            await runtime.step()
+            ticks += 1
+    finally:
+        runtime.close()
+
+    return episode_result(environment, agents, seed, ticks)
+
+
+def run_distributed_episode(
+    size=10,
+    seed=0,
+    max_ticks=500,
+    array_grid=False,
+    agent_options=None,
+    entity_counts=None,
+    workers=2,
+):
+    """
+    Run a single headless episode with the agents in worker processes. See
+    run_episode for the parameters.
+
+    Parameters:
+    -----------
+    workers : int, optional
+        The number of worker processes, see ProcessRuntime (default is 2).
+
+    Returns:
+    --------
+    dict
+        The number of ticks, the total score and the number of surviving agents.
+    """
+    runtime = ProcessRuntime(
+        seed,
+        workers,
+        size=size,
+        array_grid=array_grid,
+        agent_options=agent_options,
+        entity_counts=entity_counts,
+    )
+    environment = runtime.environment
+    agents = environment.get_auto_agents()
+    ticks = 0
+    try:
+        while ticks < max_ticks and not environment.is_done():
+            runtime.step()
+            ticks += 1
+    finally:
+        runtime.close()
+
+    return episode_result(environment, agents, seed, ticks)
+
+
+def run_batch(
+    episodes,
+    size=10,
+    seed=0,
+    max_ticks=500,
+    quiet=True,
+    array_grid=False,
+    agent_options=None,
+    entity_counts=None,
+    executor=None,
+):
+    """
+    Run several seeded headless episodes one after another.
+
+    Parameters:
+    -----------
+    episodes : int
+        The number of episodes to run.
+    size : int, optional
+        The size of the environment grid (default is 10).
+    seed : int, optional
+        The seed of the first episode, the following ones count up (default is 0).
+    max_ticks : int, optional
+        The maximum number of ticks per episode (default is 500).
+    quiet : bool, optional
+        Suppress the console output of the agents (default is True).
+    array_grid : bool, optional
+        Store the grid in NumPy planes (default is False).
+    agent_options : dict, optional
+        Keyword arguments passed to every agent (default is None).
+    entity_counts : dict, optional
+        Numbers of entities per type overriding the defaults (default is None).
+    executor : concurrent.futures.Executor, optional
+        A thread pool the agents decide in (default is None).
+
+    Returns:
+    --------
+    list
+        The results of all episodes as returned by run_episode.
+    """
+    return [
+        run_episode(
+            size,
+            seed + episode,
+            max_ticks,
+            quiet,
+            array_grid,
+            agent_options,
+            entity_counts,
+            executor,
+        )
+        for episode in range(episodes)
+    ]
+
+
+def run_async_batch(
+    episodes,
+    size=10,
+    seed=0,
+    max_ticks=500,
+    quiet=True,
+    array_grid=False,
+    agent_options=None,
+    entity_counts=None,
+    deadline=None,
+):
+    """
+    Run several seeded headless episodes concurrently on one event loop. See
+    run_batch for the parameters.
+
+    Parameters:
+    -----------
+    deadline : float, optional
+        The think budget of a tick in seconds, see AgentRuntime (default is None).
+
+    Returns:
+    --------
+    list
+        The results of all episodes as returned by run_episode_async.
+    """
+
+    async def run_all():
+        return await asyncio.gather(
+            *(
+                run_episode_async(
+                    size,
+                    seed + episode,
+                    max_ticks,
+                    array_grid,
+                    agent_options,
+                    entity_counts,
+                    deadline,
+                )
+                for episode in range(episodes)
+            )
+        )
+
+    with contextlib.ExitStack() as stack:
+        if quiet:
+            devnull = stack.enter_context(open(os.devnull, "w"))
+            stack.enter_context(contextlib.redirect_stdout(devnull))
+        return asyncio.run(run_all())
+
+
+def run_vector_batch(num_worlds, size=10, seed=0, max_ticks=500, policy=None):
+    """
+    Run one episode in each of several worlds stepped together by a VectorEnvironment.
+
+    Parameters:
+    -----------
+    num_worlds : int
+        The number of worlds.
+    size : int, optional
+        The size of the environment grids (default is 10).
+    seed : int, optional
+        The seed for placing the entities and for the random policy (default is 0).
+    max_ticks : int, optional
+        The maximum number of ticks per episode (default is 500).
+    policy : callable, optional
+        Maps the observations to an action array, see VectorEnvironment.step
+        (default is a random policy).
+
+    Returns:
+    --------
+    dict
+        The ticks and the total score of each world.
+    """
+    # Imported lazily so the object based simulation does not need NumPy
+    import numpy as np
+    from environment.vector_environment import VectorEnvironment
+
+    environment = VectorEnvironment(num_worlds, size)
+    observations = environment.reset(seed)
+    if policy is None:
+        rng = np.random.default_rng(seed)
+        policy = lambda _: rng.integers(0, 11, (num_worlds, environment.num_agents))
+
+    running = np.ones(num_worlds, dtype=np.bool_)
+    ticks = np.zeros(num_worlds, dtype=np.int64)
+    scores = np.zeros(num_worlds, dtype=np.int64)
+    for _ in range(max_ticks):
+        observations, rewards, dones = environment.step(policy(observations))
+        # Finished worlds keep stepping, but their results are frozen
+        ticks += running
+        scores += rewards.sum(axis=1) * running
+        running &= ~dones
+        if not running.any():
+            break
+
+    return {"ticks": ticks, "scores": scores}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Headless Wumpus World simulation")
+    parser.add_argument("--episodes", type=int, default=100)
+    parser.add_argument("--size", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-ticks", type=int, default=500)
+    parser.add_argument("--array-grid", action="store_true")
+    parser.add_argument(
+        "--vector", action="store_true", help="step all worlds at once, random policy"
+    )
+    parser.add_argument(
+        "--inference", choices=["heuristic", "exact"], default="heuristic"
+    )
+    parser.add_argument("--movement", choices=["random", "planned"], default="random")
+    parser.add_argument("--knowledge", choices=["own", "team"], default="own")
+    parser.add_argument("--agents", type=int, default=5)
+    parser.add_argument(
+        "--threads", type=int, default=0, help="decide in a thread pool of this size"
+    )
+    parser.add_argument(
+        "--concurrent", action="store_true", help="run the episodes on one event loop"
+    )
+    parser.add_argument(
+        "--deadline", type=float, default=None, help="think budget of a tick in seconds"
+    )
+    parser.add_argument(
+        "--processes", type=int, default=0, help="run the agents in worker processes"
+    )
+    parser.add_argument("--verbose", action="store_true", help="print the trace")
+    parser.add_argument(
+        "--trace", type=int, default=0, help="dump the last N trace records at the end"
+    )
+    args = parser.parse_args()
+    if args.verbose or args.trace:
+        tracer.configure(level=DEBUG, echo=args.verbose, buffer_size=args.trace or None)
+
+    start = time.perf_counter()
+    if args.vector:
+        batch = run_vector_batch(args.episodes, args.size, args.seed, args.max_ticks)
+        results = [
+            {"ticks": int(ticks), "score": int(score)}
+            for ticks, score in zip(batch["ticks"], batch["scores"])
+        ]
+    elif args.processes:
+        results = [
+            run_distributed_episode(
+                args.size,
+                args.seed + episode,
+                args.max_ticks,
+                array_grid=args.array_grid,
+                agent_options={
+                    "inference_mode": args.inference,
+                    "movement_mode": args.movement,
+                    "knowledge_mode": args.knowledge,
+                },
+                entity_counts={Agent: args.agents},
+                workers=args.processes,
+            )
+            for episode in range(args.episodes)
+        ]
+    elif args.concurrent:
+        results = run_async_batch(
+            args.episodes,
+            args.size,
+            args.seed,
+            args.max_ticks,
+            quiet=not args.verbose,
+            array_grid=args.array_grid,
+            agent_options={
+                "inference_mode": args.inference,
+                "movement_mode": args.movement,
+                "knowledge_mode": args.knowledge,
+            },
+            entity_counts={Agent: args.agents},
+            deadline=args.deadline,
+        )
+    else:
+        executor = None
+        if args.threads:
+            executor = concurrent.futures.ThreadPoolExecutor(args.threads)
+        results = run_batch(
+            args.episodes,
+            args.size,
+            args.seed,
+            args.max_ticks,
+            quiet=not args.verbose,
+            array_grid=args.array_grid,
+            agent_options={
+                "inference_mode": args.inference,
+                "movement_mode": args.movement,
+                "knowledge_mode": args.knowledge,
+            },
+            entity_counts={Agent: args.agents},
+            executor=executor,
+        )
+        if executor:
+            executor.shutdown()
+    elapsed = time.perf_counter() - start
+
+    ticks = sum(result["ticks"] for result in results)
+    score = sum(result["score"] for result in results)
+    print(f"Episodes: {len(results)}, ticks: {ticks}, seconds: {elapsed:.2f}")
+    print(f"Episodes per second: {len(results) / elapsed:.1f}")
+    print(f"Ticks per second: {ticks / elapsed:.1f}")
+    print(f"Average score: {score / len(results):.1f}")
+    if args.trace:
+        tracer.dump(last=args.trace)
@@ -0,0 +1,46 @@
+import random
+from helpers.belief_map import BeliefMap, UNKNOWN, probability_hash
+
+VALUES = (UNKNOWN, 0.0, 0.25, 0.5, 1.0)
+
+
+def full_digest(beliefs):
+    """
+    Hash all probabilities from scratch, relative to a map without estimates.
+    """
+    digest = 0
+    for target, plane in beliefs.probabilities.items():
+        for index, probability in enumerate(plane):
+            digest ^= probability_hash(target, index, probability)
+            digest ^= probability_hash(target, index, UNKNOWN)
+    return digest
+
+
+def test_rolling_digest_equals_full_digest():
+    rng = random.Random(11)
+    beliefs = BeliefMap(5)
+    for _ in range(500):
+        target = rng.choice(("pit", "wumpus"))
+        beliefs.set_probability(target, rng.randrange(25), rng.choice(VALUES))
+        assert beliefs.digest == full_digest(beliefs)
+
+
+def test_equal_beliefs_have_equal_digests():
+    rng = random.Random(13)
+    writes = [
+        (rng.choice(("pit", "wumpus")), index, rng.choice(VALUES))
+        for index in range(25)
+    ]
+    forward, backward = BeliefMap(5), BeliefMap(5)
+    for write in writes:
+        forward.set_probability(*write)
+    for target, index, _ in writes:
+        # a detour over another value must not leave a trace
+        backward.set_probability(target, index, 0.75)
+    for write in reversed(writes):
+        backward.set_probability(*write)
+    assert forward.digest == backward.digest
+
+    for target, index, _ in writes:
+        forward.set_probability(target, index, UNKNOWN)
+    assert forward.digest == 0
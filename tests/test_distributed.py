@@ -0,0 +1,32 @@
+import os
+import pytest
+import simulation
+from environment.distributed import ProcessRuntime
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+@pytest.mark.parametrize("agent_options", [None, {"movement_mode": "planned"}])
+def test_distributed_episode_equals_episode(agent_options, workers):
+    for seed in range(2):
+        expected = simulation.run_episode(10, seed, 500, agent_options=agent_options)
+        assert (
+            simulation.run_distributed_episode(
+                10, seed, 500, agent_options=agent_options, workers=workers
+            )
+            == expected
+        )
+
+
+def test_close_after_a_worker_died_keeps_the_error_and_cleans_up():
+    runtime = ProcessRuntime(0, 2, size=10)
+    runtime.step()
+    runtime.processes[0].kill()
+    runtime.processes[0].join()
+    with pytest.raises((EOFError, OSError)):
+        try:
+            for _ in range(5):
+                runtime.step()
+        finally:
+            runtime.close()
+    assert not any(process.is_alive() for process in runtime.processes)
+    assert not os.path.exists(runtime.directory)
@@ -0,0 +1,76 @@
+import threading
+import pygame
+import pytest
+from helpers.image_processing import AssetManager
+
+
+def save_image(path, size, color):
+    image = pygame.Surface(size)
+    image.fill(color)
+    pygame.image.save(image, str(path))
+    return str(path)
+
+
+def test_sprites_are_cached_by_path_and_size(tmp_path):
+    path = save_image(tmp_path / "sprite.png", (40, 20), (255, 0, 0))
+    assets = AssetManager(max_images=2)
+
+    small = assets.get(path, 10)
+    assert small.get_size() == (10, 5)
+    assert assets.get(path, 20).get_size() == (20, 10)
+    assert assets.get(path, 10) is small
+
+    # the least recently used size is evicted
+    assets.get(path, 30)
+    assert list(assets.images) == [(path, 10), (path, 30)]
+
+
+def test_atlas_hands_out_subsurfaces(tmp_path):
+    paths = [
+        save_image(tmp_path / f"{i}.png", (8, 8), (i * 50, 0, 0)) for i in range(3)
+    ]
+    assets = AssetManager()
+    atlas = assets.build_atlas(paths, 8)
+
+    assert atlas.get_size() == (16, 16)
+    for i, path in enumerate(paths):
+        sprite = assets.get(path, 8)
+        assert sprite.get_parent() is atlas
+        assert sprite.get_at((0, 0))[:3] == (i * 50, 0, 0)
+
+
+def test_clear_drops_running_preloads(tmp_path, monkeypatch):
+    path = save_image(tmp_path / "sprite.png", (8, 8), (0, 255, 0))
+    started, release = threading.Event(), threading.Event()
+    load = pygame.image.load
+
+    def slow_load(*args):
+        started.set()
+        release.wait()
+        return load(*args)
+
+    monkeypatch.setattr(pygame.image, "load", slow_load)
+    assets = AssetManager()
+    assets.preload([path], [8])
+    future = assets.pending[path, 8]
+    started.wait()
+    assets.clear()
+    release.set()
+    future.result()
+
+    assert not assets.images
+    assert not assets.sources
+    assert not assets.pending
+
+
+def test_failed_preload_is_retried(tmp_path):
+    path = str(tmp_path / "sprite.png")
+    assets = AssetManager()
+    assets.preload([path], [8])
+    with pytest.raises(FileNotFoundError):
+        assets.get(path, 8)
+    assert not assets.pending
+
+    save_image(path, (8, 8), (0, 0, 255))
+    assets.preload([path], [8])
+    assert assets.get(path, 8).get_at((0, 0))[:3] == (0, 0, 255)
@@ -0,0 +1,90 @@
+import itertools
+import random
+import pytest
+from helpers.belief_map import BeliefMap
+from helpers.inference import (
+    ExactInference,
+    enumerate_assignments,
+    normalize_component,
+    solve_shape,
+)
+
+
+def brute_force(num_variables, constraints, prior):
+    """
+    Weigh every assignment of the variables, the reference for the exact solver.
+    """
+    total = 0.0
+    weighted = [0.0] * num_variables
+    for values in itertools.product((0, 1), repeat=num_variables):
+        if any(
+            sum(values[k] for k in members) != count for count, members in constraints
+        ):
+            continue
+        weight = 1.0
+        for value in values:
+            weight *= prior if value else 1.0 - prior
+        total += weight
+        for k, value in enumerate(values):
+            if value:
+                weighted[k] += weight
+    if not total:
+        return None
+    return [w / total for w in weighted]
+
+
+def random_component(rng):
+    num_variables = rng.randint(1, 9)
+    hidden = [rng.random() < 0.3 for _ in range(num_variables)]
+    constraints = []
+    for _ in range(rng.randint(1, 6)):
+        members = tuple(
+            sorted(rng.sample(range(num_variables), rng.randint(1, num_variables)))
+        )
+        count = sum(hidden[k] for k in members)
+        if rng.random() < 0.1:
+            # an inconsistent perception
+            count += 1
+        constraints.append((count, members))
+    return num_variables, constraints
+
+
+def test_enumeration_matches_brute_force():
+    rng = random.Random(3)
+    for _ in range(300):
+        num_variables, constraints = random_component(rng)
+        prior = rng.choice((0.1, 0.2, 0.5))
+        expected = brute_force(num_variables, constraints, prior)
+        result = enumerate_assignments(num_variables, constraints, prior)
+        if expected is None:
+            assert result is None
+        else:
+            assert result == pytest.approx(expected)
+
+
+def test_solve_component_maps_normalized_shapes_back():
+    rng = random.Random(5)
+    inference = ExactInference(BeliefMap(6))
+    for _ in range(200):
+        num_variables, constraints = random_component(rng)
+        variables = rng.sample(range(36), num_variables)
+        expected = brute_force(num_variables, constraints, 0.2)
+        result = inference.solve_component(variables, constraints, 0.2)
+        if expected is None:
+            assert result is None
+        else:
+            assert result == pytest.approx(expected)
+
+
+def test_components_of_the_same_shape_share_the_cache():
+    # the same chain, numbered in two different orders
+    first = [(1, (0, 1)), (1, (1, 2))]
+    second = [(1, (2, 0)), (1, (0, 1))]
+    assert normalize_component(3, first)[1] == normalize_component(3, second)[1]
+
+    inference = ExactInference(BeliefMap(6))
+    inference.solve_component([7, 8, 9], first, 0.3)
+    hits = solve_shape.cache_info().hits
+    result = inference.solve_component([20, 14, 26], second, 0.3)
+    assert solve_shape.cache_info().hits == hits + 1
+    assert result == pytest.approx(brute_force(3, second, 0.3))
@@ -0,0 +1,67 @@
+import threading
+from environment.message_bus import MessageBus
+from helpers.messages import Message, MessageKind
+
+
+class Recipient:
+    def __init__(self, bus, position, log, alive=True):
+        self.bus = bus
+        self.position = position
+        self.log = log
+        self.alive = alive
+        self.answer = None
+
+    def receive(self, message):
+        self.log.append((self.position, message))
+        if self.answer is not None:
+            recipient, self.answer = self.answer, None
+            self.bus.send(recipient, Message(MessageKind.STAY, self.position))
+
+
+def test_messages_round_trip_through_the_string_protocol():
+    for message in (
+        Message(MessageKind.SAFE_CELL, (1, 2)),
+        Message(MessageKind.EXIT),
+    ):
+        assert Message.from_string(str(message)) == message
+
+
+def test_deliver_by_position_with_answers_and_without_the_dead():
+    bus, log = MessageBus(), []
+    late = Recipient(bus, (2, 0), log)
+    early = Recipient(bus, (0, 3), log)
+    dead = Recipient(bus, (1, 1), log, alive=False)
+    late.answer = early
+    stuck = Message(MessageKind.STUCK, (5, 5))
+    for recipient in (late, dead, early):
+        bus.send(recipient, stuck)
+
+    assert len(bus) == 3
+    assert bus.deliver() == 3
+    assert log == [
+        ((0, 3), stuck),
+        ((2, 0), stuck),
+        ((0, 3), Message(MessageKind.STAY, (2, 0))),
+    ]
+    assert len(bus) == 0
+
+
+def test_collect_holds_back_messages_of_the_thread():
+    bus, log = MessageBus(), []
+    recipient = Recipient(bus, (0, 0), log)
+    message = Message(MessageKind.VOTE, (1, 0))
+    outboxes = []
+
+    def decide():
+        with bus.collect() as outbox:
+            bus.send(recipient, message)
+        outboxes.append(outbox)
+
+    thread = threading.Thread(target=decide)
+    thread.start()
+    thread.join()
+    assert len(bus) == 0
+
+    bus.post(outboxes[0])
+    assert bus.deliver() == 1
+    assert log == [((0, 0), message)]
@@ -0,0 +1,52 @@
+import random
+from helpers.belief_map import BeliefMap, UNKNOWN
+from helpers.pathfinding import DistanceField
+
+
+def fresh_distances(beliefs):
+    field = DistanceField(beliefs)
+    field.update(range(beliefs.size * beliefs.size))
+    return list(field.get_distances())
+
+
+def test_incremental_field_matches_rebuild():
+    rng = random.Random(7)
+    size = 12
+    beliefs = BeliefMap(size)
+    field = DistanceField(beliefs)
+    cells = range(size * size)
+    field.update(cells)
+    field.get_distances()
+
+    for _ in range(300):
+        changed = rng.sample(cells, rng.randint(1, 6))
+        for index in changed:
+            roll = rng.random()
+            if roll < 0.4:
+                beliefs.set_safe(index)
+            elif roll < 0.7:
+                beliefs.visited[index] = 1
+            elif roll < 0.85:
+                beliefs.visited[index] = 0
+                beliefs.set_probability("pit", index, UNKNOWN)
+            else:
+                beliefs.visited[index] = 0
+        field.update(changed)
+        assert not field.stale
+        assert list(field.get_distances()) == fresh_distances(beliefs)
+
+
+def test_next_steps_lead_to_the_goal():
+    beliefs = BeliefMap(4)
+    for y in range(4):
+        beliefs.set_safe(beliefs.index((0, y)))
+    for y in range(3):
+        beliefs.visited[beliefs.index((0, y))] = 1
+    field = DistanceField(beliefs)
+    field.update(range(16))
+
+    assert field.next_steps(beliefs.index((0, 0))) == [beliefs.index((0, 1))]
+    # visiting the goal leaves no goal to walk to
+    beliefs.visited[beliefs.index((0, 3))] = 1
+    field.update((beliefs.index((0, 3)),))
+    assert field.next_steps(beliefs.index((0, 0))) == []
@@ -0,0 +1,66 @@
+from types import SimpleNamespace
+from environment.reservations import ReservationTable
+
+
+def agent(position, score=0):
+    return SimpleNamespace(
+        entity_type="Agent", position=position, score=score, alive=True
+    )
+
+
+def table(*agents):
+    occupied = {agent.position: agent for agent in agents}
+    environment = SimpleNamespace(entities=SimpleNamespace(at=occupied.get))
+    return ReservationTable(environment)
+
+
+def test_contested_cell_goes_to_move_then_score_then_position():
+    low, high, claim = agent((0, 1)), agent((2, 1), score=5), agent((1, 0), 9)
+    moves, denied = table(low, high, claim).settle(
+        [(low, (1, 1), True), (claim, (1, 1), False), (high, (1, 1), True)]
+    )
+    assert moves == [(high, (1, 1))]
+    assert denied == [low, claim]
+
+    first, second = agent((0, 0)), agent((2, 0))
+    moves, denied = table(first, second).settle(
+        [(second, (1, 0), True), (first, (1, 0), True)]
+    )
+    assert moves == [(first, (1, 0))]
+    assert denied == [second]
+
+
+def test_agents_leave_cells_before_others_enter_them():
+    front, back = agent((1, 0)), agent((0, 0))
+    moves, denied = table(front, back).settle(
+        [(back, (1, 0), True), (front, (2, 0), True)]
+    )
+    assert moves == [(front, (2, 0)), (back, (1, 0))]
+    assert denied == []
+
+
+def test_move_into_staying_agent_is_denied():
+    mover, stayer = agent((0, 0)), agent((1, 0))
+    reservations = table(mover, stayer)
+    moves, denied = reservations.settle([(mover, (1, 0), True)])
+    assert moves == [] and denied == [mover]
+    assert reservations.is_blocked(mover, (1, 0))
+
+
+def test_cycle_is_denied_and_claims_are_reserved():
+    a, b, c = agent((0, 0)), agent((1, 0)), agent((1, 1))
+    d = agent((3, 3))
+    reservations = table(a, b, c, d)
+    moves, denied = reservations.settle(
+        [
+            (a, (1, 0), True),
+            (b, (1, 1), True),
+            (c, (0, 0), True),
+            (d, (3, 4), False),
+        ]
+    )
+    assert moves == []
+    assert sorted(denied, key=lambda agent: agent.position) == [a, b, c]
+    assert reservations.reserved == {(3, 4): d}
+    assert reservations.is_blocked(a, (3, 4))
+    assert not reservations.is_blocked(d, (3, 4))
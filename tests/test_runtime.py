@@ -0,0 +1,44 @@
+import asyncio
+import random
+import pytest
+import simulation
+from environment import Environment
+from environment.runtime import AgentRuntime
+
+OPTIONS = [
+    None,
+    {"movement_mode": "planned"},
+    {"knowledge_mode": "team", "movement_mode": "planned"},
+]
+
+
+@pytest.mark.parametrize("agent_options", OPTIONS)
+def test_async_batch_equals_batch(agent_options):
+    expected = simulation.run_batch(4, agent_options=agent_options)
+    assert simulation.run_async_batch(4, agent_options=agent_options) == expected
+
+
+def test_failing_decide_fails_the_step_and_the_runtime_recovers():
+    random.seed(0)
+    environment = Environment(10, headless=True)
+    runtime = AgentRuntime(environment)
+    broken = environment.get_auto_agents()[1]
+
+    def decide():
+        raise RuntimeError("broken planner")
+
+    async def run():
+        try:
+            await runtime.step()
+            broken.decide = decide
+            with pytest.raises(RuntimeError, match="broken planner"):
+                await asyncio.wait_for(runtime.step(), 5)
+            assert not runtime.tasks
+            del broken.decide
+            for _ in range(3):
+                await asyncio.wait_for(runtime.step(), 5)
+        finally:
+            runtime.close()
+
+    asyncio.run(run())
+    assert environment.scheduler.tick == 5
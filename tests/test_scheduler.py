@@ -0,0 +1,19 @@
+import random
+from environment import Environment
+
+
+def test_exit_vote_ends_the_game_in_the_commit_phase():
+    random.seed(0)
+    environment = Environment(10, headless=True)
+    scheduler = environment.scheduler
+    for _ in range(500):
+        agents = scheduler.begin()
+        plans = [(agent, scheduler.decide(agent)) for agent in agents]
+        # deciding only reads the world
+        assert not environment.game_over
+        scheduler.commit(plans)
+        if environment.game_over:
+            break
+    assert environment.game_over
+    assert all(cell.visible for row in environment.grid for cell in row)
+    assert not any(agent.control.exit_vote for agent in agents)